@@ -3,6 +3,7 @@ import json
 import uuid
 
 from swarm import Swarm
+from swarm.cassette import cassette_from_env
 
 
 def run_function_evals(agent, test_cases, n=1, eval_path=None):
@@ -10,9 +11,21 @@ def run_function_evals(agent, test_cases, n=1, eval_path=None):
     results = []
     eval_id = str(uuid.uuid4())
     eval_timestamp = datetime.datetime.now().isoformat()
-    client = Swarm()
-
-    for test_case in test_cases:
+    client = Swarm(client=cassette_from_env())
+
+    # run every iteration of every case concurrently up front
+    jobs = [
+        {"id": (case_index, i), "agent": agent, "messages": test_case["conversation"]}
+        for case_index, test_case in enumerate(test_cases)
+        for i in range(n)
+    ]
+    responses = {}
+    for result in client.run_batch(jobs, max_concurrency=8, max_turns=1):
+        if result.error:
+            raise result.error
+        responses[result.job_id] = result.response
+
+    for case_index, test_case in enumerate(test_cases):
         case_correct = 0
         case_results = {
             "messages": test_case["conversation"],
@@ -24,9 +37,7 @@ def run_function_evals(agent, test_cases, n=1, eval_path=None):
         print(f"\033[94mConversation: \033[0m{test_case['conversation']}\n")
         for i in range(n):
             print(f"\033[90mIteration: {i + 1}/{n}\033[0m")
-            response = client.run(
-                agent=agent, messages=test_case["conversation"], max_turns=1
-            )
+            response = responses[(case_index, i)]
             output = extract_response_info(response)
             actual_function = output.get("tool_calls", "None")
             actual_message = output.get("message", "None")
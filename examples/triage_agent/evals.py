@@ -1,10 +1,12 @@
 from swarm import Swarm
+from swarm.cassette import cassette_from_env
 from agents import triage_agent, sales_agent, refunds_agent
 from evals_util import evaluate_with_llm_bool, BoolEvalResult
 import pytest
 import json
 
-client = Swarm()
+# SWARM_CASSETTE=evals.jsonl replays recorded completions offline
+client = Swarm(client=cassette_from_env())
 
 CONVERSATIONAL_EVAL_SYSTEM_PROMPT = """
 You will be provided with a conversation between a user and an agent, as well as a main goal for the conversation.
@@ -1,8 +1,10 @@
 from swarm import Swarm
+from swarm.cassette import cassette_from_env
 from agents import weather_agent
 import pytest
 
-client = Swarm()
+# SWARM_CASSETTE=evals.jsonl replays recorded completions offline
+client = Swarm(client=cassette_from_env())
 
 
 def run_and_get_tool_calls(agent, query):
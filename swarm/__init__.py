@@ -1,4 +1,31 @@
-from .core import Swarm
-from .types import Agent, Response
+from typing import TYPE_CHECKING
 
-__all__ = ["Swarm", "Agent", "Response"]
+if TYPE_CHECKING:
+    from .core import AsyncSwarm, Swarm
+    from .types import Agent, Response
+
+__all__ = ["Swarm", "AsyncSwarm", "Agent", "Response"]
+
+# public names are imported on first access, so `import swarm` stays cheap and
+# `openai` is only loaded once a client is actually needed
+_LAZY_IMPORTS = {
+    "Swarm": ".core",
+    "AsyncSwarm": ".core",
+    "Agent": ".types",
+    "Response": ".types",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
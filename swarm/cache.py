@@ -0,0 +1,274 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .streaming import StreamAccumulator
+
+
+def cache_key(create_params: dict) -> str:
+    """
+    Canonical hash of a chat completion request. Streaming options are left
+    out, so a streamed and a non-streamed request for the same completion share
+    an entry.
+    """
+    params = {
+        k: v for k, v in create_params.items() if k not in ("stream", "stream_options")
+    }
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CompletionCache:
+    """
+    Base class for completion caches. Subclasses implement `load` and `store`;
+    hit and miss counters are kept here.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # caches are shared by run_batch and tool executor threads
+        self._stats_lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def store(self, key: str, completion: dict) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[dict]:
+        completion = self.load(key)
+        with self._stats_lock:
+            if completion is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return completion
+
+    def set(self, key: str, completion: dict) -> None:
+        self.store(key, completion)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+class LRUCache(CompletionCache):
+    """In-memory cache keeping at most `max_size` completions, each for at most `ttl` seconds."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, completion = entry
+            if self.ttl is not None and time.monotonic() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return completion
+
+    def store(self, key: str, completion: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), completion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache(CompletionCache):
+    """Persistent cache in a SQLite file, shared between processes and runs."""
+
+    def __init__(self, path: str = "swarm_cache.sqlite", ttl: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, completion TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def load(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, created FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        completion, created = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            return None
+        return json.loads(completion)
+
+    def store(self, key: str, completion: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)",
+                (key, json.dumps(completion), time.time()),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def chunks_to_completion(chunks: List[ChatCompletionChunk]) -> ChatCompletion:
+    """Assembles the chunks of a streamed completion into the equivalent ChatCompletion."""
+    accumulator = StreamAccumulator(sender=None)
+    finish_reason = "stop"
+    usage = None
+    for chunk in chunks:
+        accumulator.add(chunk)
+        if chunk.choices and chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+        if chunk.usage:
+            usage = chunk.usage
+    message = accumulator.message()
+    first = chunks[0]
+    return ChatCompletion(
+        id=first.id,
+        created=first.created,
+        model=first.model,
+        object="chat.completion",
+        system_fingerprint=first.system_fingerprint,
+        usage=usage,
+        choices=[
+            {
+                "index": 0,
+                "finish_reason": finish_reason,
+                "message": {
+                    "role": "assistant",
+                    "content": message["content"] or None,
+                    "tool_calls": message["tool_calls"],
+                },
+            }
+        ],
+    )
+
+
+def completion_to_chunks(completion: ChatCompletion) -> List[ChatCompletionChunk]:
+    """Re-chunks a ChatCompletion into the stream a streaming request would have produced."""
+    choice = completion.choices[0]
+    message = choice.message
+
+    def chunk(delta, finish_reason=None, usage=None):
+        return ChatCompletionChunk(
+            id=completion.id,
+            created=completion.created,
+            model=completion.model,
+            object="chat.completion.chunk",
+            system_fingerprint=completion.system_fingerprint,
+            choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            usage=usage,
+        )
+
+    chunks = [chunk({"role": "assistant", "content": message.content or ""})]
+    for index, tool_call in enumerate(message.tool_calls or []):
+        chunks.append(
+            chunk(
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": tool_call.id,
+                            "type": tool_call.type,
+                            "function": {
+                                "name": tool_call.function.name,
+                                "arguments": tool_call.function.arguments,
+                            },
+                        }
+                    ]
+                }
+            )
+        )
+    chunks.append(chunk({}, choice.finish_reason, completion.usage))
+    return chunks
+
+
+class ReplayStream:
+    """Serves a list of chunks as either a sync or an async completion stream."""
+
+    def __init__(self, chunks: List[ChatCompletionChunk]):
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    def close(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RecordingStream:
+    """
+    Wraps a live (sync or async) completion stream, passing chunks through and
+    handing the assembled ChatCompletion to `on_complete` once it is exhausted.
+    `assemble` turns the list of chunks into what `on_complete` receives.
+    """
+
+    def __init__(
+        self,
+        stream,
+        on_complete: Callable[[ChatCompletion], None],
+        assemble: Callable[[List[ChatCompletionChunk]], object] = None,
+    ):
+        self.stream = stream
+        self.on_complete = on_complete
+        self.assemble = assemble or chunks_to_completion
+        self.chunks = []
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.chunks.append(chunk)
+            yield chunk
+        self.finish()
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.chunks.append(chunk)
+            yield chunk
+        self.finish()
+
+    def finish(self) -> None:
+        if self.chunks:
+            self.on_complete(self.assemble(self.chunks))
+
+    def close(self) -> None:
+        close = getattr(self.stream, "close", None)
+        if close:
+            close()
+
+    async def aclose(self) -> None:
+        close = getattr(self.stream, "close", None)
+        if close:
+            await close()
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from .cache import (
+    RecordingStream,
+    ReplayStream,
+    cache_key,
+    chunks_to_completion,
+    completion_to_chunks,
+)
+
+MODES = ("replay", "record", "auto")
+MATCHES = ("strict", "lenient")
+
+# fields shared by every chunk of a stream, stored once per recording
+_CHUNK_HEADER = ("id", "created", "model", "object", "system_fingerprint")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that has no recording."""
+
+
+def lenient_key(create_params: dict) -> str:
+    """
+    Fingerprint of the conversation alone: the non-system messages' roles,
+    contents and tool calls. Model, instructions, tool schemas and sampling
+    parameters are ignored, as are tool call ids.
+    """
+    conversation = [
+        (
+            message.get("role"),
+            message.get("content"),
+            [
+                (tool_call["function"]["name"], tool_call["function"]["arguments"])
+                for tool_call in message.get("tool_calls") or ()
+            ],
+        )
+        for message in create_params.get("messages", ())
+        if message.get("role") != "system"
+    ]
+    canonical = json.dumps(conversation, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def completion_entry(completion: ChatCompletion) -> dict:
+    return {"completion": completion.model_dump(mode="json", exclude_none=True)}
+
+
+def stream_entry(chunks: List[ChatCompletionChunk]) -> dict:
+    dumped = [chunk.model_dump(mode="json", exclude_none=True) for chunk in chunks]
+    header = {k: dumped[0][k] for k in _CHUNK_HEADER if k in dumped[0]}
+    return {
+        "header": header,
+        "chunks": [
+            {k: v for k, v in chunk.items() if k not in header or header[k] != v}
+            for chunk in dumped
+        ],
+    }
+
+
+class RawResponse:
+    """
+    Stand-in for the SDK's raw response (`with_raw_response`), e.g. for a
+    `RateLimitScheduler`. Cassettes keep no HTTP headers.
+    """
+
+    __slots__ = ("completion", "headers")
+
+    def __init__(self, completion):
+        self.completion = completion
+        self.headers = {}
+
+    def parse(self):
+        return self.completion
+
+
+class CassetteClient:
+    """
+    Drop-in for the OpenAI client (`Swarm(client=CassetteClient(...))`) that
+    records chat completions, streamed ones included, to a JSON Lines cassette
+    and replays them by request fingerprint, for fast, offline, deterministic
+    test and eval runs.
+
+    Repeated identical requests replay their recordings in order. Streamed
+    recordings serve non-streamed requests and vice versa.
+
+    Args:
+        path: The cassette file.
+        client: Client used to record. Defaults to `OpenAI()`, built on first use.
+        mode: "replay" raises `CassetteMissError` for unrecorded requests,
+            "record" always calls the API and records, and "auto" replays what
+            is recorded and records the rest.
+        match: "strict" replays only byte-identical requests (the same fingerprint
+            as `swarm.cache`); "lenient" falls back to matching the conversation
+            alone, see `lenient_key`, so edited instructions or tool schemas
+            still replay.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        client=None,
+        mode: str = "replay",
+        match: str = "strict",
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if match not in MATCHES:
+            raise ValueError(f"match must be one of {MATCHES}, got {match!r}")
+        self.path = path
+        self.mode = mode
+        self.match = match
+        self._client = client
+        self.chat = SimpleNamespace(
+            completions=SimpleNamespace(
+                create=self.create,
+                with_raw_response=SimpleNamespace(create=self.create_raw),
+            )
+        )
+        self.recordings: Dict[str, List[dict]] = {}
+        self.lenient_recordings: Dict[str, List[dict]] = {}
+        self.replayed = 0
+        self.recorded = 0
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        self.index(json.loads(line))
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.default_client()
+        return self._client
+
+    def default_client(self):
+        from openai import OpenAI
+
+        return OpenAI()
+
+    def index(self, recording: dict) -> None:
+        self.recordings.setdefault(recording["key"], []).append(recording)
+        self.lenient_recordings.setdefault(recording["lenient_key"], []).append(recording)
+
+    def lookup(self, create_params: dict) -> Optional[dict]:
+        candidates = [("strict", cache_key(create_params), self.recordings)]
+        if self.match == "lenient":
+            candidates.append(("lenient", lenient_key(create_params), self.lenient_recordings))
+        with self._lock:
+            for kind, key, recordings in candidates:
+                if key in recordings:
+                    position = self._positions.get((kind, key), 0)
+                    self._positions[(kind, key)] = position + 1
+                    entries = recordings[key]
+                    self.replayed += 1
+                    # replay repeated requests in recorded order, then keep the last
+                    return entries[min(position, len(entries) - 1)]
+        return None
+
+    def replay(self, recording: dict, stream: bool):
+        if "completion" in recording:
+            completion = ChatCompletion.model_validate(recording["completion"])
+            return ReplayStream(completion_to_chunks(completion)) if stream else completion
+        header = recording["header"]
+        chunks = [
+            ChatCompletionChunk.model_validate({**header, **chunk})
+            for chunk in recording["chunks"]
+        ]
+        return ReplayStream(chunks) if stream else chunks_to_completion(chunks)
+
+    def record(self, create_params: dict, entry: dict) -> None:
+        recording = {
+            "key": cache_key(create_params),
+            "lenient_key": lenient_key(create_params),
+            "model": create_params.get("model"),
+            **entry,
+        }
+        line = json.dumps(recording, separators=(",", ":"))
+        with self._lock:
+            self.index(recording)
+            self.recorded += 1
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def find(self, create_params: dict) -> Optional[dict]:
+        if self.mode == "record":
+            return None
+        recording = self.lookup(create_params)
+        if recording is None and self.mode == "replay":
+            messages = create_params.get("messages") or [{}]
+            raise CassetteMissError(
+                f"No recording in {self.path} for a {create_params.get('model')} request "
+                f"ending with {messages[-1].get('content')!r}; record it with mode='auto'"
+            )
+        return recording
+
+    def wrap(self, create_params: dict, completion):
+        if create_params.get("stream"):
+            return RecordingStream(
+                completion,
+                lambda chunks: self.record(create_params, stream_entry(chunks)),
+                assemble=list,
+            )
+        self.record(create_params, completion_entry(completion))
+        return completion
+
+    def create(self, **create_params):
+        recording = self.find(create_params)
+        if recording is not None:
+            return self.replay(recording, create_params.get("stream"))
+        completion = self.client.chat.completions.create(**create_params)
+        return self.wrap(create_params, completion)
+
+    def create_raw(self, **create_params) -> RawResponse:
+        return RawResponse(self.create(**create_params))
+
+
+class AsyncCassetteClient(CassetteClient):
+    """`CassetteClient` for `AsyncSwarm`, recording through an AsyncOpenAI client."""
+
+    def default_client(self):
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI()
+
+    async def create(self, **create_params):
+        recording = self.find(create_params)
+        if recording is not None:
+            return self.replay(recording, create_params.get("stream"))
+        completion = await self.client.chat.completions.create(**create_params)
+        return self.wrap(create_params, completion)
+
+    async def create_raw(self, **create_params) -> RawResponse:
+        return RawResponse(await self.create(**create_params))
+
+
+def cassette_from_env(default_path: Optional[str] = None) -> Optional[CassetteClient]:
+    """
+    A `CassetteClient` configured by the SWARM_CASSETTE (path),
+    SWARM_CASSETTE_MODE and SWARM_CASSETTE_MATCH environment variables, or
+    None when SWARM_CASSETTE is unset and there is no `default_path`.
+    """
+    path = os.environ.get("SWARM_CASSETTE", default_path)
+    if not path:
+        return None
+    return CassetteClient(
+        path,
+        mode=os.environ.get("SWARM_CASSETTE_MODE", "replay"),
+        match=os.environ.get("SWARM_CASSETTE_MATCH", "strict"),
+    )
@@ -0,0 +1,234 @@
+import copy
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .types import Agent, TurnMetrics
+
+_agents: Dict[str, Agent] = {}
+# registered name of each registered agent, by id(agent)
+_names: Dict[int, str] = {}
+
+
+def register_agent(agent: Agent, name: Optional[str] = None) -> Agent:
+    """
+    Makes `agent` restorable from checkpoints under `name` (`agent.name` by
+    default). Every process resuming runs must register the agents they use.
+    """
+    name = name or agent.name
+    replaced = _agents.get(name)
+    if replaced is not None and replaced is not agent:
+        _names.pop(id(replaced), None)
+    _agents[name] = agent
+    _names[id(agent)] = name
+    return agent
+
+
+def registered_name(agent: Agent) -> str:
+    """The name `agent` was registered under, as stored in checkpoints."""
+    name = _names.get(id(agent))
+    if name is None or _agents.get(name) is not agent:
+        raise KeyError(
+            f"Agent {agent.name!r} is not registered; call "
+            "swarm.checkpoint.register_agent on it before running it with a "
+            "checkpoint_store"
+        )
+    return name
+
+
+def get_agent(name: str) -> Agent:
+    try:
+        return _agents[name]
+    except KeyError:
+        raise KeyError(
+            f"Agent {name!r} is not registered; call swarm.checkpoint.register_agent on it"
+        ) from None
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Checkpoint:
+    """
+    State of a run after its last completed step: the history (`messages`, of
+    which the first `init_len` were passed to `run`), the registered name of the
+    active agent, the context variables, the run's options and the metrics of
+    the turns so far. `done` once the run has returned its response.
+    """
+
+    __slots__ = (
+        "run_id",
+        "agent",
+        "messages",
+        "init_len",
+        "context_variables",
+        "model_override",
+        "max_turns",
+        "execute_tools",
+        "turns",
+        "done",
+    )
+
+    def __init__(
+        self,
+        run_id: str,
+        agent: str,
+        messages: Sequence[dict],
+        init_len: int,
+        context_variables: dict,
+        model_override: Optional[str] = None,
+        max_turns: Optional[int] = None,
+        execute_tools: bool = True,
+        turns: Optional[List[TurnMetrics]] = None,
+        done: bool = False,
+    ):
+        self.run_id = run_id
+        self.agent = agent
+        self.messages = messages
+        self.init_len = init_len
+        self.context_variables = context_variables
+        self.model_override = model_override
+        self.max_turns = max_turns
+        self.execute_tools = execute_tools
+        self.turns = turns if turns is not None else []
+        self.done = done
+
+    def state(self) -> dict:
+        """Everything but the messages, as JSON-compatible values."""
+        return {
+            "agent": self.agent,
+            "init_len": self.init_len,
+            "context_variables": self.context_variables,
+            "model_override": self.model_override,
+            "max_turns": self.max_turns,
+            "execute_tools": self.execute_tools,
+            "turns": [turn.model_dump(mode="json") for turn in self.turns],
+            "done": self.done,
+        }
+
+    @classmethod
+    def from_state(cls, run_id: str, state: dict, messages: List[dict]) -> "Checkpoint":
+        return cls(
+            run_id,
+            state["agent"],
+            messages,
+            state["init_len"],
+            state["context_variables"],
+            state["model_override"],
+            state["max_turns"],
+            state["execute_tools"],
+            [TurnMetrics.model_validate(turn) for turn in state["turns"]],
+            state["done"],
+        )
+
+
+class CheckpointStore:
+    """
+    Storage for run checkpoints (`Swarm(checkpoint_store=...)`). Subclasses
+    implement `save`, `load` and `delete`. A checkpoint's `context_variables`
+    must be JSON-serializable to be persisted.
+    """
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        raise NotImplementedError
+
+    def load(self, run_id: str) -> Optional[Checkpoint]:
+        raise NotImplementedError
+
+    def delete(self, run_id: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps checkpoints in memory, e.g. to resume a run after a recoverable error."""
+
+    def __init__(self):
+        self._runs: Dict[str, Tuple[dict, List[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        state = copy.deepcopy(checkpoint.state())
+        with self._lock:
+            self._runs[checkpoint.run_id] = (state, list(checkpoint.messages))
+
+    def load(self, run_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            saved = self._runs.get(run_id)
+        if saved is None:
+            return None
+        state, messages = saved
+        return Checkpoint.from_state(run_id, copy.deepcopy(state), list(messages))
+
+    def delete(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Persists checkpoints in a SQLite file, so runs can be resumed by another
+    process. Messages are append-only within a run, so each save only writes
+    the messages added since the previous one.
+    """
+
+    def __init__(self, path: str = "swarm_checkpoints.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, "
+                "state TEXT NOT NULL, message_count INTEGER NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages (run_id TEXT NOT NULL, "
+                "position INTEGER NOT NULL, message TEXT NOT NULL, "
+                "PRIMARY KEY (run_id, position))"
+            )
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        state = json.dumps(checkpoint.state())
+        messages = checkpoint.messages
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT message_count FROM runs WHERE run_id = ?", (checkpoint.run_id,)
+            ).fetchone()
+            saved = row[0] if row else 0
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?)",
+                (
+                    (checkpoint.run_id, position, json.dumps(messages[position]))
+                    for position in range(saved, len(messages))
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                (checkpoint.run_id, state, len(messages), time.time()),
+            )
+
+    def load(self, run_id: str) -> Optional[Checkpoint]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, message_count FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT message FROM messages WHERE run_id = ? AND position < ? "
+                "ORDER BY position",
+                (run_id, row[1]),
+            ).fetchall()
+        messages = [json.loads(message) for (message,) in rows]
+        return Checkpoint.from_state(run_id, json.loads(row[0]), messages)
+
+    def delete(self, run_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM messages WHERE run_id = ?", (run_id,))
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+# fixed per-message cost of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Offline token estimate of roughly four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def tiktoken_tokenizer(model: str = "gpt-4o") -> Callable[[str], int]:
+    """Exact token counts for OpenAI models. Requires the optional `tiktoken` package."""
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError(
+            "tiktoken_tokenizer requires tiktoken: pip install tiktoken"
+        ) from e
+    encoding = tiktoken.encoding_for_model(model)
+    return lambda text: len(encoding.encode(text))
+
+
+class ContextWindow:
+    """
+    Token budget for the prompt of an agent (`Agent.context_window`).
+
+    `fit` keeps the most recent messages that fit into `max_tokens` alongside
+    the system prompt, never separating an assistant tool call message from its
+    tool results. Token counts are cached per message, so each turn only
+    tokenizes messages it hasn't seen before.
+
+    Args:
+        max_tokens: Budget for the system prompt plus history.
+        tokenizer: Counts the tokens of a string. Defaults to an offline estimate.
+        cache_size: Maximum number of per-message token counts kept.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        tokenizer: Callable[[str], int] = estimate_tokens,
+        cache_size: int = 8192,
+    ):
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        # id(message) -> (message, tokens); holding the message keeps the id valid
+        self._counts = {}
+        # agents, and so their windows, are shared by run_batch and tool threads
+        self._lock = threading.Lock()
+
+    def count_message(self, message: dict) -> int:
+        with self._lock:
+            entry = self._counts.get(id(message))
+        if entry is not None and entry[0] is message:
+            return entry[1]
+
+        tokens = MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if content:
+            tokens += self.tokenizer(
+                content if isinstance(content, str) else json.dumps(content)
+            )
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call["function"]
+            tokens += self.tokenizer(function["name"]) + self.tokenizer(
+                function["arguments"]
+            )
+
+        with self._lock:
+            if len(self._counts) >= self.cache_size:
+                # evict the oldest entry
+                del self._counts[next(iter(self._counts))]
+            self._counts[id(message)] = (message, tokens)
+        return tokens
+
+    def count(self, messages: Sequence[dict]) -> int:
+        return sum(self.count_message(message) for message in messages)
+
+    def fit(self, instructions: str, history: Sequence[dict]) -> List[dict]:
+        """Returns the most recent messages of `history` that fit next to `instructions`."""
+        budget = (
+            self.max_tokens - self.tokenizer(instructions or "") - MESSAGE_OVERHEAD_TOKENS
+        )
+        start = end = len(history)
+        used = 0
+
+        # walk back one unit at a time: a plain message, or an assistant tool
+        # call message together with its tool results
+        while end > 0:
+            unit_start = end - 1
+            while unit_start > 0 and history[unit_start]["role"] == "tool":
+                unit_start -= 1
+            if history[end - 1]["role"] == "tool" and not history[unit_start].get(
+                "tool_calls"
+            ):
+                # tool results without their tool call can't be sent on their own
+                break
+            tokens = sum(self.count_message(history[i]) for i in range(unit_start, end))
+            # always keep the latest unit, even if it is over budget on its own
+            if used + tokens > budget and start < len(history):
+                break
+            used += tokens
+            start = end = unit_start
+
+        if start == 0:
+            return history
+        return [history[i] for i in range(start, len(history))]
+
+
+SUMMARY_INSTRUCTIONS = """Summarize the conversation below between a user and one or more assistants.
+Keep every fact, decision, open question and piece of user-provided data that later turns may depend on.
+Be concise and write the summary as a plain paragraph."""
+
+
+def message_fingerprint(message: dict) -> str:
+    """Hash of a message's content, equal for equal messages whatever their identity."""
+    canonical = json.dumps(message, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class Compaction:
+    """
+    A completed summary replacing the first `boundary` messages of a conversation.
+    `first` and `anchor` are the fingerprints of the conversation's first message
+    and of the last summarized message, used to recognise the conversation on
+    later runs.
+    """
+
+    __slots__ = ("first", "anchor", "boundary", "summary")
+
+    def __init__(self, first: str, anchor: str, boundary: int, summary: str):
+        self.first = first
+        self.anchor = anchor
+        self.boundary = boundary
+        self.summary = summary
+
+    def matches(self, messages: Sequence[dict]) -> bool:
+        return (
+            len(messages) >= self.boundary
+            and message_fingerprint(messages[self.boundary - 1]) == self.anchor
+            and message_fingerprint(messages[0]) == self.first
+        )
+
+    def summary_message(self) -> dict:
+        return {
+            "role": "system",
+            "content": f"Summary of the conversation so far:\n{self.summary}",
+        }
+
+    def apply(self, messages: Sequence[dict]) -> List[dict]:
+        return [self.summary_message(), *messages[self.boundary:]]
+
+
+class Compactor:
+    """
+    Opt-in compaction of long conversations (`Swarm(compactor=...)`).
+
+    When a run ends with more than `max_tokens` of history, the turns before the
+    last `keep_last` messages are summarized by a cheap model on a background
+    thread, e.g. while the user is typing their next message. The next run of
+    the same conversation replaces those turns with the summary, which is
+    reported on `Response.summary` / `Response.summary_boundary`. Summaries roll
+    up: later compactions summarize the previous summary and the turns after it.
+
+    Conversations are recognised by the content of their messages, so callers
+    can send back the same objects (as `run_demo_loop` does) or deserialized
+    copies of them.
+
+    Args:
+        client: Sync OpenAI client used for summaries. Defaults to `OpenAI()`.
+        model: Model producing the summaries.
+        max_tokens: History size that triggers compaction.
+        keep_last: Number of most recent messages always kept verbatim, at least 1.
+        tokenizer: Counts the tokens of a string.
+        max_conversations: Maximum number of conversations whose summary is kept.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        model: str = "gpt-4o-mini",
+        max_tokens: int = 8000,
+        keep_last: int = 6,
+        tokenizer: Callable[[str], int] = estimate_tokens,
+        max_conversations: int = 1024,
+    ):
+        if keep_last < 1:
+            # the latest message is never summarized
+            raise ValueError(f"keep_last must be at least 1, got {keep_last}")
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.max_conversations = max_conversations
+        self.counter = ContextWindow(max_tokens, tokenizer)
+        self.executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="swarm-compactor"
+        )
+        self._lock = threading.Lock()
+        # fingerprint of the first message -> latest Compaction / future of the
+        # pending one
+        self._compactions = {}
+        self._pending = {}
+
+    def lookup(self, messages: Sequence[dict]) -> Optional[Compaction]:
+        """Returns the latest completed compaction of this conversation, if any."""
+        if not messages:
+            return None
+        compaction = self._compactions.get(message_fingerprint(messages[0]))
+        if compaction is not None and compaction.matches(messages):
+            return compaction
+        return None
+
+    def schedule(
+        self,
+        messages: Sequence[dict],
+        new_messages: List[dict],
+        compaction: Optional[Compaction] = None,
+    ) -> Optional[Future]:
+        """
+        Starts summarizing the conversation `messages + new_messages` in the
+        background if it has outgrown `max_tokens`. Never blocks.
+        """
+        if not messages:
+            return None
+        full = list(messages) + new_messages
+        previous_boundary = compaction.boundary if compaction else 0
+        sent = compaction.apply(full) if compaction else full
+        if self.counter.count(sent) <= self.max_tokens:
+            return None
+
+        # keep the last messages verbatim, without splitting a tool call from its results
+        boundary = len(full) - self.keep_last
+        while boundary > 0 and full[boundary]["role"] == "tool":
+            boundary -= 1
+        if boundary <= previous_boundary:
+            return None
+
+        key = message_fingerprint(full[0])
+        with self._lock:
+            if key in self._pending:
+                return None
+            future = self._pending[key] = self.executor.submit(
+                self._compact_in_background, key, full[:boundary], compaction
+            )
+        return future
+
+    def compact(
+        self, messages: Sequence[dict], previous: Optional[Compaction] = None
+    ) -> Compaction:
+        """Summarizes `messages` (rolling up `previous`) synchronously."""
+        summarized = previous.apply(messages) if previous else list(messages)
+        transcript = "\n".join(
+            f"{m.get('sender') or m['role']}: {m.get('content') or ''}"
+            + "".join(
+                f" [calls {tc['function']['name']}({tc['function']['arguments']})]"
+                for tc in m.get("tool_calls") or []
+            )
+            for m in summarized
+        )
+        if self.client is None:
+            from openai import OpenAI
+
+            self.client = OpenAI()
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": transcript},
+            ],
+        )
+        return Compaction(
+            first=message_fingerprint(messages[0]),
+            anchor=message_fingerprint(messages[-1]),
+            boundary=len(messages),
+            summary=completion.choices[0].message.content,
+        )
+
+    def _compact_in_background(
+        self, key: str, messages: Sequence[dict], previous: Optional[Compaction]
+    ) -> Compaction:
+        try:
+            compaction = self.compact(messages, previous)
+            with self._lock:
+                self._compactions.pop(key, None)
+                self._compactions[key] = compaction
+                while len(self._compactions) > self.max_conversations:
+                    del self._compactions[next(iter(self._compactions))]
+            return compaction
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self) -> None:
+        """Blocks until every pending summary has finished (mostly for tests)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.exception()
@@ -1,35 +1,195 @@
 # Standard library imports
+import asyncio
 import copy
+import inspect
 import json
+import threading
+import time
 from collections import defaultdict
-from typing import List, Callable, Union
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Iterable,
+    Iterator,
+    List,
+    Callable,
+    Optional,
+    Tuple,
+    Union,
+)
 
 # Package/library imports
-from openai import OpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion_message_tool_call import (
+    ChatCompletionMessageToolCall,
+    Function,
+)
 
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
+from .cache import (
+    CompletionCache,
+    RecordingStream,
+    ReplayStream,
+    cache_key,
+    completion_to_chunks,
+)
+from .checkpoint import (
+    Checkpoint,
+    CheckpointStore,
+    get_agent,
+    new_run_id,
+    registered_name,
+)
+from .context import Compaction, Compactor, estimate_tokens
+from .hedging import HedgingPolicy, close_completion_async
+from .history import History
+from .streaming import StreamAccumulator
+from .util import (
+    __CTX_VARS_NAME__,
+    ToolTable,
+    debug_print,
+    get_background_loop,
+    run_coroutines,
+)
+from . import serialization
+from .scheduler import RateLimitScheduler, TokenBucket
+from .serialization import message_to_dict
+from .tracing import NoopTracer, Span, Tracer
 from .types import (
     Agent,
     AgentFunction,
-    ChatCompletionMessage,
-    ChatCompletionMessageToolCall,
-    Function,
+    BatchJob,
+    BatchResult,
     Response,
     Result,
+    ToolCallsResponse,
+    ToolMetrics,
+    ToolOutcome,
+    ToolResult,
+    TurnMetrics,
 )
 
-__CTX_VARS_NAME__ = "context_variables"
+
+def to_tool_call_objects(tool_calls: List[dict]) -> List[ChatCompletionMessageToolCall]:
+    return [
+        ChatCompletionMessageToolCall(
+            id=tool_call["id"],
+            function=Function(
+                arguments=tool_call["function"]["arguments"],
+                name=tool_call["function"]["name"],
+            ),
+            type=tool_call["type"],
+        )
+        for tool_call in tool_calls
+    ]
+
+
+def resolve_awaitables(results: list) -> list:
+    """Drives any awaitables in `results` concurrently on the shared background loop."""
+    pending = [i for i, result in enumerate(results) if inspect.isawaitable(result)]
+    if pending:
+        results = list(results)
+        for i, result in zip(pending, run_coroutines([results[i] for i in pending])):
+            results[i] = result
+    return results
+
+
+def to_batch_job(job, index: int) -> BatchJob:
+    """Accepts a BatchJob, a dict of its fields or an (agent, messages[, context_variables]) tuple."""
+    if isinstance(job, BatchJob):
+        return job
+    if isinstance(job, dict):
+        return BatchJob(**{"id": index, **job})
+    return BatchJob(id=index, **dict(zip(("agent", "messages", "context_variables"), job)))
 
 
 class Swarm:
-    def __init__(self, client=None):
-        if not client:
-            client = OpenAI()
-        self.client = client
+    def __init__(
+        self,
+        client=None,
+        tool_executor: Optional[Executor] = None,
+        cache: Optional[CompletionCache] = None,
+        compactor: Optional[Compactor] = None,
+        tracer: Optional[Tracer] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        stream_usage: bool = False,
+    ):
+        """
+        Args:
+            client: OpenAI client used for chat completions.
+            tool_executor: Optional executor (e.g. a ThreadPoolExecutor) used to
+                run the tool calls of a single turn concurrently. Tool calls run
+                one after another when not set.
+            cache: Optional `CompletionCache` serving repeated, identical requests
+                without calling the API.
+            compactor: Optional `Compactor` summarizing older turns of long
+                conversations in the background.
+            tracer: Optional `Tracer` receiving run, turn, llm, tool and handoff
+                spans. Tracing is disabled when not set.
+            scheduler: Optional `RateLimitScheduler` keeping requests within
+                the per-model rate limits; may be shared between clients.
+            hedging: Optional `HedgingPolicy` sending a duplicate request when a
+                completion is slow to produce its first token.
+            checkpoint_store: Optional `CheckpointStore` the state of each run is
+                saved to after every completion and tool batch, see `resume`.
+            stream_usage: Whether streamed completions request a final usage
+                chunk (`stream_options`), so `TurnMetrics` reports their token
+                counts. Off by default, as some compatible backends reject it.
+        """
+        # the default client is built on first use, see `client`
+        self._client = client or None
+        self.tool_executor = tool_executor
+        self.cache = cache
+        self.compactor = compactor
+        self.tracer = tracer or NoopTracer()
+        self.scheduler = scheduler
+        self.hedging = hedging
+        self.checkpoint_store = checkpoint_store
+        self.stream_usage = stream_usage
+        self.rate_limiter = None
+        # run streams whose consumer stopped iterating mid-completion
+        self.abandoned_streams = 0
+        self.abandoned_tokens = 0
+        self._stats_lock = threading.Lock()
 
-    def get_chat_completion(
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.default_client()
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    def default_client(self):
+        from openai import OpenAI
+
+        return OpenAI()
+
+    def start_history(self, messages: List) -> Tuple[History, Optional[Compaction]]:
+        compaction = self.compactor.lookup(messages) if self.compactor else None
+        if compaction:
+            return History(compaction.apply(messages)), compaction
+        return History(messages), None
+
+    def schedule_compaction(
+        self, messages: List, history: History, compaction: Optional[Compaction]
+    ) -> None:
+        if self.compactor:
+            self.compactor.schedule(messages, history.new_messages, compaction)
+
+    def get_create_params(
         self,
         agent: Agent,
         history: List,
@@ -37,23 +197,25 @@ class Swarm:
         model_override: str,
         stream: bool,
         debug: bool,
-    ) -> ChatCompletionMessage:
+    ) -> dict:
         context_variables = defaultdict(str, context_variables)
         instructions = (
             agent.instructions(context_variables)
             if callable(agent.instructions)
             else agent.instructions
         )
-        messages = [{"role": "system", "content": instructions}] + history
+        if agent.context_window:
+            windowed = agent.context_window.fit(instructions, history)
+            if len(windowed) < len(history):
+                debug_print(
+                    debug,
+                    f"Context window: sending {len(windowed)} of {len(history)} messages.",
+                )
+            history = windowed
+        messages = [{"role": "system", "content": instructions}, *history]
         debug_print(debug, "Getting chat completion for...:", messages)
 
-        tools = [function_to_json(f) for f in agent.functions]
-        # hide context_variables from model
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
+        tools = agent.get_tool_table().tools
 
         create_params = {
             "model": model_override or agent.model,
@@ -65,76 +227,278 @@ class Swarm:
 
         if tools:
             create_params["parallel_tool_calls"] = agent.parallel_tool_calls
+        if stream and self.stream_usage:
+            # adds a final chunk carrying the completion's token usage
+            create_params["stream_options"] = {"include_usage": True}
+
+        return create_params
 
+    def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> ChatCompletionMessage:
+        create_params = self.get_create_params(
+            agent, history, context_variables, model_override, stream, debug
+        )
+        if self.cache is not None:
+            key = cache_key(create_params)
+            cached = self.get_cached_completion(key, stream)
+            if cached is not None:
+                return cached
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        if self.hedging is not None:
+            completion = self.hedging.create(self.create_completion, create_params)
+        else:
+            completion = self.create_completion(create_params)
+        if self.cache is not None:
+            return self.cache_completion(key, stream, completion)
+        return completion
+
+    def create_completion(self, create_params: dict):
+        if self.scheduler is not None:
+            return self.scheduler.create(self.client, create_params)
         return self.client.chat.completions.create(**create_params)
 
-    def handle_function_result(self, result, debug) -> Result:
+    def get_cached_completion(self, key: str, stream: bool):
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        completion = ChatCompletion.model_validate(cached)
+        if stream:
+            return ReplayStream(completion_to_chunks(completion))
+        return completion
+
+    def cache_completion(self, key: str, stream: bool, completion):
+        if stream:
+            # streams are cached once fully consumed
+            return RecordingStream(
+                completion,
+                lambda assembled: self.cache.set(
+                    key, assembled.model_dump(mode="json")),
+            )
+        self.cache.set(key, completion.model_dump(mode="json"))
+        return completion
+
+    def handle_function_result(self, result, debug) -> Union[Result, ToolResult]:
         match result:
             case Result() as result:
                 return result
 
             case Agent() as agent:
-                return Result(
-                    value=json.dumps({"assistant": agent.name}),
-                    agent=agent,
-                )
+                return ToolResult(json.dumps({"assistant": agent.name}), agent)
             case _:
                 try:
-                    return Result(value=str(result))
+                    return ToolResult(str(result))
                 except Exception as e:
                     error_message = f"Failed to cast response to string: {result}. Make sure agent functions return a string or Result object. Error: {str(e)}"
                     debug_print(debug, error_message)
                     raise TypeError(error_message)
 
-    def handle_tool_calls(
+    def execute_tool_call(
         self,
-        tool_calls: List[ChatCompletionMessageToolCall],
-        functions: List[AgentFunction],
+        tool_call: ChatCompletionMessageToolCall,
+        tool_table: ToolTable,
         context_variables: dict,
         debug: bool,
-    ) -> Response:
-        function_map = {f.__name__: f for f in functions}
-        partial_response = Response(
-            messages=[], agent=None, context_variables={})
-
-        for tool_call in tool_calls:
-            name = tool_call.function.name
-            # handle missing tool case, skip to next tool
-            if name not in function_map:
-                debug_print(debug, f"Tool {name} not found in function map.")
-                partial_response.messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "tool_name": name,
-                        "content": f"Error: Tool {name} not found.",
-                    }
+    ) -> Union[ToolOutcome, Awaitable[ToolOutcome]]:
+        """
+        Runs a single tool call. Coroutine functions are not awaited here; an
+        awaitable resolving to the `ToolOutcome` is returned for the caller to drive.
+        """
+        name = tool_call.function.name
+        # handle missing tool case, skip to next tool
+        if name not in tool_table.function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            return ToolOutcome(
+                ToolResult(f"Error: Tool {name} not found."), 0.0, time.time()
+            )
+        args = serialization.loads(tool_call.function.arguments)
+        debug_print(
+            debug, f"Processing tool call: {name} with arguments {args}")
+
+        # pass context_variables to agent functions
+        if name in tool_table.context_functions:
+            args[__CTX_VARS_NAME__] = context_variables
+        started_at = time.time()
+        start = time.perf_counter()
+        raw_result = tool_table.function_map[name](**args)
+
+        if inspect.isawaitable(raw_result):
+            return self.handle_async_function_result(raw_result, debug)
+        result = self.handle_function_result(raw_result, debug)
+        return ToolOutcome(result, time.perf_counter() - start, started_at)
+
+    async def handle_async_function_result(self, awaitable, debug) -> ToolOutcome:
+        started_at = time.time()
+        start = time.perf_counter()
+        result = self.handle_function_result(await awaitable, debug)
+        return ToolOutcome(result, time.perf_counter() - start, started_at)
+
+    def merge_tool_results(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        outcomes: List[ToolOutcome],
+        metrics: Optional[TurnMetrics] = None,
+    ) -> ToolCallsResponse:
+        # results are merged in tool_call order, regardless of completion order,
+        # so context_variables updates and the last handoff stay deterministic
+        messages = []
+        context_variables = {}
+        agent = None
+
+        for tool_call, (result, duration, started_at) in zip(tool_calls, outcomes):
+            if metrics is not None:
+                metrics.tools.append(
+                    ToolMetrics(tool_call.function.name, tool_call.id, duration, started_at)
                 )
-                continue
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
-
-            func = function_map[name]
-            # pass context_variables to agent functions
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-            raw_result = function_map[name](**args)
-
-            result: Result = self.handle_function_result(raw_result, debug)
-            partial_response.messages.append(
+            messages.append(
                 {
                     "role": "tool",
                     "tool_call_id": tool_call.id,
-                    "tool_name": name,
+                    "tool_name": tool_call.function.name,
                     "content": result.value,
                 }
             )
-            partial_response.context_variables.update(result.context_variables)
+            context_variables.update(result.context_variables)
             if result.agent:
-                partial_response.agent = result.agent
+                agent = result.agent
+
+        return ToolCallsResponse(messages, agent, context_variables)
+
+    def trace_turn(
+        self,
+        run_span: Span,
+        metrics: TurnMetrics,
+        start: float,
+        handoff: Optional[Agent] = None,
+    ) -> None:
+        """
+        Exports the spans of a finished turn from its `TurnMetrics`: the turn
+        itself, its completion, each tool call and the handoff it made, if any.
+        """
+        if not self.tracer.enabled:
+            return
+        end = time.time()
+        turn_span = self.tracer.record_span(
+            "turn", start, end, run_span, agent=metrics.agent
+        )
+        llm_attributes = {
+            "model": metrics.model,
+            "prompt_tokens": metrics.prompt_tokens,
+            "completion_tokens": metrics.completion_tokens,
+            "cached_tokens": metrics.cached_tokens,
+        }
+        if metrics.time_to_first_token is not None:
+            llm_attributes["time_to_first_token"] = metrics.time_to_first_token
+        self.tracer.record_span(
+            "llm", start, start + metrics.llm_time, turn_span, **llm_attributes
+        )
+        for tool in metrics.tools:
+            self.tracer.record_span(
+                "tool",
+                tool.started_at,
+                tool.started_at + tool.duration,
+                turn_span,
+                tool=tool.name,
+                tool_call_id=tool.tool_call_id,
+            )
+        if handoff is not None:
+            self.tracer.record_span(
+                "handoff",
+                end,
+                end,
+                turn_span,
+                from_agent=metrics.agent,
+                to_agent=handoff.name,
+            )
+
+    def record_abandoned(
+        self, run_span: Span, accumulator: Optional[StreamAccumulator], debug: bool
+    ) -> None:
+        """
+        Counts a run stream abandoned by its consumer and the completion tokens
+        it had received from the model so far, which are thrown away.
+        """
+        tokens = estimate_tokens(accumulator.received_text()) if accumulator else 0
+        with self._stats_lock:
+            self.abandoned_streams += 1
+            self.abandoned_tokens += tokens
+        run_span.set(abandoned_tokens=tokens)
+        debug_print(debug, f"Run stream abandoned, discarding {tokens} completion tokens.")
+
+    def abandon_stream(
+        self,
+        run_span: Span,
+        completion,
+        accumulator: Optional[StreamAccumulator],
+        started: dict,
+        streaming: bool,
+        error: BaseException,
+        debug: bool,
+    ) -> None:
+        """
+        Cleans up a run stream that ended early: closes the completion if it is
+        still streaming and cancels eagerly started tool calls that haven't run
+        yet (or are coroutines). Tools already running in a thread can't be
+        interrupted and finish in the background.
+        """
+        for future in started.values():
+            future.cancel()
+        if streaming:
+            close = getattr(completion, "close", None)
+            if close is not None:
+                close()
+        if isinstance(error, GeneratorExit):
+            self.record_abandoned(run_span, accumulator if streaming else None, debug)
 
-        return partial_response
+    def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: Union[ToolTable, List[AgentFunction]],
+        context_variables: dict,
+        debug: bool,
+        metrics: Optional[TurnMetrics] = None,
+    ) -> ToolCallsResponse:
+        tool_table = (
+            functions if isinstance(functions, ToolTable) else ToolTable(functions)
+        )
+
+        def call(tool_call):
+            return self.execute_tool_call(
+                tool_call, tool_table, context_variables, debug
+            )
+
+        if self.tool_executor and len(tool_calls) > 1:
+            results = list(self.tool_executor.map(call, tool_calls))
+        else:
+            results = [call(tool_call) for tool_call in tool_calls]
+
+        return self.merge_tool_results(tool_calls, resolve_awaitables(results), metrics)
+
+    def submit_tool_call(
+        self,
+        executor: Executor,
+        tool_call: ChatCompletionMessageToolCall,
+        tool_table: ToolTable,
+        context_variables: dict,
+        debug: bool,
+    ) -> Future:
+        """Starts a tool call in the background and returns a future for its `ToolOutcome`."""
+        if tool_call.function.name in tool_table.coroutine_functions:
+            return asyncio.run_coroutine_threadsafe(
+                self.execute_tool_call(
+                    tool_call, tool_table, context_variables, debug),
+                get_background_loop(),
+            )
+        return executor.submit(
+            self.execute_tool_call, tool_call, tool_table, context_variables, debug
+        )
 
     def run_and_stream(
         self,
@@ -145,90 +509,699 @@ class Swarm:
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        eager_tools: bool = False,
     ):
         active_agent = agent
         context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
+        history, compaction = self.start_history(messages)
+        init_len = len(history)
+        # with eager_tools, tool calls start as soon as their arguments have been streamed
+        eager = eager_tools and execute_tools
+        eager_executor = None
+        if eager:
+            eager_executor = self.tool_executor or ThreadPoolExecutor(
+                thread_name_prefix="swarm-eager-tools"
+            )
+
+        try:
+            yield from self.stream_turns(
+                active_agent,
+                messages,
+                history,
+                compaction,
+                init_len,
+                context_variables,
+                model_override,
+                debug,
+                max_turns,
+                execute_tools,
+                eager_executor,
+            )
+        finally:
+            if eager_executor and eager_executor is not self.tool_executor:
+                eager_executor.shutdown(wait=False)
+
+    def stream_turns(
+        self,
+        active_agent: Agent,
+        messages: List,
+        history: History,
+        compaction: Optional[Compaction],
+        init_len: int,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        eager_executor: Optional[Executor],
+    ):
+        turns = []
+        completion, accumulator, started, streaming = None, None, {}, False
+        with self.tracer.start_span("run", agent=active_agent.name) as run_span:
+            try:
+                while len(history) - init_len < max_turns:
+
+                    tool_table = active_agent.get_tool_table()
+                    accumulator = StreamAccumulator(active_agent.name)
+                    started = {}
+                    metrics = TurnMetrics(
+                        agent=active_agent.name, model=model_override or active_agent.model
+                    )
+                    turns.append(metrics)
+
+                    # get completion with current history, agent
+                    start = time.perf_counter()
+                    turn_start = time.time()
+                    completion = self.get_chat_completion(
+                        agent=active_agent,
+                        history=history,
+                        context_variables=context_variables,
+                        model_override=model_override,
+                        stream=True,
+                        debug=debug,
+                    )
+                    streaming = True
+
+                    yield {"delim": "start"}
+                    for chunk in completion:
+                        delta = accumulator.add(chunk)
+                        if delta is not None:
+                            if metrics.time_to_first_token is None and (
+                                delta["content"] or delta["tool_calls"]
+                            ):
+                                metrics.time_to_first_token = time.perf_counter() - start
+                            yield delta
+                        if eager_executor:
+                            for index, tool_call in accumulator.take_completed():
+                                started[index] = self.submit_tool_call(
+                                    eager_executor,
+                                    to_tool_call_objects([tool_call])[0],
+                                    tool_table,
+                                    context_variables,
+                                    debug,
+                                )
+                    streaming = False
+                    metrics.llm_time = time.perf_counter() - start
+                    metrics.record_usage(accumulator.usage)
+                    yield {"delim": "end"}
+
+                    message = accumulator.message()
+                    debug_print(debug, "Received completion:", message)
+                    history.append(message)
+
+                    if not message["tool_calls"] or not execute_tools:
+                        debug_print(debug, "Ending turn.")
+                        self.trace_turn(run_span, metrics, turn_start)
+                        break
+
+                    # convert tool_calls to objects
+                    tool_calls = to_tool_call_objects(message["tool_calls"])
+
+                    # handle function calls, updating context_variables, and switching agents
+                    if eager_executor:
+                        for index, tool_call in accumulator.take_completed(final=True):
+                            started[index] = self.submit_tool_call(
+                                eager_executor,
+                                to_tool_call_objects([tool_call])[0],
+                                tool_table,
+                                context_variables,
+                                debug,
+                            )
+                        results = [started[index].result() for index in accumulator.tool_calls]
+                        partial_response = self.merge_tool_results(
+                            tool_calls, resolve_awaitables(results), metrics
+                        )
+                    else:
+                        partial_response = self.handle_tool_calls(
+                            tool_calls, tool_table, context_variables, debug, metrics
+                        )
+                    history.extend(partial_response.messages)
+                    context_variables.update(partial_response.context_variables)
+                    if partial_response.agent:
+                        active_agent = partial_response.agent
+                    self.trace_turn(run_span, metrics, turn_start, partial_response.agent)
+            except BaseException as e:
+                # the consumer stopped iterating (or the run failed): free the
+                # in-flight completion and the tool calls still running
+                self.abandon_stream(
+                    run_span, completion, accumulator, started, streaming, e, debug
+                )
+                raise
+
+            run_span.set(turns=len(turns), final_agent=active_agent.name)
+
+        self.schedule_compaction(messages, history, compaction)
+        yield {
+            "response": Response(
+                messages=history.new_messages,
+                agent=active_agent,
+                context_variables=context_variables,
+                turns=turns,
+                summary=compaction and compaction.summary,
+                summary_boundary=compaction.boundary if compaction else 0,
+            )
+        }
+
+    def run(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        stream: bool = False,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        eager_tools: bool = False,
+        run_id: Optional[str] = None,
+    ) -> Response:
+        if stream:
+            return self.run_and_stream(
+                agent=agent,
+                messages=messages,
+                context_variables=context_variables,
+                model_override=model_override,
+                debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
+                eager_tools=eager_tools,
+            )
+        active_agent = agent
+        context_variables = copy.deepcopy(context_variables)
+        history, compaction = self.start_history(messages)
+        init_len = len(history)
+        turns = []
+        checkpoint = self.start_checkpoint(
+            run_id, active_agent, history, init_len, context_variables,
+            model_override, max_turns, execute_tools, turns,
+        )
+
+        with self.tracer.start_span("run", agent=active_agent.name) as run_span:
+            active_agent = self.run_loop(
+                active_agent, history, init_len, context_variables, model_override,
+                debug, max_turns, execute_tools, turns, run_span, checkpoint,
+            )
+
+        self.save_checkpoint(checkpoint, active_agent, done=True)
+        self.schedule_compaction(messages, history, compaction)
+        return Response(
+            messages=history.new_messages,
+            agent=active_agent,
+            context_variables=context_variables,
+            turns=turns,
+            summary=compaction and compaction.summary,
+            summary_boundary=compaction.boundary if compaction else 0,
+            run_id=checkpoint and checkpoint.run_id,
+        )
+
+    def run_loop(
+        self,
+        active_agent: Agent,
+        history: History,
+        init_len: int,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        turns: List[TurnMetrics],
+        run_span: Span,
+        checkpoint: Optional[Checkpoint],
+    ) -> Agent:
+        """Runs turns until the agent stops calling tools, returning the final agent."""
+        while len(history) - init_len < max_turns and active_agent:
+
+            metrics = TurnMetrics(
+                agent=active_agent.name, model=model_override or active_agent.model
+            )
+            turns.append(metrics)
 
             # get completion with current history, agent
+            start = time.perf_counter()
+            turn_start = time.time()
             completion = self.get_chat_completion(
                 agent=active_agent,
                 history=history,
                 context_variables=context_variables,
                 model_override=model_override,
-                stream=True,
+                stream=False,
                 debug=debug,
             )
-
-            yield {"delim": "start"}
-            for chunk in completion:
-                delta = json.loads(chunk.choices[0].delta.json())
-                if delta["role"] == "assistant":
-                    delta["sender"] = active_agent.name
-                yield delta
-                delta.pop("role", None)
-                delta.pop("sender", None)
-                merge_chunk(message, delta)
-            yield {"delim": "end"}
-
-            message["tool_calls"] = list(
-                message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
+            metrics.llm_time = time.perf_counter() - start
+            metrics.record_usage(completion.usage)
+            message = completion.choices[0].message
             debug_print(debug, "Received completion:", message)
-            history.append(message)
+            # plain dicts in history, to avoid OpenAI types
+            history.append(message_to_dict(message, active_agent.name))
+            self.save_checkpoint(checkpoint, active_agent)
 
-            if not message["tool_calls"] or not execute_tools:
+            if not message.tool_calls or not execute_tools:
                 debug_print(debug, "Ending turn.")
+                self.trace_turn(run_span, metrics, turn_start)
                 break
 
-            # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
-                )
-                tool_calls.append(tool_call_object)
-
             # handle function calls, updating context_variables, and switching agents
             partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
+                message.tool_calls,
+                active_agent.get_tool_table(),
+                context_variables,
+                debug,
+                metrics,
             )
             history.extend(partial_response.messages)
             context_variables.update(partial_response.context_variables)
             if partial_response.agent:
                 active_agent = partial_response.agent
+            self.save_checkpoint(checkpoint, active_agent)
+            self.trace_turn(run_span, metrics, turn_start, partial_response.agent)
+
+        run_span.set(turns=len(turns), final_agent=active_agent.name)
+        return active_agent
+
+    def start_checkpoint(
+        self,
+        run_id: Optional[str],
+        agent: Agent,
+        history: History,
+        init_len: int,
+        context_variables: dict,
+        model_override: Optional[str],
+        max_turns: int,
+        execute_tools: bool,
+        turns: List[TurnMetrics],
+    ) -> Optional[Checkpoint]:
+        if self.checkpoint_store is None:
+            return None
+        # the checkpoint shares the run's history, context_variables and turns,
+        # so each save persists their current contents
+        checkpoint = Checkpoint(
+            run_id or new_run_id(),
+            registered_name(agent),
+            history,
+            init_len,
+            context_variables,
+            model_override,
+            None if max_turns == float("inf") else max_turns,
+            execute_tools,
+            turns,
+        )
+        self.checkpoint_store.save(checkpoint)
+        return checkpoint
+
+    def save_checkpoint(
+        self, checkpoint: Optional[Checkpoint], agent: Agent, done: bool = False
+    ) -> None:
+        if checkpoint is None:
+            return
+        checkpoint.agent = registered_name(agent)
+        checkpoint.done = done
+        self.checkpoint_store.save(checkpoint)
+
+    def restore_checkpoint(self, run_id: str) -> Tuple[Checkpoint, Agent, History]:
+        if self.checkpoint_store is None:
+            raise ValueError("resume requires a Swarm created with a checkpoint_store")
+        checkpoint = self.checkpoint_store.load(run_id)
+        if checkpoint is None:
+            raise KeyError(f"No checkpoint for run {run_id!r}")
+        history = History(checkpoint.messages[: checkpoint.init_len])
+        history.extend(checkpoint.messages[checkpoint.init_len:])
+        checkpoint.messages = history
+        return checkpoint, get_agent(checkpoint.agent), history
+
+    def pending_tool_calls(
+        self, checkpoint: Checkpoint
+    ) -> Optional[List[ChatCompletionMessageToolCall]]:
+        """Tool calls of the last completion whose results were not checkpointed yet."""
+        last = checkpoint.messages[-1] if len(checkpoint.messages) else None
+        if (
+            checkpoint.done
+            or not checkpoint.execute_tools
+            or last is None
+            or last.get("role") != "assistant"
+            or not last.get("tool_calls")
+        ):
+            return None
+        return to_tool_call_objects(last["tool_calls"])
+
+    def resumed_response(self, checkpoint: Checkpoint, agent: Agent) -> Response:
+        return Response(
+            messages=checkpoint.messages.new_messages,
+            agent=agent,
+            context_variables=checkpoint.context_variables,
+            turns=checkpoint.turns,
+            run_id=checkpoint.run_id,
+        )
+
+    def resume(self, run_id: str, debug: bool = False) -> Response:
+        """
+        Continues a checkpointed run from its last completed step: the last
+        completion's tool calls are run if their results were not saved yet,
+        then turns continue as in `run`. Completions already made are not
+        requested again. The agents of the run must be registered with
+        `swarm.checkpoint.register_agent`. A finished run returns its response.
+        """
+        checkpoint, active_agent, history = self.restore_checkpoint(run_id)
+        if checkpoint.done:
+            return self.resumed_response(checkpoint, active_agent)
+
+        max_turns = float("inf") if checkpoint.max_turns is None else checkpoint.max_turns
+        with self.tracer.start_span(
+            "run", agent=active_agent.name, resumed=run_id
+        ) as run_span:
+            tool_calls = self.pending_tool_calls(checkpoint)
+            if tool_calls:
+                partial_response = self.handle_tool_calls(
+                    tool_calls,
+                    active_agent.get_tool_table(),
+                    checkpoint.context_variables,
+                    debug,
+                    checkpoint.turns[-1] if checkpoint.turns else None,
+                )
+                history.extend(partial_response.messages)
+                checkpoint.context_variables.update(partial_response.context_variables)
+                if partial_response.agent:
+                    active_agent = partial_response.agent
+                self.save_checkpoint(checkpoint, active_agent)
+            # a run whose last message is the agent's reply has already finished
+            if not history.new_messages or history[-1].get("role") != "assistant":
+                active_agent = self.run_loop(
+                    active_agent, history, checkpoint.init_len,
+                    checkpoint.context_variables, checkpoint.model_override, debug,
+                    max_turns, checkpoint.execute_tools, checkpoint.turns, run_span,
+                    checkpoint,
+                )
+
+        self.save_checkpoint(checkpoint, active_agent, done=True)
+        return self.resumed_response(checkpoint, active_agent)
+
+    def batch_runner(self, rate_limit: Optional[float]) -> "Swarm":
+        if not rate_limit:
+            return self
+        # shallow copy sharing the client, so the limit only applies to this batch
+        runner = copy.copy(self)
+        runner.rate_limiter = TokenBucket(rate_limit)
+        return runner
+
+    def run_batch(
+        self,
+        jobs: Iterable[Union[BatchJob, dict, tuple]],
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        **run_kwargs,
+    ) -> Iterator[BatchResult]:
+        """
+        Runs many independent conversations concurrently, yielding a `BatchResult`
+        per job as soon as it completes (not in submission order).
+
+        Args:
+            jobs: `BatchJob`s, dicts of their fields or `(agent, messages[, context_variables])`
+                tuples; jobs without an id are tagged with their position.
+            max_concurrency: Maximum number of conversations in flight at once.
+            rate_limit: Optional cap on chat completions per second across the batch.
+            **run_kwargs: Passed on to `run` (e.g. `max_turns`, `model_override`).
+        """
+        runner = self.batch_runner(rate_limit)
+        jobs = (to_batch_job(job, i) for i, job in enumerate(jobs))
+
+        def run_job(job: BatchJob) -> BatchResult:
+            try:
+                response = runner.run(
+                    agent=job.agent,
+                    messages=job.messages,
+                    context_variables=job.context_variables,
+                    **run_kwargs,
+                )
+                return BatchResult(job_id=job.id, response=response)
+            except Exception as e:
+                return BatchResult(job_id=job.id, error=e)
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        in_flight = set()
+        try:
+            for job in jobs:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                in_flight.add(executor.submit(run_job, job))
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncSwarm(Swarm):
+    """
+    Asyncio flavour of `Swarm`. `run` is a coroutine and `run_and_stream` is an
+    async generator yielding the same events as `Swarm.run_and_stream`, so many
+    conversations can share a single event loop.
+
+    Takes the same arguments as `Swarm`, except that `client` is an AsyncOpenAI
+    client (`AsyncOpenAI()` by default) and sync tools are offloaded to
+    `tool_executor`, so the tool calls of a turn run concurrently without
+    blocking the loop. Sync tools run inline on the event loop when it is not set.
+    """
+
+    def default_client(self):
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI()
+
+    async def abandon_stream_async(
+        self,
+        run_span: Span,
+        completion,
+        accumulator: Optional[StreamAccumulator],
+        started: dict,
+        streaming: bool,
+        error: BaseException,
+        debug: bool,
+    ) -> None:
+        """
+        Cleans up a run stream that was closed (`aclose()`) or cancelled early:
+        closes the completion if it is still streaming and cancels the eagerly
+        started tool calls. Coroutine tools are cancelled where they await; sync
+        tools running in the `tool_executor` finish in the background.
+        """
+        pending = [task for task in started.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if streaming:
+            await close_completion_async(completion)
+        await asyncio.gather(*pending, return_exceptions=True)
+        if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+            self.record_abandoned(run_span, accumulator if streaming else None, debug)
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: Union[ToolTable, List[AgentFunction]],
+        context_variables: dict,
+        debug: bool,
+        metrics: Optional[TurnMetrics] = None,
+    ) -> ToolCallsResponse:
+        tool_table = (
+            functions if isinstance(functions, ToolTable) else ToolTable(functions)
+        )
+        results = await asyncio.gather(
+            *(
+                self.execute_tool_call_async(
+                    tool_call, tool_table, context_variables, debug)
+                for tool_call in tool_calls
+            )
+        )
+
+        return self.merge_tool_results(tool_calls, results, metrics)
+
+    async def execute_tool_call_async(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        tool_table: ToolTable,
+        context_variables: dict,
+        debug: bool,
+    ) -> ToolOutcome:
+        is_coroutine = tool_call.function.name in tool_table.coroutine_functions
+        if self.tool_executor and not is_coroutine:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.tool_executor,
+                self.execute_tool_call,
+                tool_call,
+                tool_table,
+                context_variables,
+                debug,
+            )
+        else:
+            result = self.execute_tool_call(
+                tool_call, tool_table, context_variables, debug)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> ChatCompletionMessage:
+        create_params = self.get_create_params(
+            agent, history, context_variables, model_override, stream, debug
+        )
+        if self.cache is not None:
+            key = cache_key(create_params)
+            cached = self.get_cached_completion(key, stream)
+            if cached is not None:
+                return cached
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async()
+        if self.hedging is not None:
+            completion = await self.hedging.create_async(
+                self.create_completion, create_params
+            )
+        else:
+            completion = await self.create_completion(create_params)
+        if self.cache is not None:
+            return self.cache_completion(key, stream, completion)
+        return completion
+
+    async def create_completion(self, create_params: dict):
+        if self.scheduler is not None:
+            return await self.scheduler.create_async(self.client, create_params)
+        return await self.client.chat.completions.create(**create_params)
+
+    async def run_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: dict = {},
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        eager_tools: bool = False,
+    ):
+        active_agent = agent
+        context_variables = copy.deepcopy(context_variables)
+        history, compaction = self.start_history(messages)
+        init_len = len(history)
+        # with eager_tools, tool calls start as soon as their arguments have been streamed
+        eager = eager_tools and execute_tools
+
+        turns = []
+        completion, accumulator, started, streaming = None, None, {}, False
+        with self.tracer.start_span("run", agent=active_agent.name) as run_span:
+            try:
+                while len(history) - init_len < max_turns:
+
+                    tool_table = active_agent.get_tool_table()
+                    accumulator = StreamAccumulator(active_agent.name)
+                    started = {}
+                    metrics = TurnMetrics(
+                        agent=active_agent.name, model=model_override or active_agent.model
+                    )
+                    turns.append(metrics)
+
+                    # get completion with current history, agent
+                    start = time.perf_counter()
+                    turn_start = time.time()
+                    completion = await self.get_chat_completion(
+                        agent=active_agent,
+                        history=history,
+                        context_variables=context_variables,
+                        model_override=model_override,
+                        stream=True,
+                        debug=debug,
+                    )
+                    streaming = True
+
+                    yield {"delim": "start"}
+                    async for chunk in completion:
+                        delta = accumulator.add(chunk)
+                        if delta is not None:
+                            if metrics.time_to_first_token is None and (
+                                delta["content"] or delta["tool_calls"]
+                            ):
+                                metrics.time_to_first_token = time.perf_counter() - start
+                            yield delta
+                        if eager:
+                            for index, tool_call in accumulator.take_completed():
+                                started[index] = asyncio.ensure_future(
+                                    self.execute_tool_call_async(
+                                        to_tool_call_objects([tool_call])[0],
+                                        tool_table,
+                                        context_variables,
+                                        debug,
+                                    )
+                                )
+                    streaming = False
+                    metrics.llm_time = time.perf_counter() - start
+                    metrics.record_usage(accumulator.usage)
+                    yield {"delim": "end"}
+
+                    message = accumulator.message()
+                    debug_print(debug, "Received completion:", message)
+                    history.append(message)
+
+                    if not message["tool_calls"] or not execute_tools:
+                        debug_print(debug, "Ending turn.")
+                        self.trace_turn(run_span, metrics, turn_start)
+                        break
+
+                    # convert tool_calls to objects
+                    tool_calls = to_tool_call_objects(message["tool_calls"])
+
+                    # handle function calls, updating context_variables, and switching agents
+                    if eager:
+                        for index, tool_call in accumulator.take_completed(final=True):
+                            started[index] = asyncio.ensure_future(
+                                self.execute_tool_call_async(
+                                    to_tool_call_objects([tool_call])[0],
+                                    tool_table,
+                                    context_variables,
+                                    debug,
+                                )
+                            )
+                        results = await asyncio.gather(
+                            *(started[index] for index in accumulator.tool_calls)
+                        )
+                        partial_response = self.merge_tool_results(
+                            tool_calls, results, metrics)
+                    else:
+                        partial_response = await self.handle_tool_calls(
+                            tool_calls, tool_table, context_variables, debug, metrics
+                        )
+                    history.extend(partial_response.messages)
+                    context_variables.update(partial_response.context_variables)
+                    if partial_response.agent:
+                        active_agent = partial_response.agent
+                    self.trace_turn(run_span, metrics, turn_start, partial_response.agent)
+            except BaseException as e:
+                # the consumer stopped iterating (or the run failed): free the
+                # in-flight completion and the tool calls still running
+                await self.abandon_stream_async(
+                    run_span, completion, accumulator, started, streaming, e, debug
+                )
+                raise
 
+            run_span.set(turns=len(turns), final_agent=active_agent.name)
+
+        self.schedule_compaction(messages, history, compaction)
         yield {
             "response": Response(
-                messages=history[init_len:],
+                messages=history.new_messages,
                 agent=active_agent,
                 context_variables=context_variables,
+                turns=turns,
+                summary=compaction and compaction.summary,
+                summary_boundary=compaction.boundary if compaction else 0,
             )
         }
 
-    def run(
+    async def run(
         self,
         agent: Agent,
         messages: List,
@@ -238,6 +1211,8 @@ class Swarm:
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        eager_tools: bool = False,
+        run_id: Optional[str] = None,
     ) -> Response:
         if stream:
             return self.run_and_stream(
@@ -248,45 +1223,173 @@ class Swarm:
                 debug=debug,
                 max_turns=max_turns,
                 execute_tools=execute_tools,
+                eager_tools=eager_tools,
             )
         active_agent = agent
         context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
+        history, compaction = self.start_history(messages)
+        init_len = len(history)
+        turns = []
+        checkpoint = self.start_checkpoint(
+            run_id, active_agent, history, init_len, context_variables,
+            model_override, max_turns, execute_tools, turns,
+        )
+
+        with self.tracer.start_span("run", agent=active_agent.name) as run_span:
+            active_agent = await self.run_loop(
+                active_agent, history, init_len, context_variables, model_override,
+                debug, max_turns, execute_tools, turns, run_span, checkpoint,
+            )
 
+        self.save_checkpoint(checkpoint, active_agent, done=True)
+        self.schedule_compaction(messages, history, compaction)
+        return Response(
+            messages=history.new_messages,
+            agent=active_agent,
+            context_variables=context_variables,
+            turns=turns,
+            summary=compaction and compaction.summary,
+            summary_boundary=compaction.boundary if compaction else 0,
+            run_id=checkpoint and checkpoint.run_id,
+        )
+
+    async def run_loop(
+        self,
+        active_agent: Agent,
+        history: History,
+        init_len: int,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        turns: List[TurnMetrics],
+        run_span: Span,
+        checkpoint: Optional[Checkpoint],
+    ) -> Agent:
         while len(history) - init_len < max_turns and active_agent:
 
+            metrics = TurnMetrics(
+                agent=active_agent.name, model=model_override or active_agent.model
+            )
+            turns.append(metrics)
+
             # get completion with current history, agent
-            completion = self.get_chat_completion(
+            start = time.perf_counter()
+            turn_start = time.time()
+            completion = await self.get_chat_completion(
                 agent=active_agent,
                 history=history,
                 context_variables=context_variables,
                 model_override=model_override,
-                stream=stream,
+                stream=False,
                 debug=debug,
             )
+            metrics.llm_time = time.perf_counter() - start
+            metrics.record_usage(completion.usage)
             message = completion.choices[0].message
             debug_print(debug, "Received completion:", message)
-            message.sender = active_agent.name
-            history.append(
-                json.loads(message.model_dump_json())
-            )  # to avoid OpenAI types (?)
+            # plain dicts in history, to avoid OpenAI types
+            history.append(message_to_dict(message, active_agent.name))
+            self.save_checkpoint(checkpoint, active_agent)
 
             if not message.tool_calls or not execute_tools:
                 debug_print(debug, "Ending turn.")
+                self.trace_turn(run_span, metrics, turn_start)
                 break
 
             # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                message.tool_calls, active_agent.functions, context_variables, debug
+            partial_response = await self.handle_tool_calls(
+                message.tool_calls,
+                active_agent.get_tool_table(),
+                context_variables,
+                debug,
+                metrics,
             )
             history.extend(partial_response.messages)
             context_variables.update(partial_response.context_variables)
             if partial_response.agent:
                 active_agent = partial_response.agent
+            self.save_checkpoint(checkpoint, active_agent)
+            self.trace_turn(run_span, metrics, turn_start, partial_response.agent)
 
-        return Response(
-            messages=history[init_len:],
-            agent=active_agent,
-            context_variables=context_variables,
-        )
+        run_span.set(turns=len(turns), final_agent=active_agent.name)
+        return active_agent
+
+    async def resume(self, run_id: str, debug: bool = False) -> Response:
+        checkpoint, active_agent, history = self.restore_checkpoint(run_id)
+        if checkpoint.done:
+            return self.resumed_response(checkpoint, active_agent)
+
+        max_turns = float("inf") if checkpoint.max_turns is None else checkpoint.max_turns
+        with self.tracer.start_span(
+            "run", agent=active_agent.name, resumed=run_id
+        ) as run_span:
+            tool_calls = self.pending_tool_calls(checkpoint)
+            if tool_calls:
+                partial_response = await self.handle_tool_calls(
+                    tool_calls,
+                    active_agent.get_tool_table(),
+                    checkpoint.context_variables,
+                    debug,
+                    checkpoint.turns[-1] if checkpoint.turns else None,
+                )
+                history.extend(partial_response.messages)
+                checkpoint.context_variables.update(partial_response.context_variables)
+                if partial_response.agent:
+                    active_agent = partial_response.agent
+                self.save_checkpoint(checkpoint, active_agent)
+            # a run whose last message is the agent's reply has already finished
+            if not history.new_messages or history[-1].get("role") != "assistant":
+                active_agent = await self.run_loop(
+                    active_agent, history, checkpoint.init_len,
+                    checkpoint.context_variables, checkpoint.model_override, debug,
+                    max_turns, checkpoint.execute_tools, checkpoint.turns, run_span,
+                    checkpoint,
+                )
+
+        self.save_checkpoint(checkpoint, active_agent, done=True)
+        return self.resumed_response(checkpoint, active_agent)
+
+    async def run_batch(
+        self,
+        jobs: Iterable[Union[BatchJob, dict, tuple]],
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        **run_kwargs,
+    ) -> AsyncIterator[BatchResult]:
+        """Async generator counterpart of `Swarm.run_batch`, running jobs as tasks."""
+        runner = self.batch_runner(rate_limit)
+        jobs = (to_batch_job(job, i) for i, job in enumerate(jobs))
+
+        async def run_job(job: BatchJob) -> BatchResult:
+            try:
+                response = await runner.run(
+                    agent=job.agent,
+                    messages=job.messages,
+                    context_variables=job.context_variables,
+                    **run_kwargs,
+                )
+                return BatchResult(job_id=job.id, response=response)
+            except Exception as e:
+                return BatchResult(job_id=job.id, error=e)
+
+        in_flight = set()
+        try:
+            for job in jobs:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+                in_flight.add(asyncio.create_task(run_job(job)))
+            while in_flight:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
@@ -0,0 +1,358 @@
+import collections
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from .context import estimate_tokens
+from .scheduler import TokenBucket
+
+Latency = Union[float, Callable[[], float]]
+
+
+class FakeReply(NamedTuple):
+    """
+    One scripted reply of `FakeOpenAIServer`: an assistant message with
+    `content` and/or `tool_calls` (dicts with a `name` and `arguments`, a dict
+    or a JSON string), or an error `status` such as 429 or 500. `latency`
+    overrides the server's latency for this reply.
+    """
+
+    content: Optional[str] = None
+    tool_calls: Sequence[dict] = ()
+    status: int = 200
+    latency: Optional[Latency] = None
+    retry_after: Optional[float] = None
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> Callable[[], float]:
+    """Latency distribution with the given median and a long right tail, like real APIs."""
+    mu = math.log(median)
+    return lambda: random.lognormvariate(mu, sigma)
+
+
+def sample(latency: Optional[Latency]) -> float:
+    if latency is None:
+        return 0.0
+    return latency() if callable(latency) else latency
+
+
+class FakeOpenAIServer:
+    """
+    Local OpenAI-compatible chat completions server over real HTTP, for end to
+    end tests and load tests without network access. Replies are taken from a
+    script (`enqueue`), then from `responder(request)` if given, and default to
+    echoing the last user message. Streaming requests are answered with SSE
+    chunks, including a usage chunk when `stream_options.include_usage` is set.
+
+    Args:
+        host, port: Address to listen on; port 0 picks a free one.
+        latency: Seconds before the response (or its first chunk): a number or
+            a callable sampling a distribution, see `lognormal_latency`.
+        chunk_delay: Seconds between streamed chunks.
+        chunk_size: Characters of content or arguments per streamed chunk.
+        error_rates: Probability of answering with each error status, e.g.
+            `{429: 0.05, 500: 0.01}`.
+        requests_per_minute: Rate limit enforced with 429s and reported in the
+            `x-ratelimit-*` headers.
+        responder: Called with the request body when the script is empty.
+        record_requests: Whether to keep request bodies in `requests`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Latency = 0.0,
+        chunk_delay: float = 0.0,
+        chunk_size: int = 8,
+        error_rates: Optional[Dict[int, float]] = None,
+        requests_per_minute: Optional[float] = None,
+        responder: Optional[Callable[[dict], FakeReply]] = None,
+        record_requests: bool = True,
+    ):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunk_size = chunk_size
+        self.error_rates = error_rates or {}
+        self.requests_per_minute = requests_per_minute
+        self.responder = responder
+        self.record_requests = record_requests
+        self.script = collections.deque()
+        self.requests: List[dict] = []
+        self.status_counts = collections.Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._bucket = (
+            TokenBucket(requests_per_minute / 60, max(requests_per_minute / 60, 1.0))
+            if requests_per_minute
+            else None
+        )
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="swarm-fake-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def client(self, **kwargs):
+        """An `OpenAI` client pointed at this server."""
+        from openai import DefaultHttpxClient, OpenAI
+
+        kwargs.setdefault("http_client", DefaultHttpxClient())
+        return OpenAI(base_url=self.base_url, api_key="fake", **kwargs)
+
+    def async_client(self, **kwargs):
+        """An `AsyncOpenAI` client pointed at this server."""
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        kwargs.setdefault("http_client", DefaultAsyncHttpxClient())
+        return AsyncOpenAI(base_url=self.base_url, api_key="fake", **kwargs)
+
+    def enqueue(self, *replies: FakeReply) -> None:
+        with self._lock:
+            self.script.extend(replies)
+
+    def next_reply(self, request: dict) -> FakeReply:
+        for status, rate in self.error_rates.items():
+            if random.random() < rate:
+                return FakeReply(status=status)
+        with self._lock:
+            if self.script:
+                return self.script.popleft()
+        if self.responder is not None:
+            return self.responder(request)
+        user_messages = [m for m in request.get("messages", ()) if m.get("role") == "user"]
+        return FakeReply(content=f"Echo: {user_messages[-1]['content']}" if user_messages else "Hello!")
+
+    def rate_limit(self) -> Optional[float]:
+        """Seconds to retry after when over `requests_per_minute`, else None."""
+        if self._bucket is None:
+            return None
+        with self._lock:
+            wait = self._bucket.wait_time(1)
+            if wait > 0:
+                return wait
+            self._bucket.reserve(1)
+        return None
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        if self._bucket is None:
+            return {}
+        self._bucket.wait_time(0)
+        return {
+            "x-ratelimit-limit-requests": str(int(self.requests_per_minute)),
+            "x-ratelimit-remaining-requests": str(max(int(self._bucket.tokens), 0)),
+            "x-ratelimit-reset-requests": f"{1 / self._bucket.rate:.3f}s",
+        }
+
+    def completion_id(self) -> str:
+        return f"chatcmpl-fake-{next(self._ids)}"
+
+
+def _tool_calls(reply: FakeReply, prefix: str) -> List[dict]:
+    return [
+        {
+            "id": f"call_{prefix}_{i}",
+            "type": "function",
+            "function": {
+                "name": call["name"],
+                "arguments": call["arguments"]
+                if isinstance(call.get("arguments"), str)
+                else json.dumps(call.get("arguments", {})),
+            },
+        }
+        for i, call in enumerate(reply.tool_calls)
+    ]
+
+
+def _usage(request: dict, content: str, tool_calls: List[dict]) -> dict:
+    prompt_tokens = estimate_tokens(json.dumps(request.get("messages", [])))
+    completion_tokens = estimate_tokens(content) + sum(
+        estimate_tokens(call["function"]["arguments"]) for call in tool_calls
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 refuses connections under concurrent load
+    request_queue_size = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        fake: FakeOpenAIServer = self.server.fake
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            return self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+        request = json.loads(body)
+        if fake.record_requests:
+            with fake._lock:
+                fake.requests.append(request)
+
+        retry_after = fake.rate_limit()
+        reply = (
+            FakeReply(status=429, retry_after=retry_after)
+            if retry_after is not None
+            else fake.next_reply(request)
+        )
+        time.sleep(sample(reply.latency if reply.latency is not None else fake.latency))
+        with fake._lock:
+            fake.status_counts[reply.status] += 1
+
+        if reply.status != 200:
+            headers = {}
+            if reply.retry_after is not None:
+                headers["retry-after-ms"] = str(int(reply.retry_after * 1000))
+            error_type = "rate_limit_exceeded" if reply.status == 429 else "server_error"
+            return self.send_json(
+                reply.status,
+                {"error": {"message": f"Injected {reply.status}", "type": error_type}},
+                headers,
+            )
+
+        completion_id = fake.completion_id()
+        content = reply.content or ""
+        tool_calls = _tool_calls(reply, completion_id.rsplit("-", 1)[-1])
+        usage = _usage(request, content, tool_calls)
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            return self.send_stream(
+                fake, request, completion_id, content, tool_calls, usage if include_usage else None
+            )
+        self.send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "tool_calls" if tool_calls else "stop",
+                        "logprobs": None,
+                        "message": {
+                            "role": "assistant",
+                            "content": reply.content,
+                            "tool_calls": tool_calls or None,
+                        },
+                    }
+                ],
+                "usage": usage,
+            },
+            fake.rate_limit_headers(),
+        )
+
+    def send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, fake, request, completion_id, content, tool_calls, usage) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in fake.rate_limit_headers().items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        base = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+        }
+        size = fake.chunk_size
+
+        def delta_chunk(delta: dict, finish_reason=None) -> dict:
+            return {
+                **base,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}
+                ],
+            }
+
+        events = [delta_chunk({"role": "assistant", "content": ""})]
+        events += [
+            delta_chunk({"content": content[i : i + size]})
+            for i in range(0, len(content), size)
+        ]
+        for index, call in enumerate(tool_calls):
+            events.append(
+                delta_chunk(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": call["id"],
+                                "type": "function",
+                                "function": {"name": call["function"]["name"], "arguments": ""},
+                            }
+                        ]
+                    }
+                )
+            )
+            arguments = call["function"]["arguments"]
+            events += [
+                delta_chunk(
+                    {"tool_calls": [{"index": index, "function": {"arguments": arguments[i : i + size]}}]}
+                )
+                for i in range(0, len(arguments), size)
+            ]
+        events.append(delta_chunk({}, "tool_calls" if tool_calls else "stop"))
+        if usage is not None:
+            events.append({**base, "choices": [], "usage": usage})
+
+        try:
+            for i, event in enumerate(events):
+                if i and fake.chunk_delay:
+                    time.sleep(fake.chunk_delay)
+                self.write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+            self.write_chunk(b"data: [DONE]\n\n")
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # the client stopped reading (e.g. a cancelled stream)
+            self.close_connection = True
+
+    def write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
@@ -0,0 +1,267 @@
+import asyncio
+import bisect
+import inspect
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Optional
+
+_END = object()
+
+# histogram bucket bounds: 1ms to ~2 minutes, each 10% above the previous
+LATENCY_BOUNDS = [0.001 * 1.1**i for i in range(int(math.log(120_000, 1.1)) + 1)]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of latencies (in seconds), from 1ms to about 2 minutes
+    with roughly 10% resolution, cheap enough to update on every request.
+    """
+
+    BOUNDS = LATENCY_BOUNDS
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.BOUNDS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the `p` (0-1) percentile, None when empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = p * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.BOUNDS[min(index, len(self.BOUNDS) - 1)]
+        return self.BOUNDS[-1]
+
+
+class PrefetchedStream:
+    """A (sync or async) completion stream whose first chunk has already been read."""
+
+    def __init__(self, first, iterator, stream):
+        self.first = first
+        self.iterator = iterator
+        self.stream = stream
+
+    def __iter__(self):
+        if self.first is not _END:
+            yield self.first
+            yield from self.iterator
+
+    async def __aiter__(self):
+        if self.first is not _END:
+            yield self.first
+            async for chunk in self.iterator:
+                yield chunk
+
+    def close(self) -> None:
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            close()
+
+    async def aclose(self) -> None:
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+
+class HedgingPolicy:
+    """
+    Cuts completion tail latency by hedging: when a completion has not produced
+    its first token (or, without streaming, its response) within the hedge
+    delay, a duplicate request is sent to the same or a fallback model. The
+    first to respond is used and the other is cancelled.
+
+    The delay of each model is the `percentile` of its recent latencies, kept
+    in a `LatencyHistogram`, clamped to [`min_delay`, `max_delay`];
+    `initial_delay` is used until `min_samples` latencies have been recorded.
+
+    Args:
+        percentile: Latency percentile (0-1) after which a request is hedged.
+        fallback_models: Model to send the hedge to, per model; defaults to the same model.
+        initial_delay: Hedge delay while a model has too few samples.
+        min_samples: Latencies needed before the percentile is trusted.
+        min_delay: Lower bound of the hedge delay, to cap the hedge rate on fast models.
+        max_delay: Upper bound of the hedge delay.
+        max_workers: Threads running sync requests (at most two per completion).
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        fallback_models: Optional[Dict[str, str]] = None,
+        initial_delay: float = 2.0,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        max_delay: float = 30.0,
+        max_workers: int = 32,
+    ):
+        self.percentile = percentile
+        self.fallback_models = fallback_models or {}
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_workers = max_workers
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def histogram(self, model: str) -> LatencyHistogram:
+        histogram = self.histograms.get(model)
+        if histogram is None:
+            histogram = self.histograms.setdefault(model, LatencyHistogram())
+        return histogram
+
+    def delay(self, model: str) -> float:
+        histogram = self.histogram(model)
+        if histogram.count < self.min_samples:
+            return self.initial_delay
+        return min(max(histogram.percentile(self.percentile), self.min_delay), self.max_delay)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedges / self.requests if self.requests else 0.0,
+            "hedge_win_rate": self.hedge_wins / self.hedges if self.hedges else 0.0,
+            "delays": {model: self.delay(model) for model in self.histograms},
+        }
+
+    def hedge_params(self, params: dict) -> dict:
+        model = params["model"]
+        return {**params, "model": self.fallback_models.get(model, model)}
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="swarm-hedge"
+                    )
+        return self._executor
+
+    def attempt(self, send: Callable[[dict], object], params: dict):
+        """Sends `params` and, for streams, waits for the first chunk."""
+        start = time.perf_counter()
+        completion = send(params)
+        if params.get("stream"):
+            iterator = iter(completion)
+            completion = PrefetchedStream(next(iterator, _END), iterator, completion)
+        self.histogram(params["model"]).record(time.perf_counter() - start)
+        return completion
+
+    async def attempt_async(self, send: Callable[[dict], Awaitable], params: dict):
+        start = time.perf_counter()
+        try:
+            completion = await send(params)
+            if params.get("stream"):
+                iterator = completion.__aiter__()
+                try:
+                    first = await iterator.__anext__()
+                except StopAsyncIteration:
+                    first = _END
+                except asyncio.CancelledError:
+                    await PrefetchedStream(_END, iterator, completion).aclose()
+                    raise
+                completion = PrefetchedStream(first, iterator, completion)
+        except asyncio.CancelledError:
+            # unlike sync losers, cancelled ones never finish: record the time
+            # they took so far as a lower bound, or the slow tail goes unseen
+            self.histogram(params["model"]).record(time.perf_counter() - start)
+            raise
+        self.histogram(params["model"]).record(time.perf_counter() - start)
+        return completion
+
+    def create(self, send: Callable[[dict], object], params: dict):
+        """Sends `params` with `send`, hedging it if it is slow to respond."""
+        self.count("requests")
+        executor = self.get_executor()
+        primary = executor.submit(self.attempt, send, params)
+        done, _ = wait([primary], timeout=self.delay(params["model"]))
+        if done:
+            return primary.result()
+
+        self.count("hedges")
+        hedge = executor.submit(self.attempt, send, self.hedge_params(params))
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        if winner is None:
+            return primary.result()
+        for loser in {primary, hedge} - {winner}:
+            # a request already in flight can't be interrupted; close it once it returns
+            if not loser.cancel():
+                loser.add_done_callback(close_completion)
+        if winner is hedge:
+            self.count("hedge_wins")
+        return winner.result()
+
+    async def create_async(self, send: Callable[[dict], Awaitable], params: dict):
+        self.count("requests")
+        primary = asyncio.ensure_future(self.attempt_async(send, params))
+        done, _ = await asyncio.wait({primary}, timeout=self.delay(params["model"]))
+        if done:
+            return primary.result()
+
+        self.count("hedges")
+        hedge = asyncio.ensure_future(self.attempt_async(send, self.hedge_params(params)))
+        pending = {primary, hedge}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((f for f in done if f.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            # let cancelled requests unwind (and close their streams) before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+        if winner is None:
+            return primary.result()
+        if winner is hedge:
+            self.count("hedge_wins")
+        for loser in {primary, hedge} - {winner}:
+            if loser.done() and not loser.cancelled() and loser.exception() is None:
+                await close_completion_async(loser.result())
+        return winner.result()
+
+
+def close_completion(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        close = getattr(future.result(), "close", None)
+        if close is not None:
+            close()
+
+
+async def close_completion_async(completion) -> None:
+    close = getattr(completion, "aclose", None) or getattr(completion, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
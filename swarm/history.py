@@ -0,0 +1,53 @@
+from collections.abc import Sequence
+from itertools import chain, islice
+from typing import List
+
+
+class History(Sequence):
+    """
+    Copy-on-write conversation history.
+
+    Shares the caller's messages instead of copying them: the initial messages
+    are only ever read, and messages appended during a run are stored in a
+    separate list. The caller's list (and the message dicts in it) are never
+    mutated, and starting a run costs the same regardless of history length.
+    """
+
+    __slots__ = ("_base", "_base_len", "_new")
+
+    def __init__(self, messages: Sequence = ()):
+        self._base = messages
+        # pin the length, so messages the caller appends later aren't picked up
+        self._base_len = len(messages)
+        self._new = []
+
+    def __len__(self) -> int:
+        return self._base_len + len(self._new)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        if index < self._base_len:
+            return self._base[index]
+        return self._new[index - self._base_len]
+
+    def __iter__(self):
+        return chain(islice(self._base, self._base_len), self._new)
+
+    def __repr__(self) -> str:
+        return f"History({list(self)!r})"
+
+    def append(self, message: dict) -> None:
+        self._new.append(message)
+
+    def extend(self, messages) -> None:
+        self._new.extend(messages)
+
+    @property
+    def new_messages(self) -> List[dict]:
+        """Messages appended since the history was created."""
+        return list(self._new)
@@ -1,6 +1,7 @@
 import json
 
 from swarm import Swarm
+from swarm import serialization
 
 
 def process_and_print_streaming_response(response):
@@ -53,14 +54,15 @@ def pretty_print_messages(messages) -> None:
         for tool_call in tool_calls:
             f = tool_call["function"]
             name, args = f["name"], f["arguments"]
-            arg_str = json.dumps(json.loads(args)).replace(":", "=")
+            arg_str = json.dumps(serialization.loads(args)).replace(":", "=")
             print(f"\033[95m{name}\033[0m({arg_str[1:-1]})")
 
 
 def run_demo_loop(
-    starting_agent, context_variables=None, stream=False, debug=False
+    starting_agent, context_variables=None, stream=False, debug=False, compactor=None
 ) -> None:
-    client = Swarm()
+    # with a compactor, older turns are summarized while waiting on input()
+    client = Swarm(compactor=compactor)
     print("Starting Swarm CLI 🐝")
 
     messages = []
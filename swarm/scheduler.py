@@ -0,0 +1,433 @@
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+from .context import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+# priority of the requests made by the current thread or task, lower goes first
+_priority: ContextVar[int] = ContextVar("swarm_request_priority", default=0)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate` tokens per second, holding at
+    most `capacity` tokens. Callers reserve tokens up front and wait out the
+    returned delay, so concurrent callers are served in reservation order.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes `tokens` from the bucket and returns how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """
+        Returns how long until `tokens` are available, without taking them.
+        Requests larger than `capacity` only wait for a full bucket.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            missing = min(tokens, self.capacity) - self.tokens
+            return max(missing, 0.0) / self.rate
+
+
+def estimate_request_tokens(
+    params: dict,
+    tokenizer: Callable[[str], int] = estimate_tokens,
+    completion_tokens: int = 256,
+) -> int:
+    """
+    Estimates the tokens a chat completion request counts against a
+    tokens-per-minute limit: the prompt plus the completion it may produce.
+    """
+    tokens = 0
+    for message in params.get("messages", ()):
+        tokens += MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if content:
+            tokens += tokenizer(content if isinstance(content, str) else json.dumps(content))
+        for tool_call in message.get("tool_calls") or ():
+            tokens += tokenizer(tool_call["function"]["arguments"])
+    if params.get("tools"):
+        tokens += tokenizer(json.dumps(params["tools"]))
+    return tokens + (
+        params.get("max_completion_tokens") or params.get("max_tokens") or completion_tokens
+    )
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether the OpenAI SDK would retry `error`: connection errors, timeouts, 408, 409 and 5xx."""
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and (
+        error.status_code in (408, 409) or error.status_code >= 500
+    )
+
+
+def parse_reset(value: str) -> float:
+    """Parses a rate limit reset duration such as "1s", "6m0s" or "20ms" into seconds."""
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+
+class ModelBudget:
+    """Request and token buckets of one model, and the queue of requests waiting on them."""
+
+    __slots__ = ("requests", "tokens", "request_rate", "token_rate", "paused_until", "queue")
+
+    def __init__(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float], burst: float):
+        self.requests = self.tokens = None
+        self.request_rate = self.token_rate = None
+        if requests_per_minute:
+            self.request_rate = requests_per_minute / 60
+            self.requests = TokenBucket(self.request_rate, max(self.request_rate * burst, 1.0))
+        if tokens_per_minute:
+            self.token_rate = tokens_per_minute / 60
+            self.tokens = TokenBucket(self.token_rate, self.token_rate * burst)
+        self.paused_until = 0.0
+        # heap of [priority, sequence, tokens, waker]; waker is the (loop, event)
+        # of a waiting coroutine, None for a waiting thread
+        self.queue = []
+
+    def wait_time(self, tokens: int) -> float:
+        delay = max(self.paused_until - time.monotonic(), 0.0)
+        if self.requests:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        return delay
+
+
+class RateLimitScheduler:
+    """
+    Keeps chat completion requests within per-model requests-per-minute and
+    tokens-per-minute budgets, shared by every `Swarm` it is passed to.
+
+    Requests wait in a per-model queue ordered by priority (lower first, see
+    `priority`) and then arrival, and are sent once both token buckets can
+    cover them. Budgets follow the `x-ratelimit-*` response headers, and a 429
+    pauses the whole model for its `retry-after` (or an exponential backoff)
+    and halves its rates, which then recover additively on success. Other
+    errors the OpenAI SDK would retry (connection errors, timeouts, 408, 409
+    and 5xx) are retried on the same backoff without touching the budgets.
+
+    Args:
+        requests_per_minute: Default request limit per model; None for no limit.
+        tokens_per_minute: Default token limit per model; None for no limit.
+        limits: Per-model `(requests_per_minute, tokens_per_minute)` overrides.
+        tokenizer: Counts the tokens of a string, for request estimates.
+        completion_tokens: Completion tokens assumed for requests without `max_tokens`.
+        burst: Seconds of budget that may be spent at once.
+        max_retries: How many times a request is retried after a 429 or a
+            transient error. The OpenAI client's own retries are turned off for
+            requests sent through the scheduler.
+        read_headers: Whether to request raw responses to read the rate limit headers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        tokenizer: Callable[[str], int] = estimate_tokens,
+        completion_tokens: int = 256,
+        burst: float = 10.0,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 60.0,
+        read_headers: bool = True,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.limits = limits or {}
+        self.tokenizer = tokenizer
+        self.completion_tokens = completion_tokens
+        self.burst = burst
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.read_headers = read_headers
+        self.budgets: Dict[str, ModelBudget] = {}
+        self.rate_limited = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        # client -> copy of it with the SDK's own retries off
+        self._clients = weakref.WeakKeyDictionary()
+
+    @contextmanager
+    def priority(self, priority: int):
+        """Runs the requests made in this context (thread or task) at `priority`."""
+        token = _priority.set(priority)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    def budget(self, model: str) -> ModelBudget:
+        budget = self.budgets.get(model)
+        if budget is None:
+            requests_per_minute, tokens_per_minute = self.limits.get(
+                model, (self.requests_per_minute, self.tokens_per_minute)
+            )
+            budget = self.budgets.setdefault(
+                model, ModelBudget(requests_per_minute, tokens_per_minute, self.burst)
+            )
+        return budget
+
+    def enqueue(self, budget: ModelBudget, tokens: int, waker=None) -> list:
+        entry = [_priority.get(), next(self._sequence), tokens, waker]
+        with self._condition:
+            heapq.heappush(budget.queue, entry)
+        return entry
+
+    def dequeue(self, budget: ModelBudget, entry: list) -> None:
+        with self._condition:
+            if entry in budget.queue:
+                budget.queue.remove(entry)
+                heapq.heapify(budget.queue)
+                self.notify(budget)
+
+    def notify(self, budget: ModelBudget) -> None:
+        """
+        Wakes the waiting threads and, of the waiting coroutines, only the one
+        first in line: the others can't be granted before it. Must be called
+        holding `_condition`.
+        """
+        self._condition.notify_all()
+        if budget.queue and budget.queue[0][3] is not None:
+            loop, event = budget.queue[0][3]
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # the waiter's event loop is closed
+                pass
+
+    def try_grant(self, budget: ModelBudget, entry: list) -> float:
+        """
+        Takes the budget for `entry` if it is first in line and the budget covers
+        it, returning 0. Otherwise returns how long to wait before trying again.
+        Must be called holding `_condition`.
+        """
+        head = budget.queue[0]
+        delay = budget.wait_time(head[2])
+        if head is not entry:
+            # woken up early by notify_all once the head has been served
+            return max(delay, 0.005)
+        if delay > 0:
+            return delay
+        heapq.heappop(budget.queue)
+        if budget.requests:
+            budget.requests.reserve(1)
+        if budget.tokens:
+            budget.tokens.reserve(entry[2])
+        self.notify(budget)
+        return 0.0
+
+    def acquire(self, model: str, tokens: int) -> None:
+        budget = self.budget(model)
+        entry = self.enqueue(budget, tokens)
+        try:
+            with self._condition:
+                while delay := self.try_grant(budget, entry):
+                    self._condition.wait(delay)
+        except BaseException:
+            self.dequeue(budget, entry)
+            raise
+
+    async def acquire_async(self, model: str, tokens: int) -> None:
+        budget = self.budget(model)
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        entry = self.enqueue(budget, tokens, (loop, event))
+        try:
+            while True:
+                with self._condition:
+                    event.clear()
+                    delay = self.try_grant(budget, entry)
+                    first = budget.queue and budget.queue[0] is entry
+                if not delay:
+                    return
+                # the first in line waits for its budget, the others until they
+                # are first; either is woken early by `notify`
+                timer = loop.call_later(delay, event.set) if first else None
+                try:
+                    await event.wait()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+        except BaseException:
+            self.dequeue(budget, entry)
+            raise
+
+    def retry_delay(self, error, attempt: int) -> float:
+        """The error's `retry-after`, or an exponential backoff with jitter."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        if headers.get("retry-after-ms"):
+            delay = float(headers["retry-after-ms"]) / 1000
+        elif headers.get("retry-after"):
+            delay = float(headers["retry-after"])
+        else:
+            delay = min(self.base_delay * 2**attempt, self.max_delay)
+            delay *= 0.5 + random.random() / 2
+        return delay
+
+    def backoff(self, model: str, error, attempt: int) -> None:
+        """Pauses `model` after a 429 and halves its rates."""
+        delay = self.retry_delay(error, attempt)
+        budget = self.budget(model)
+        with self._condition:
+            self.rate_limited += 1
+            budget.paused_until = max(budget.paused_until, time.monotonic() + delay)
+            for bucket, rate in ((budget.requests, budget.request_rate), (budget.tokens, budget.token_rate)):
+                if bucket:
+                    bucket.rate = max(bucket.rate / 2, rate / 10)
+
+    def update(self, model: str, headers, estimate: int, completion) -> None:
+        """Adapts the budgets of `model` to a successful response and its headers."""
+        budget = self.budget(model)
+        headers = headers or {}
+        with self._condition:
+            for bucket, kind in ((budget.requests, "requests"), (budget.tokens, "tokens")):
+                if not bucket:
+                    continue
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                if limit:
+                    rate = float(limit) / 60
+                    if kind == "requests":
+                        budget.request_rate = rate
+                    else:
+                        budget.token_rate = rate
+                    bucket.capacity = max(rate * self.burst, 1.0)
+                rate = budget.request_rate if kind == "requests" else budget.token_rate
+                # additive recovery after a 429
+                bucket.rate = min(bucket.rate + rate / 20, rate)
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is not None:
+                    # the server's count includes other clients sharing the key
+                    bucket.wait_time(0)
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+                    reset = headers.get(f"x-ratelimit-reset-{kind}")
+                    if reset and float(remaining) < 1:
+                        budget.paused_until = max(
+                            budget.paused_until, time.monotonic() + parse_reset(reset)
+                        )
+            usage = getattr(completion, "usage", None)
+            if budget.tokens and usage is not None and usage.total_tokens:
+                # refund (or charge) the difference to the estimate
+                budget.tokens.tokens += estimate - usage.total_tokens
+            self.notify(budget)
+
+    def without_retries(self, client):
+        """
+        Returns `client` with the OpenAI SDK's own retries turned off, so 429s
+        reach the scheduler instead of being retried on the SDK's backoff.
+        """
+        max_retries = getattr(client, "max_retries", None)
+        if not isinstance(max_retries, int) or not max_retries:
+            # already off, or not an SDK client
+            return client
+        try:
+            return self._clients[client]
+        except KeyError:
+            copy = self._clients[client] = client.with_options(max_retries=0)
+            return copy
+
+    def send(self, client, params: dict):
+        completions = self.without_retries(client).chat.completions
+        if not self.read_headers:
+            return completions.create(**params), None
+        raw = completions.with_raw_response.create(**params)
+        return raw.parse(), raw.headers
+
+    async def send_async(self, client, params: dict):
+        completions = self.without_retries(client).chat.completions
+        if not self.read_headers:
+            return await completions.create(**params), None
+        raw = await completions.with_raw_response.create(**params)
+        return raw.parse(), raw.headers
+
+    def create(self, client, params: dict):
+        """
+        Sends a chat completion request once the budget allows, retrying on 429
+        and transient errors.
+        """
+        model = params["model"]
+        tokens = estimate_request_tokens(params, self.tokenizer, self.completion_tokens)
+        for attempt in itertools.count():
+            self.acquire(model, tokens)
+            try:
+                completion, headers = self.send(client, params)
+            except RateLimitError as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.backoff(model, e, attempt)
+                continue
+            except (APIConnectionError, APIStatusError) as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                time.sleep(self.retry_delay(e, attempt))
+                continue
+            self.update(model, headers, tokens, completion)
+            return completion
+
+    async def create_async(self, client, params: dict):
+        model = params["model"]
+        tokens = estimate_request_tokens(params, self.tokenizer, self.completion_tokens)
+        for attempt in itertools.count():
+            await self.acquire_async(model, tokens)
+            try:
+                completion, headers = await self.send_async(client, params)
+            except RateLimitError as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.backoff(model, e, attempt)
+                continue
+            except (APIConnectionError, APIStatusError) as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                await asyncio.sleep(self.retry_delay(e, attempt))
+                continue
+            self.update(model, headers, tokens, completion)
+            return completion
@@ -0,0 +1,107 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple, Tuple, Union
+
+# fields of ChatCompletionMessage converted explicitly by `message_to_dict`
+_MESSAGE_FIELDS = {"content", "role", "function_call", "tool_calls"}
+
+
+class JSONCodec(NamedTuple):
+    """
+    A JSON parser: `loads` parses str or bytes. Codecs only parse; JSON written
+    into the history or sent to clients always comes from the standard library,
+    so it doesn't depend on which codec is installed.
+    """
+
+    name: str
+    loads: Callable[[Union[str, bytes]], Any]
+
+
+STDLIB_CODEC = JSONCodec("json", json.loads)
+
+
+def orjson_codec() -> JSONCodec:
+    """JSON codec backed by orjson. Requires the optional `orjson` package."""
+    try:
+        import orjson
+    except ImportError as e:
+        raise ImportError("orjson_codec requires orjson: pip install orjson") from e
+    return JSONCodec("orjson", orjson.loads)
+
+
+def default_codec() -> JSONCodec:
+    """
+    orjson when it is installed, the standard library otherwise. Set the
+    SWARM_JSON_CODEC environment variable to "json" to force the standard library.
+    """
+    if os.environ.get("SWARM_JSON_CODEC", "orjson") == "orjson":
+        try:
+            return orjson_codec()
+        except ImportError:
+            pass
+    return STDLIB_CODEC
+
+
+_codec = default_codec()
+
+
+def get_codec() -> JSONCodec:
+    return _codec
+
+
+def set_codec(codec: JSONCodec) -> None:
+    """Replaces the JSON codec used to parse tool arguments and requests."""
+    global _codec
+    _codec = codec
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _codec.loads(data)
+
+
+@lru_cache(maxsize=None)
+def _extra_fields(message_type: type) -> Tuple[str, ...]:
+    # fields newer openai versions add to the message (refusal, audio, ...)
+    return tuple(
+        name for name in message_type.model_fields if name not in _MESSAGE_FIELDS
+    )
+
+
+def _dump(value):
+    return value.model_dump(mode="json") if hasattr(value, "model_dump") else value
+
+
+def message_to_dict(message, sender: str) -> dict:
+    """
+    Converts a ChatCompletionMessage into its history dict straight from its
+    attributes. The result equals `json.loads(message.model_dump_json())` plus
+    the `sender`, without the round trip through a JSON string.
+    """
+    function_call = message.function_call
+    tool_calls = message.tool_calls
+    data = {
+        "content": message.content,
+        "role": message.role,
+        "function_call": function_call
+        and {"arguments": function_call.arguments, "name": function_call.name},
+        "tool_calls": tool_calls
+        and [
+            {
+                "id": tool_call.id,
+                "function": {
+                    "arguments": tool_call.function.arguments,
+                    "name": tool_call.function.name,
+                },
+                "type": tool_call.type,
+            }
+            for tool_call in tool_calls
+        ],
+    }
+    for name in _extra_fields(type(message)):
+        data[name] = _dump(getattr(message, name))
+    if message.model_extra:
+        for name, value in message.model_extra.items():
+            data[name] = _dump(value)
+    data["sender"] = sender
+    return data
@@ -0,0 +1,346 @@
+import asyncio
+import collections
+import json
+from typing import Dict, Optional, Union
+
+from . import serialization
+from .checkpoint import get_agent
+from .core import AsyncSwarm
+from .types import Agent, Response
+
+# options of a run request passed through to AsyncSwarm.run / run_and_stream
+RUN_OPTIONS = ("context_variables", "model_override", "max_turns", "execute_tools")
+
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+_START = b"event: start\ndata: {}\n\n"
+_END = b"event: end\ndata: {}\n\n"
+
+
+class RequestError(Exception):
+    """A run request that can't be served, with its HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def dumps(value) -> str:
+    """Compact JSON from the standard library, whatever codec parses requests."""
+    return json.dumps(value, separators=(",", ":"))
+
+
+def response_to_dict(response: Response) -> dict:
+    return {
+        "messages": response.messages,
+        "agent": response.agent and response.agent.name,
+        "context_variables": response.context_variables,
+        "turns": [turn.model_dump(mode="json") for turn in response.turns],
+        "run_id": response.run_id,
+    }
+
+
+def compact_delta(delta: dict) -> dict:
+    """The delta without its unset fields, which are most of them."""
+    return {key: value for key, value in delta.items() if value is not None}
+
+
+def encode_sse(event: dict) -> bytes:
+    """Encodes a `run_and_stream` event as a server-sent event."""
+    if "delim" in event:
+        return _START if event["delim"] == "start" else _END
+    if "response" in event:
+        data = dumps(response_to_dict(event["response"]))
+        return b"event: response\ndata: " + data.encode() + b"\n\n"
+    content = event.get("content")
+    if content and event.get("tool_calls") is None and event.get("role") is None:
+        # plain text deltas are the bulk of a stream
+        return b'data: {"content":' + dumps(content).encode() + b"}\n\n"
+    return b"data: " + dumps(compact_delta(event)).encode() + b"\n\n"
+
+
+def encode_ws(event: dict) -> str:
+    """Encodes a `run_and_stream` event as a WebSocket text frame."""
+    if "delim" in event:
+        return dumps({"type": event["delim"]})
+    if "response" in event:
+        return dumps({"type": "response", **response_to_dict(event["response"])})
+    return dumps({"type": "delta", **compact_delta(event)})
+
+
+def encode_error(error: BaseException) -> str:
+    return dumps(
+        {"type": "error", "error": str(error), "error_type": type(error).__name__}
+    )
+
+
+async def until_disconnect(coroutine, disconnected) -> bool:
+    """
+    Runs `coroutine` until it finishes or `disconnected` (a coroutine waiting
+    for the client to go away) does, cancelling the other. Returns whether
+    `coroutine` finished; its exceptions are raised.
+    """
+    task = asyncio.ensure_future(coroutine)
+    listener = asyncio.ensure_future(disconnected)
+    try:
+        await asyncio.wait({task, listener}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for pending in (task, listener):
+            pending.cancel()
+        await asyncio.gather(task, listener, return_exceptions=True)
+    if task.cancelled():
+        return False
+    task.result()
+    return True
+
+
+class SwarmApp:
+    """
+    ASGI application serving runs of an `AsyncSwarm`, so one process holds many
+    concurrent sessions on the event loop instead of a thread per client.
+
+    Endpoints:
+        POST /run: Runs to completion and returns the response as JSON.
+        POST /stream: Streams the run as server-sent events: `start` and `end`
+            around each completion, unnamed events for the deltas (without
+            their unset fields) and a final `response` (or `error`) event.
+        WebSocket /ws: Each JSON text message starts a run, streamed back as
+            `{"type": ...}` frames; `{"type": "cancel"}` stops the current run
+            and requests sent during a run are run after it.
+
+    A run request is a JSON object with `messages`, the `agent` name and
+    optionally `context_variables`, `model_override`, `max_turns` and
+    `execute_tools`.
+
+    Events are sent as they are produced and each send is awaited, so a client
+    reading slowly stops the run from reading its completion stream instead of
+    piling events up in memory. When a client disconnects the run stream is
+    closed, which closes the in-flight completion stream.
+
+    Args:
+        agents: The agents that can be run, by name, or a single agent used
+            when a request names none. Defaults to the agents registered with
+            `swarm.checkpoint.register_agent`.
+        swarm: The `AsyncSwarm` running requests; defaults to `AsyncSwarm()`.
+        max_sessions: Runs served at once; further requests get a 503.
+        max_body: Largest accepted request body, in bytes.
+    """
+
+    def __init__(
+        self,
+        agents: Union[Agent, Dict[str, Agent], None] = None,
+        swarm: Optional[AsyncSwarm] = None,
+        max_sessions: Optional[int] = None,
+        max_body: int = 1 << 20,
+    ):
+        if isinstance(agents, Agent):
+            self.default_agent, self.agents = agents, {agents.name: agents}
+        else:
+            self.default_agent, self.agents = None, agents
+        self.swarm = swarm or AsyncSwarm()
+        self.max_sessions = max_sessions
+        self.max_body = max_body
+        self.sessions = 0
+        self.disconnects = 0
+
+    def resolve_agent(self, name: Optional[str]) -> Agent:
+        if name is None:
+            if self.default_agent is None:
+                raise RequestError(400, "The request must name an agent")
+            return self.default_agent
+        try:
+            return self.agents[name] if self.agents is not None else get_agent(name)
+        except KeyError:
+            raise RequestError(404, f"Unknown agent {name!r}") from None
+
+    def parse_request(self, body: Union[str, bytes]):
+        """Returns the agent and the run options of a run request."""
+        try:
+            request = serialization.loads(body)
+        except ValueError:
+            raise RequestError(400, "The request body must be JSON") from None
+        if not isinstance(request, dict) or not isinstance(request.get("messages"), list):
+            raise RequestError(400, "The request must have a list of messages")
+        agent = self.resolve_agent(request.get("agent"))
+        options = {key: request[key] for key in RUN_OPTIONS if request.get(key) is not None}
+        return agent, request["messages"], options
+
+    def open_session(self) -> None:
+        if self.max_sessions is not None and self.sessions >= self.max_sessions:
+            raise RequestError(503, "Too many concurrent sessions")
+        self.sessions += 1
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self.handle_websocket(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+    async def handle_http(self, scope, receive, send) -> None:
+        path, method = scope["path"].rstrip("/"), scope["method"]
+        try:
+            if path not in ("/run", "/stream"):
+                raise RequestError(404, f"Unknown path {scope['path']}")
+            if method != "POST":
+                raise RequestError(405, "Use POST")
+            agent, messages, options = self.parse_request(await self.read_body(receive))
+            self.open_session()
+        except RequestError as e:
+            return await self.send_json(send, e.status, encode_error(e))
+        try:
+            if path == "/run":
+                try:
+                    response = await self.swarm.run(agent=agent, messages=messages, **options)
+                    data = dumps(response_to_dict(response))
+                except Exception as e:
+                    # reported like the error events of /stream and /ws
+                    return await self.send_json(send, 500, encode_error(e))
+                await self.send_json(send, 200, data)
+            else:
+                await self.stream(receive, send, agent, messages, options)
+        finally:
+            self.sessions -= 1
+
+    async def read_body(self, receive) -> bytes:
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise RequestError(400, "The client disconnected")
+            body += message.get("body", b"")
+            if len(body) > self.max_body:
+                raise RequestError(413, "The request body is too large")
+            if not message.get("more_body"):
+                return bytes(body)
+
+    async def send_json(self, send, status: int, data: str) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": JSON_HEADERS})
+        await send({"type": "http.response.body", "body": data.encode()})
+
+    async def stream(self, receive, send, agent, messages, options) -> None:
+        events = self.swarm.run_and_stream(agent=agent, messages=messages, **options)
+
+        async def pump():
+            await send({"type": "http.response.start", "status": 200, "headers": SSE_HEADERS})
+            try:
+                async for event in events:
+                    await send(
+                        {"type": "http.response.body", "body": encode_sse(event), "more_body": True}
+                    )
+            except Exception as e:
+                body = b"event: error\ndata: " + encode_error(e).encode() + b"\n\n"
+                await send({"type": "http.response.body", "body": body, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        try:
+            if not await until_disconnect(pump(), disconnected()):
+                self.disconnects += 1
+        finally:
+            # frees the in-flight completion stream if the run didn't finish
+            await events.aclose()
+
+    async def handle_websocket(self, scope, receive, send) -> None:
+        if scope["path"].rstrip("/") != "/ws":
+            return await send({"type": "websocket.close", "code": 4404})
+        if (await receive())["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+        # requests received while a run is streaming, run after it
+        backlog = collections.deque()
+        while True:
+            message = backlog.popleft() if backlog else await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                agent, messages, options = self.parse_request(
+                    message.get("text") or message.get("bytes") or b""
+                )
+                self.open_session()
+            except RequestError as e:
+                await send({"type": "websocket.send", "text": encode_error(e)})
+                continue
+            try:
+                if not await self.stream_websocket(
+                    receive, send, agent, messages, options, backlog
+                ):
+                    self.disconnects += 1
+                    return
+            finally:
+                self.sessions -= 1
+
+    async def stream_websocket(self, receive, send, agent, messages, options, backlog) -> bool:
+        """
+        Streams one run; returns False if the client disconnected during it.
+        Other messages received meanwhile are added to `backlog`.
+        """
+        events = self.swarm.run_and_stream(agent=agent, messages=messages, **options)
+        disconnected = False
+
+        async def pump():
+            try:
+                async for event in events:
+                    await send({"type": "websocket.send", "text": encode_ws(event)})
+            except Exception as e:
+                await send({"type": "websocket.send", "text": encode_error(e)})
+
+        async def cancelled():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    disconnected = True
+                    return
+                text = message.get("text") or message.get("bytes") or b""
+                try:
+                    if serialization.loads(text).get("type") == "cancel":
+                        return
+                except (ValueError, AttributeError):
+                    pass
+                backlog.append(message)
+
+        try:
+            if not await until_disconnect(pump(), cancelled()) and not disconnected:
+                await send({"type": "websocket.send", "text": dumps({"type": "cancelled"})})
+        finally:
+            await events.aclose()
+        return not disconnected
+
+
+def create_app(
+    agents: Union[Agent, Dict[str, Agent], None] = None,
+    swarm: Optional[AsyncSwarm] = None,
+    **kwargs,
+) -> SwarmApp:
+    return SwarmApp(agents, swarm, **kwargs)
+
+
+def serve(
+    agents: Union[Agent, Dict[str, Agent], None] = None,
+    swarm: Optional[AsyncSwarm] = None,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    **kwargs,
+) -> None:
+    """Serves a `SwarmApp` with uvicorn. Requires the optional `uvicorn` package."""
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise ImportError("serve requires uvicorn: pip install uvicorn") from e
+    uvicorn.run(create_app(agents, swarm, **kwargs), host=host, port=port, log_level="warning")
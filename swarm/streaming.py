@@ -0,0 +1,139 @@
+from typing import List, Optional, Tuple
+
+from . import serialization
+
+
+class ToolCallSlot:
+    __slots__ = ("id", "type", "name", "arguments", "complete", "taken")
+
+    def __init__(self):
+        self.id = []
+        self.type = []
+        self.name = []
+        self.arguments = []
+        self.complete = False
+        self.taken = False
+
+    def check_complete(self) -> bool:
+        # a JSON object is self-delimiting: once the arguments parse, no more
+        # fragments can follow without making them invalid
+        if not self.complete and self.arguments and self.arguments[-1].rstrip().endswith("}"):
+            try:
+                serialization.loads("".join(self.arguments))
+                self.complete = True
+            except ValueError:
+                pass
+        return self.complete
+
+    def to_dict(self) -> dict:
+        return {
+            "function": {
+                "arguments": "".join(self.arguments),
+                "name": "".join(self.name),
+            },
+            "id": "".join(self.id),
+            "type": "".join(self.type),
+        }
+
+
+class StreamAccumulator:
+    """
+    Folds the chunks of a streamed chat completion into the final assistant
+    message. Delta attributes are read directly off the chunk, text fragments are
+    collected in lists and joined once in `message()`, and tool calls are tracked
+    per stream index in compact slots.
+    """
+
+    __slots__ = ("sender", "content", "tool_calls", "usage")
+
+    def __init__(self, sender: str):
+        self.sender = sender
+        self.content = []
+        self.tool_calls = {}
+        self.usage = None
+
+    def add(self, chunk) -> Optional[dict]:
+        """
+        Accumulates `chunk` and returns the delta event to yield to the consumer,
+        or None for chunks without choices (e.g. the trailing usage chunk).
+        """
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            self.content.append(delta.content)
+
+        tool_call_events = None
+        if delta.tool_calls:
+            tool_call_events = []
+            for tool_call in delta.tool_calls:
+                slot = self.tool_calls.get(tool_call.index)
+                if slot is None:
+                    # tool calls are streamed one after another, so starting a
+                    # new one means every earlier one is complete
+                    for earlier in self.tool_calls.values():
+                        earlier.complete = True
+                    slot = self.tool_calls[tool_call.index] = ToolCallSlot()
+                function = tool_call.function
+                if tool_call.id:
+                    slot.id.append(tool_call.id)
+                if tool_call.type:
+                    slot.type.append(tool_call.type)
+                if function is not None:
+                    if function.name:
+                        slot.name.append(function.name)
+                    if function.arguments:
+                        slot.arguments.append(function.arguments)
+                tool_call_events.append(
+                    {
+                        "index": tool_call.index,
+                        "id": tool_call.id,
+                        "function": function
+                        and {"arguments": function.arguments, "name": function.name},
+                        "type": tool_call.type,
+                    }
+                )
+
+        function_call = delta.function_call
+        event = {
+            "content": delta.content,
+            "function_call": function_call
+            and {"arguments": function_call.arguments, "name": function_call.name},
+            "role": delta.role,
+            "tool_calls": tool_call_events,
+        }
+        if delta.role == "assistant":
+            event["sender"] = self.sender
+        return event
+
+    def message(self) -> dict:
+        return {
+            "content": "".join(self.content),
+            "sender": self.sender,
+            "role": "assistant",
+            "function_call": None,
+            "tool_calls": [slot.to_dict() for slot in self.tool_calls.values()] or None,
+        }
+
+    def received_text(self) -> str:
+        """The content and tool call arguments received so far."""
+        return "".join(self.content) + "".join(
+            "".join(slot.arguments) for slot in self.tool_calls.values()
+        )
+
+    def take_completed(self, final: bool = False) -> List[Tuple[int, dict]]:
+        """
+        Returns the `(index, tool_call)` pairs whose arguments have been fully
+        streamed since the last call. With `final`, every remaining tool call is
+        treated as complete (the stream has ended).
+        """
+        completed = []
+        for index, slot in self.tool_calls.items():
+            if slot.taken or not (final or slot.check_complete()):
+                continue
+            slot.taken = True
+            completed.append((index, slot.to_dict()))
+        return completed
@@ -0,0 +1,159 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+
+class Span:
+    """
+    A timed operation of a run (run, turn, llm, tool, handoff) with attributes.
+    Spans are exported when they end; use them as context managers to also
+    record the error of a failed operation.
+    """
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id", "start", "end_time", "attributes"
+    )
+
+    def __init__(self, tracer, name: str, parent: Optional["Span"] = None, start: float = None, attributes: dict = None):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.trace_id = parent.trace_id if parent and parent.trace_id else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time() if start is None else start
+        self.end_time = None
+        self.attributes = attributes or {}
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, end_time: float = None, **attributes) -> None:
+        if self.end_time is not None:
+            return
+        self.attributes.update(attributes)
+        self.end_time = time.time() if end_time is None else end_time
+        self.tracer.exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None and issubclass(exc_type, (GeneratorExit, asyncio.CancelledError)):
+            self.attributes["cancelled"] = True
+        elif exc is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        self.end()
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end_time,
+            "duration": self.end_time - self.start,
+            "attributes": self.attributes,
+        }
+
+
+class NoopSpan:
+    """Span handed out by `NoopTracer`; every method does nothing."""
+
+    __slots__ = ()
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, end_time: float = None, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Tracer:
+    """Creates spans for a run and hands them to `exporter` as they end."""
+
+    enabled = True
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        return Span(self, name, parent, attributes=attributes)
+
+    def record_span(
+        self, name: str, start: float, end: float, parent: Optional[Span] = None, **attributes
+    ) -> Span:
+        """Exports a span for an operation that has already finished."""
+        span = Span(self, name, parent, start, attributes)
+        span.end(end)
+        return span
+
+
+class NoopTracer(Tracer):
+    """Default tracer: hands out a shared no-op span and exports nothing."""
+
+    enabled = False
+
+    def __init__(self):
+        self.exporter = None
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes) -> NoopSpan:
+        return NOOP_SPAN
+
+    def record_span(
+        self, name: str, start: float, end: float, parent: Optional[Span] = None, **attributes
+    ) -> NoopSpan:
+        return NOOP_SPAN
+
+
+class InMemoryExporter:
+    """Keeps finished spans in `spans`, mostly for tests."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class JSONLExporter:
+    """Appends each finished span as a JSON line to the file at `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
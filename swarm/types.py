@@ -1,29 +1,126 @@
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat.chat_completion_message_tool_call import (
-    ChatCompletionMessageToolCall,
-    Function,
-)
-from typing import List, Callable, Union, Optional
+from types import MappingProxyType
+from typing import Any, Awaitable, List, Callable, Mapping, NamedTuple, Union, Optional
 
 # Third-party imports
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_serializer
 
-AgentFunction = Callable[[], Union[str, "Agent", dict]]
+# Local imports
+from .context import ContextWindow
+from .util import ToolTable
+
+# OpenAI types re-exported from here, imported on first access since loading
+# `openai` dominates the import time of the package
+_OPENAI_TYPES = {
+    "ChatCompletion": "openai.types.chat",
+    "ChatCompletionMessage": "openai.types.chat",
+    "ChatCompletionMessageToolCall": "openai.types.chat.chat_completion_message_tool_call",
+    "Function": "openai.types.chat.chat_completion_message_tool_call",
+}
+
+
+def __getattr__(name: str):
+    module = _OPENAI_TYPES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+AgentFunction = Callable[
+    [], Union[str, "Agent", dict, Awaitable[Union[str, "Agent", dict]]]
+]
 
 
 class Agent(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     name: str = "Agent"
     model: str = "gpt-4o"
     instructions: Union[str, Callable[[], str]] = "You are a helpful agent."
     functions: List[AgentFunction] = []
     tool_choice: str = None
     parallel_tool_calls: bool = True
+    context_window: Optional[ContextWindow] = None
+
+    _tool_table: Optional[ToolTable] = PrivateAttr(default=None)
+
+    def get_tool_table(self) -> ToolTable:
+        """
+        Returns the compiled tool table for `functions`, rebuilding it only when
+        the list of functions has changed since it was last compiled.
+        """
+        if self._tool_table is None or not self._tool_table.matches(self.functions):
+            self._tool_table = ToolTable(self.functions)
+        return self._tool_table
+
+
+class ToolMetrics(NamedTuple):
+    """
+    Execution time of a single tool call, and when (unix time) it started.
+    A tuple like `ToolResult`, since one is built for every tool call.
+    """
+
+    name: str
+    tool_call_id: str = ""
+    duration: float = 0.0
+    started_at: float = 0.0
+
+
+class TurnMetrics(BaseModel):
+    """
+    Metrics for a single turn (one chat completion and the tool calls it made).
+
+    Attributes:
+        agent (str): Name of the agent that ran the turn.
+        model (str): Model the completion was requested from.
+        prompt_tokens (Optional[int]): Prompt tokens billed for the completion,
+            None when the completion reported no usage (streamed completions
+            only do with `Swarm(stream_usage=True)`).
+        completion_tokens (Optional[int]): Completion tokens billed for the completion.
+        cached_tokens (Optional[int]): Prompt tokens served from the provider's prompt cache.
+        llm_time (float): Wall time of the completion, in seconds.
+        time_to_first_token (float): Seconds until the first streamed token, if streaming.
+        tools (List[ToolMetrics]): Execution time of each tool call.
+    """
+
+    agent: str
+    model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    llm_time: float = 0.0
+    time_to_first_token: Optional[float] = None
+    tools: List[ToolMetrics] = []
+
+    @field_serializer("tools")
+    def serialize_tools(self, tools: List[ToolMetrics]) -> List[dict]:
+        # dumped as objects, as when ToolMetrics was a model
+        return [tool._asdict() for tool in tools]
+
+    def record_usage(self, usage) -> None:
+        if usage is None:
+            return
+        self.prompt_tokens = usage.prompt_tokens or 0
+        self.completion_tokens = usage.completion_tokens or 0
+        self.cached_tokens = 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        if isinstance(details, dict):
+            self.cached_tokens = details.get("cached_tokens") or 0
+        elif details is not None:
+            self.cached_tokens = getattr(details, "cached_tokens", 0) or 0
 
 
 class Response(BaseModel):
     messages: List = []
     agent: Optional[Agent] = None
     context_variables: dict = {}
+    turns: List[TurnMetrics] = []
+    summary: Optional[str] = None
+    summary_boundary: int = 0
+    run_id: Optional[str] = None
 
 
 class Result(BaseModel):
@@ -39,3 +136,63 @@ class Result(BaseModel):
     value: str = ""
     agent: Optional[Agent] = None
     context_variables: dict = {}
+
+
+class ToolResult(NamedTuple):
+    """
+    Lightweight, immutable counterpart of `Result` for plain tool return values
+    (strings and agents), built without pydantic validation on every tool call.
+    Exposes the same `value`, `agent` and `context_variables` as `Result`.
+    """
+
+    value: str = ""
+    agent: Optional[Agent] = None
+    context_variables: Mapping = MappingProxyType({})
+
+
+class ToolCallsResponse(NamedTuple):
+    """The tool messages, context variable updates and handoff of one turn's tool calls."""
+
+    messages: List[dict]
+    agent: Optional[Agent]
+    context_variables: dict
+
+
+class BatchJob(BaseModel):
+    """
+    A single independent conversation to run as part of `Swarm.run_batch`.
+
+    Attributes:
+        id: Identifier the matching `BatchResult` is tagged with.
+        agent (Agent): The (initial) agent to be called.
+        messages (List): The conversation so far.
+        context_variables (dict): Context variables for this conversation.
+    """
+
+    id: Any = None
+    agent: Agent
+    messages: List
+    context_variables: dict = {}
+
+
+class BatchResult(BaseModel):
+    """
+    Outcome of a `BatchJob`: either its `response`, or the `error` it raised.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    job_id: Any = None
+    response: Optional[Response] = None
+    error: Optional[BaseException] = None
+
+
+class ToolOutcome(NamedTuple):
+    """
+    The `Result` of a tool call together with how long it took, in seconds, and
+    when (unix time) it started.
+    """
+
+    result: Union[Result, ToolResult]
+    duration: float
+    started_at: float = 0.0
@@ -1,6 +1,10 @@
+import asyncio
 import inspect
+import threading
 from datetime import datetime
 
+__CTX_VARS_NAME__ = "context_variables"
+
 
 def debug_print(debug: bool, *args: str) -> None:
     if not debug:
@@ -10,6 +14,33 @@ def debug_print(debug: bool, *args: str) -> None:
     print(f"\033[97m[\033[90m{timestamp}\033[97m]\033[90m {message}\033[0m")
 
 
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns a process-wide event loop running on a daemon thread, used by the
+    synchronous `Swarm` to drive coroutine tool functions.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="swarm-background-loop", daemon=True
+            ).start()
+            _background_loop = loop
+    return _background_loop
+
+
+def run_coroutines(coroutines: list) -> list:
+    """Runs coroutines concurrently on the background loop and waits for all results."""
+    loop = get_background_loop()
+    futures = [asyncio.run_coroutine_threadsafe(c, loop) for c in coroutines]
+    return [future.result() for future in futures]
+
+
 def merge_fields(target, source):
     for key, value in source.items():
         if isinstance(value, str):
@@ -85,3 +116,41 @@ def function_to_json(func) -> dict:
             },
         },
     }
+
+
+class ToolTable:
+    """
+    Precompiled view of an agent's functions: the JSON schemas sent to the model
+    (with `context_variables` hidden), the name -> function dispatch map and the
+    names of functions that take `context_variables` or are coroutines.
+    """
+
+    __slots__ = ("functions", "tools", "function_map", "context_functions", "coroutine_functions")
+
+    def __init__(self, functions):
+        self.functions = tuple(functions)
+        self.tools = []
+        self.function_map = {}
+        self.context_functions = set()
+        self.coroutine_functions = set()
+
+        for func in self.functions:
+            tool = function_to_json(func)
+            # hide context_variables from model
+            params = tool["function"]["parameters"]
+            params["properties"].pop(__CTX_VARS_NAME__, None)
+            if __CTX_VARS_NAME__ in params["required"]:
+                params["required"].remove(__CTX_VARS_NAME__)
+            self.tools.append(tool)
+
+            name = func.__name__
+            self.function_map[name] = func
+            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
+                self.context_functions.add(name)
+            if inspect.iscoroutinefunction(func):
+                self.coroutine_functions.add(name)
+
+    def matches(self, functions) -> bool:
+        if len(functions) != len(self.functions):
+            return False
+        return all(a is b for a, b in zip(functions, self.functions))
@@ -0,0 +1,31 @@
+"""
+Per-turn overhead of `Swarm.run` as the re-submitted history grows, compared
+with the cost of the `copy.deepcopy(messages)` the run loop used to do.
+
+    python -m tests.benchmarks.bench_history
+"""
+import copy
+
+from swarm import Agent, Swarm
+from tests.benchmarks.common import make_history, measure, simple_client
+
+HISTORY_LENGTHS = [10, 100, 500, 1000, 2000]
+
+
+def main():
+    client = Swarm(client=simple_client())
+    agent = Agent()
+
+    print(f"{'messages':>10} {'run (us)':>12} {'deepcopy (us)':>14}")
+    results = {}
+    for length in HISTORY_LENGTHS:
+        history = make_history(length)
+        run = measure(lambda: client.run(agent=agent, messages=history))
+        deepcopy = measure(lambda: copy.deepcopy(history), number=10)
+        results[length] = run
+        print(f"{length:>10} {run * 1e6:>12.1f} {deepcopy * 1e6:>14.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Load and soak test: concurrent simulated customers talk to the airline example
+(triage -> flight modification -> flight cancel) through a local
+`FakeOpenAIServer`, over real HTTP. Reports throughput, user turn and
+completion latency percentiles, swarm's CPU time per completion and the
+memory retained per session, optionally as JSON.
+
+    python -m tests.benchmarks.bench_load --users 32 --sessions 8 --stream
+    python -m tests.benchmarks.bench_load --rounds 10 --output load.json  # soak
+
+Each session is one customer conversation of `len(CONVERSATION)` user turns;
+a user turn is one `client.run` and makes several completions. CPU time is
+measured on the worker threads only, so it excludes the fake server.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from swarm import Swarm
+from swarm.fake_server import FakeOpenAIServer, FakeReply, lognormal_latency
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "examples", "airline"))
+from configs.agents import triage_agent  # noqa: E402
+
+CONTEXT_VARIABLES = {
+    "customer_context": "CUSTOMER_ID: customer_12345, NAME: John Doe, STATUS: Premium",
+    "flight_context": "Flight 1919 from LGA to LAX, departing 3pm ET, 5/21/2024.",
+}
+
+CONVERSATION = [
+    "I need to cancel my flight 1919, something came up.",
+    "A refund please.",
+    "Thanks, that's everything.",
+]
+
+
+def tool_call(name, **arguments):
+    return FakeReply(tool_calls=[{"name": name, "arguments": arguments}])
+
+
+def airline_responder(request: dict) -> FakeReply:
+    """Plays the model for the airline agents, picking the reply from the tools offered."""
+    tools = {tool["function"]["name"] for tool in request.get("tools", ())}
+    last = request["messages"][-1]
+    if "transfer_to_flight_modification" in tools:
+        return tool_call("transfer_to_flight_modification")
+    if "transfer_to_flight_cancel" in tools:
+        return tool_call("transfer_to_flight_cancel")
+    if last["role"] == "tool":
+        return FakeReply(content="Done. " + "Is there anything else I can help you with? " * 3)
+    text = last["content"].lower()
+    if "refund" in text:
+        return tool_call("initiate_refund")
+    if "thanks" in text:
+        return tool_call("case_resolved")
+    return FakeReply(content="Would you like a refund or flight credits for your cancellation?")
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda p: ordered[min(int(p * len(ordered)), len(ordered) - 1)]  # noqa: E731
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+class Stats:
+    def __init__(self):
+        self.turn_latencies = []
+        self.first_token_latencies = []
+        self.completion_latencies = []
+        self.completions = 0
+        self.cpu_time = 0.0
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def add_session(self, turns, first_tokens, completions, cpu_time, error=None):
+        with self._lock:
+            self.turn_latencies += turns
+            self.first_token_latencies += first_tokens
+            self.completion_latencies += completions
+            self.completions += len(completions)
+            self.cpu_time += cpu_time
+            if error is not None:
+                self.errors.append(f"{type(error).__name__}: {error}")
+
+
+def run_turn(client: Swarm, agent, messages, context_variables, stream: bool):
+    """Runs one user turn; returns the response and the seconds to its first content."""
+    start = time.perf_counter()
+    if not stream:
+        return client.run(agent, messages, context_variables), None
+    first_token = None
+    for chunk in client.run(agent, messages, context_variables, stream=True):
+        if first_token is None and chunk.get("content"):
+            first_token = time.perf_counter() - start
+        if "response" in chunk:
+            return chunk["response"], first_token
+
+
+def run_session(client: Swarm, stats: Stats, stream: bool) -> None:
+    """One simulated customer, going through the whole conversation."""
+    agent, messages = triage_agent, []
+    context_variables = dict(CONTEXT_VARIABLES)
+    turns, first_tokens, completions = [], [], []
+    cpu_start = time.thread_time()
+    error = None
+    try:
+        for text in CONVERSATION:
+            messages.append({"role": "user", "content": text})
+            start = time.perf_counter()
+            response, first_token = run_turn(client, agent, messages, context_variables, stream)
+            turns.append(time.perf_counter() - start)
+            if first_token is not None:
+                first_tokens.append(first_token)
+            completions += [turn.llm_time for turn in response.turns]
+            messages.extend(response.messages)
+            agent = response.agent
+            context_variables = response.context_variables
+    except Exception as e:
+        error = e
+    stats.add_session(turns, first_tokens, completions, time.thread_time() - cpu_start, error)
+
+
+def retained_memory() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def run_load(
+    client: Swarm,
+    users: int,
+    sessions: int,
+    rounds: int = 1,
+    stream: bool = False,
+    trace_memory: bool = True,
+) -> dict:
+    """
+    Runs `rounds` rounds of `users` concurrent users, each going through
+    `sessions` conversations, and returns the results. Memory growth is the
+    slope of the memory retained after each round, so the first round's
+    allocations (imports, caches, connection pools) are not counted.
+    """
+    stats = Stats()
+    memory = []
+    if trace_memory:
+        tracemalloc.start()
+        memory.append(retained_memory())
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users, thread_name_prefix="swarm-load") as executor:
+        for _ in range(rounds):
+            for future in [
+                executor.submit(run_session, client, stats, stream)
+                for _ in range(users * sessions)
+            ]:
+                future.result()
+            if trace_memory:
+                memory.append(retained_memory())
+    elapsed = time.perf_counter() - start
+    if trace_memory:
+        tracemalloc.stop()
+
+    total_sessions = users * sessions * rounds
+    user_turns = len(stats.turn_latencies)
+    results = {
+        "config": {
+            "users": users,
+            "sessions": sessions,
+            "rounds": rounds,
+            "stream": stream,
+            "trace_memory": trace_memory,
+        },
+        "elapsed": elapsed,
+        "sessions": total_sessions,
+        "user_turns": user_turns,
+        "completions": stats.completions,
+        "errors": len(stats.errors),
+        "error_samples": stats.errors[:5],
+        "throughput": {
+            "sessions_per_s": total_sessions / elapsed,
+            "user_turns_per_s": user_turns / elapsed,
+            "completions_per_s": stats.completions / elapsed,
+        },
+        "turn_latency": percentiles(stats.turn_latencies),
+        "completion_latency": percentiles(stats.completion_latencies),
+        "cpu_per_completion": stats.cpu_time / stats.completions if stats.completions else None,
+    }
+    if stream:
+        results["first_token_latency"] = percentiles(stats.first_token_latencies)
+    if trace_memory:
+        # after the first round; a single round can only report the total
+        baseline = memory[1] if rounds > 1 else memory[0]
+        measured = users * sessions * (rounds - 1) if rounds > 1 else total_sessions
+        results["memory"] = {
+            "retained_bytes": memory[-1] - memory[0],
+            "growth_per_session": (memory[-1] - baseline) / measured,
+            "per_round": [after - memory[0] for after in memory[1:]],
+        }
+    return results
+
+
+def print_results(results: dict) -> None:
+    ms = lambda stats: " ".join(f"{k}={v * 1e3:.1f}ms" for k, v in stats.items())  # noqa: E731
+    throughput = results["throughput"]
+    print(
+        f"{results['sessions']} sessions, {results['user_turns']} user turns, "
+        f"{results['completions']} completions in {results['elapsed']:.2f}s "
+        f"({results['errors']} errors)"
+    )
+    print(
+        f"throughput: {throughput['user_turns_per_s']:.1f} user turns/s, "
+        f"{throughput['completions_per_s']:.1f} completions/s"
+    )
+    print(f"turn latency: {ms(results['turn_latency'])}")
+    print(f"completion latency: {ms(results['completion_latency'])}")
+    if "first_token_latency" in results:
+        print(f"first token latency: {ms(results['first_token_latency'])}")
+    if results["cpu_per_completion"] is not None:
+        print(f"cpu per completion: {results['cpu_per_completion'] * 1e6:.0f}us")
+    if "memory" in results:
+        memory = results["memory"]
+        print(
+            f"memory: {memory['growth_per_session']:.0f} bytes/session growth, "
+            f"{memory['retained_bytes'] / 1024:.0f} KiB retained"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=16, help="concurrent simulated users")
+    parser.add_argument("--sessions", type=int, default=4, help="conversations per user per round")
+    parser.add_argument("--rounds", type=int, default=1, help="rounds to run, for soak tests")
+    parser.add_argument("--stream", action="store_true", help="run with stream=True")
+    parser.add_argument("--latency", type=float, default=0.02, help="median fake completion latency, in seconds")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows the run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(
+        latency=lognormal_latency(args.latency) if args.latency else 0.0,
+        chunk_delay=args.chunk_delay,
+        responder=airline_responder,
+        record_requests=False,
+    )
+    with server:
+        client = Swarm(client=server.client(max_retries=0))
+        results = run_load(
+            client,
+            users=args.users,
+            sessions=args.sessions,
+            rounds=args.rounds,
+            stream=args.stream,
+            trace_memory=not args.no_memory,
+        )
+    results["config"].update(latency=args.latency, chunk_delay=args.chunk_delay)
+    results["server"] = {str(status): count for status, count in server.status_counts.items()}
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-turn object overhead of tool-heavy runs: the lightweight `ToolResult`,
+`ToolMetrics` and `ToolCallsResponse` tuples the tool loop builds, against the
+validated models it used to build for every tool call and turn.
+
+    python -m tests.benchmarks.bench_objects
+"""
+from pydantic import BaseModel
+
+from swarm import Agent, Swarm
+from swarm.types import Response, Result, ToolCallsResponse, ToolMetrics, ToolResult
+from tests.benchmarks.common import ZeroLatencyClient, measure
+from tests.mock_client import create_mock_response
+
+TOOL_CALLS_PER_TURN = 10
+
+
+class ToolMetricsModel(BaseModel):
+    """`ToolMetrics` as the pydantic model it used to be."""
+
+    name: str
+    tool_call_id: str = ""
+    duration: float = 0.0
+    started_at: float = 0.0
+
+
+def lookup(query):
+    return f"result for {query}"
+
+
+def main():
+    agent = Agent(functions=[lookup])
+    objects = {
+        "tool result": (
+            lambda: Result(value="result"),
+            lambda: ToolResult("result"),
+        ),
+        "handoff result": (
+            lambda: Result(value="{}", agent=agent),
+            lambda: ToolResult("{}", agent),
+        ),
+        "tool metrics": (
+            lambda: ToolMetricsModel(
+                name="lookup", tool_call_id="call_1", duration=0.001, started_at=0.0
+            ),
+            lambda: ToolMetrics("lookup", "call_1", 0.001, 0.0),
+        ),
+        "tool calls response": (
+            lambda: Response(messages=[], agent=None, context_variables={}),
+            lambda: ToolCallsResponse([], None, {}),
+        ),
+    }
+
+    print(f"{'object':>22} {'pydantic (us)':>14} {'tuple (us)':>11}")
+    results = {}
+    for name, (model, light) in objects.items():
+        model_time = measure(model, number=10000)
+        light_time = measure(light, number=10000)
+        results[name] = (model_time, light_time)
+        print(f"{name:>22} {model_time * 1e6:>14.2f} {light_time * 1e6:>11.2f}")
+
+    client = Swarm(
+        client=ZeroLatencyClient(
+            [
+                create_mock_response(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "lookup", "args": {"query": "q"}}] * TOOL_CALLS_PER_TURN,
+                ),
+                create_mock_response({"role": "assistant", "content": "done"}),
+            ]
+        )
+    )
+    messages = [{"role": "user", "content": "Look things up"}]
+    run = measure(lambda: client.run(agent=agent, messages=messages), number=200)
+    saved = (
+        TOOL_CALLS_PER_TURN * (results["tool result"][0] + results["tool metrics"][0])
+        + results["tool calls response"][0]
+    )
+    print(
+        f"\nrun with {TOOL_CALLS_PER_TURN} tool calls: {run * 1e6:.1f} us "
+        f"(validated models would add {saved * 1e6:.1f} us)"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    main()
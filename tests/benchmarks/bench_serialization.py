@@ -0,0 +1,57 @@
+"""
+Cost of turning an assistant message with large tool-call payloads into its
+history dict, and of parsing its tool arguments: `message_to_dict` against the
+`json.loads(message.model_dump_json())` round trip, and each available JSON codec.
+
+    python -m tests.benchmarks.bench_serialization
+"""
+import json
+
+from swarm.serialization import STDLIB_CODEC, message_to_dict, orjson_codec
+from tests.benchmarks.common import measure
+from tests.mock_client import create_mock_response
+
+PAYLOAD_SIZES = [1_000, 10_000, 100_000]
+TOOL_CALLS = 4
+
+
+def make_message(payload_size: int):
+    records = [{"id": i, "name": f"record {i}", "tags": ["a", "b"]} for i in range(payload_size // 40)]
+    calls = [{"name": f"store_{i}", "args": {"records": records}} for i in range(TOOL_CALLS)]
+    return create_mock_response({"role": "assistant", "content": ""}, calls).choices[0].message
+
+
+def round_trip(message):
+    message = message.model_copy()
+    message.sender = "Agent"
+    return json.loads(message.model_dump_json())
+
+
+def main():
+    codecs = [STDLIB_CODEC]
+    try:
+        codecs.append(orjson_codec())
+    except ImportError:
+        pass
+
+    header = f"{'payload':>9} {'round trip (us)':>16} {'to_dict (us)':>13}"
+    header += "".join(f" {codec.name + ' args (us)':>17}" for codec in codecs)
+    print(header)
+    results = {}
+    for size in PAYLOAD_SIZES:
+        message = make_message(size)
+        arguments = [tool_call.function.arguments for tool_call in message.tool_calls]
+        round_trip_time = measure(lambda: round_trip(message))
+        to_dict_time = measure(lambda: message_to_dict(message, "Agent"))
+        parse_times = [
+            measure(lambda: [codec.loads(args) for args in arguments]) for codec in codecs
+        ]
+        results[size] = (round_trip_time, to_dict_time, parse_times)
+        row = f"{size:>9} {round_trip_time * 1e6:>16.1f} {to_dict_time * 1e6:>13.1f}"
+        row += "".join(f" {t * 1e6:>17.1f}" for t in parse_times)
+        print(row)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Per-chunk cost of accumulating a streamed completion: `StreamAccumulator`
+against the json round trip + `merge_chunk` path run_and_stream used to take.
+
+    python -m tests.benchmarks.bench_stream
+"""
+import warnings
+
+from swarm.streaming import StreamAccumulator
+from tests.benchmarks.common import measure
+from tests.mock_client import create_mock_stream
+from tests.test_streaming import reference_accumulate
+
+CONTENT = "The weather in San Francisco is sunny with a light breeze. " * 20
+TOOL_CALLS = [
+    {"name": f"lookup_{i}", "args": {"query": "lorem ipsum " * 30, "limit": 10}}
+    for i in range(3)
+]
+
+
+def accumulate(chunks):
+    accumulator = StreamAccumulator("Agent")
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator.message()
+
+
+def main():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    streams = {
+        "content": create_mock_stream({"role": "assistant", "content": CONTENT}),
+        "tool_calls": create_mock_stream(
+            {"role": "assistant", "content": ""}, TOOL_CALLS
+        ),
+    }
+
+    print(f"{'stream':>12} {'chunks':>7} {'merge_chunk (us)':>17} {'accumulator (us)':>17}")
+    results = {}
+    for name, chunks in streams.items():
+        reference = measure(lambda: reference_accumulate(chunks, "Agent", record_events=False), number=20)
+        accumulator = measure(lambda: accumulate(chunks), number=20)
+        results[name] = accumulator / len(chunks)
+        print(
+            f"{name:>12} {len(chunks):>7} {reference * 1e6 / len(chunks):>17.2f} "
+            f"{accumulator * 1e6 / len(chunks):>17.2f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
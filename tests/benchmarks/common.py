@@ -0,0 +1,46 @@
+import time
+from types import SimpleNamespace
+
+from tests.mock_client import create_mock_response
+
+
+class ZeroLatencyClient:
+    """
+    Stand-in for the OpenAI client returning prebuilt completions instantly, so a
+    benchmark only measures swarm's own per-turn overhead.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return response
+
+
+def simple_client(content="sample response content"):
+    return ZeroLatencyClient(
+        [create_mock_response({"role": "assistant", "content": content})]
+    )
+
+
+def make_history(length: int) -> list:
+    roles = ("user", "assistant")
+    return [
+        {"role": roles[i % 2], "content": f"message {i} " + "lorem ipsum " * 20}
+        for i in range(length)
+    ]
+
+
+def measure(fn, number: int = 100, repeat: int = 5) -> float:
+    """Returns the best mean seconds per call of `fn` over `repeat` rounds of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
@@ -0,0 +1,251 @@
+"""
+Microbenchmark suite for swarm's hot paths, with stored baselines to catch
+regressions. Each benchmark reports the best mean time per call, at several
+sizes (history length, signature width, stream length or tool count).
+
+    python -m tests.benchmarks.suite run [-k run_turn] [--output results.json]
+    python -m tests.benchmarks.suite save  # store the baseline
+    python -m tests.benchmarks.suite compare [--results results.json] [--threshold 0.15]
+
+`compare` runs the suite (or loads `--results`), compares it with the
+baseline and exits with status 1 if any benchmark is slower by more than
+`threshold`. Baselines are only meaningful on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+
+from swarm import Agent, Swarm
+from swarm.streaming import StreamAccumulator
+from swarm.util import ToolTable, function_to_json
+from tests.benchmarks.common import ZeroLatencyClient, make_history, measure, simple_client
+from tests.mock_client import create_mock_response, create_mock_stream
+from tests.test_streaming import reference_accumulate
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+HISTORY_LENGTHS = [10, 100, 1000]
+SIGNATURE_WIDTHS = [2, 10, 50]
+STREAM_LENGTHS = [100, 1000, 5000]
+TOOL_COUNTS = [1, 10, 50]
+HANDOFFS = 5
+
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes, number=100):
+    """Registers `fn(size) -> callable` as the benchmark `name[size]` for each size."""
+
+    def register(fn):
+        for size in sizes:
+            BENCHMARKS[f"{name}[{size}]"] = (fn, size, number)
+        return fn
+
+    return register
+
+
+def lookup(query: str, limit: int = 10):
+    return f"result for {query}"
+
+
+def wide_function(width: int):
+    params = ", ".join(
+        f"p{i}: {('str', 'int', 'float', 'bool')[i % 4]}" + (" = None" if i >= width // 2 else "")
+        for i in range(width)
+    )
+    namespace = {}
+    exec(f"def wide({params}):\n    'A function with {width} parameters.'\n", namespace)
+    return namespace["wide"]
+
+
+@benchmark("run_turn", HISTORY_LENGTHS)
+def run_turn(length):
+    """One text turn of `Swarm.run`: swarm's own per-turn overhead."""
+    client = Swarm(client=simple_client())
+    agent = Agent(functions=[lookup])
+    history = make_history(length)
+    return lambda: client.run(agent=agent, messages=history)
+
+
+@benchmark("tool_run", HISTORY_LENGTHS)
+def tool_run(length):
+    """A tool call turn and a text turn."""
+    client = Swarm(
+        client=ZeroLatencyClient(
+            [
+                create_mock_response(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "lookup", "args": {"query": "q"}}],
+                ),
+                create_mock_response({"role": "assistant", "content": "done"}),
+            ]
+        )
+    )
+    agent = Agent(functions=[lookup])
+    history = make_history(length)
+    return lambda: client.run(agent=agent, messages=history)
+
+
+@benchmark("handoff_run", HISTORY_LENGTHS, number=50)
+def handoff_run(length):
+    """A chain of `HANDOFFS` agents handing off to the next, then a text turn."""
+    agents = [Agent(name=f"Agent {i}") for i in range(HANDOFFS + 1)]
+    for agent, next_agent in zip(agents, agents[1:]):
+
+        def transfer(next_agent=next_agent):
+            return next_agent
+
+        transfer.__name__ = "transfer"
+        agent.functions = [transfer, lookup]
+    handoff = create_mock_response(
+        {"role": "assistant", "content": ""}, [{"name": "transfer", "args": {}}]
+    )
+    final = create_mock_response({"role": "assistant", "content": "done"})
+    client = Swarm(client=ZeroLatencyClient([handoff] * HANDOFFS + [final]))
+    history = make_history(length)
+    return lambda: client.run(agent=agents[0], messages=history)
+
+
+@benchmark("function_to_json", SIGNATURE_WIDTHS, number=1000)
+def function_to_json_wide(width):
+    func = wide_function(width)
+    return lambda: function_to_json(func)
+
+
+def make_stream(length):
+    return create_mock_stream(
+        {"role": "assistant", "content": "x" * (length // 2)},
+        [{"name": "lookup", "args": {"query": "y" * (length // 2)}}],
+    )
+
+
+@benchmark("merge_chunk", STREAM_LENGTHS, number=10)
+def merge_chunk_stream(length):
+    """The json round trip + `merge_chunk` accumulation of a stream of `length` characters."""
+    chunks = make_stream(length)
+    return lambda: reference_accumulate(chunks, "Agent", record_events=False)
+
+
+@benchmark("stream_accumulator", STREAM_LENGTHS, number=10)
+def stream_accumulator(length):
+    """`StreamAccumulator`, the accumulation `run_and_stream` does."""
+    chunks = make_stream(length)
+
+    def accumulate():
+        accumulator = StreamAccumulator("Agent")
+        for chunk in chunks:
+            accumulator.add(chunk)
+        return accumulator.message()
+
+    return accumulate
+
+
+@benchmark("handle_tool_calls", TOOL_COUNTS)
+def handle_tool_calls(count):
+    """`count` tool calls, each to a different function of the agent."""
+    functions = []
+    for i in range(count):
+
+        def tool(query: str, i=i):
+            return f"{i}: {query}"
+
+        tool.__name__ = f"tool_{i}"
+        functions.append(tool)
+    message = create_mock_response(
+        {"role": "assistant", "content": ""},
+        [{"name": f"tool_{i}", "args": {"query": "q"}} for i in range(count)],
+    ).choices[0].message
+    client = Swarm(client=simple_client())
+    table = ToolTable(functions)
+    return lambda: client.handle_tool_calls(message.tool_calls, table, {}, False)
+
+
+def run_suite(pattern=None, repeat=5) -> dict:
+    warnings.simplefilter("ignore", DeprecationWarning)
+    results = {}
+    for name, (fn, size, number) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(fn(size), number=number, repeat=repeat)
+        print(f"{name:>32} {results[name] * 1e6:>12.2f} us", flush=True)
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "created": time.time(),
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: dict, results: dict, threshold: float = 0.15) -> list:
+    """
+    Returns (name, baseline seconds, seconds, relative change, regressed) for
+    each benchmark in both, regressed when slower by more than `threshold`.
+    """
+    rows = []
+    for name, seconds in results["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        change = seconds / before - 1
+        rows.append((name, before, seconds, change, change > threshold))
+    return rows
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark, the best is kept")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--results", help="compare these results instead of running the suite")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare" and args.results:
+        results = load(args.results)
+    else:
+        results = run_suite(args.pattern, args.repeat)
+    if args.output:
+        save(results, args.output)
+    if args.command == "save":
+        save(results, args.baseline)
+        print(f"baseline saved to {args.baseline}")
+    if args.command != "compare":
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with `save`", file=sys.stderr)
+        return 2
+    baseline = load(args.baseline)
+    if baseline.get("machine") != results.get("machine"):
+        print("warning: the baseline was recorded on a different machine or Python", file=sys.stderr)
+    rows = compare(baseline, results, args.threshold)
+    print(f"\n{'benchmark':>32} {'baseline (us)':>14} {'now (us)':>12} {'change':>8}")
+    for name, before, seconds, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:>32} {before * 1e6:>14.2f} {seconds * 1e6:>12.2f} {change:>+8.1%}{flag}")
+    regressions = [row for row in rows if row[4]]
+    print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
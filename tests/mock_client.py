@@ -1,11 +1,18 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from swarm.types import ChatCompletionMessage, ChatCompletionMessageToolCall, Function
 from openai import OpenAI
 from openai.types.chat.chat_completion import ChatCompletion, Choice
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
 import json
 
 
-def create_mock_response(message, function_calls=[], model="gpt-4o"):
+def create_mock_response(message, function_calls=[], model="gpt-4o", usage=None):
     role = message.get("role", "assistant")
     content = message.get("content", "")
     tool_calls = (
@@ -29,6 +36,7 @@ def create_mock_response(message, function_calls=[], model="gpt-4o"):
         created=1234567890,
         model=model,
         object="chat.completion",
+        usage=usage,
         choices=[
             Choice(
                 message=ChatCompletionMessage(
@@ -41,6 +49,116 @@ def create_mock_response(message, function_calls=[], model="gpt-4o"):
     )
 
 
+def create_mock_stream(
+    message, function_calls=[], model="gpt-4o", chunk_size=4, usage=None
+):
+    """
+    Build the list of ChatCompletionChunks a streaming completion would yield
+    for the given message, splitting content and tool arguments into pieces.
+    """
+
+    def chunk(delta, finish_reason=None):
+        return ChatCompletionChunk(
+            id="mock_cc_id",
+            created=1234567890,
+            model=model,
+            object="chat.completion.chunk",
+            choices=[
+                ChunkChoice(delta=delta, finish_reason=finish_reason, index=0)
+            ],
+        )
+
+    def pieces(text):
+        return [text[i: i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    chunks = [chunk(ChoiceDelta(role=message.get("role", "assistant"), content=""))]
+    for piece in pieces(message.get("content") or ""):
+        chunks.append(chunk(ChoiceDelta(content=piece)))
+    for index, call in enumerate(function_calls):
+        chunks.append(
+            chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            id=f"mock_tc_id_{index}",
+                            type="function",
+                            function=ChoiceDeltaToolCallFunction(
+                                name=call.get("name", ""), arguments=""
+                            ),
+                        )
+                    ]
+                )
+            )
+        )
+        for piece in pieces(json.dumps(call.get("args", {}))):
+            chunks.append(
+                chunk(
+                    ChoiceDelta(
+                        tool_calls=[
+                            ChoiceDeltaToolCall(
+                                index=index,
+                                function=ChoiceDeltaToolCallFunction(
+                                    arguments=piece),
+                            )
+                        ]
+                    )
+                )
+            )
+    chunks.append(
+        chunk(ChoiceDelta(), "tool_calls" if function_calls else "stop"))
+    if usage:
+        chunks.append(
+            ChatCompletionChunk(
+                id="mock_cc_id",
+                created=1234567890,
+                model=model,
+                object="chat.completion.chunk",
+                choices=[],
+                usage=usage,
+            )
+        )
+    return chunks
+
+
+class MockStream:
+    """A completion stream that counts the chunks read and records being closed."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.consumed = 0
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class MockAsyncStream:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.consumed = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.consumed += 1
+        return chunk
+
+    async def close(self):
+        self.closed = True
+
+
 class MockOpenAIClient:
     def __init__(self):
         self.chat = MagicMock()
@@ -64,6 +182,13 @@ class MockOpenAIClient:
         self.chat.completions.create.assert_called_with(**kwargs)
 
 
+class MockAsyncOpenAIClient(MockOpenAIClient):
+    def __init__(self):
+        self.chat = MagicMock()
+        self.chat.completions = MagicMock()
+        self.chat.completions.create = AsyncMock()
+
+
 # Initialize the mock client
 client = MockOpenAIClient()
 
@@ -0,0 +1,346 @@
+import asyncio
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from swarm import AsyncSwarm, Agent
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    create_mock_response,
+    create_mock_stream,
+)
+from swarm.types import Result
+from unittest.mock import Mock
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+@pytest.fixture
+def mock_openai_client():
+    m = MockAsyncOpenAIClient()
+    m.set_response(
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    return m
+
+
+def test_run_with_simple_message(mock_openai_client: MockAsyncOpenAIClient):
+    agent = Agent()
+    client = AsyncSwarm(client=mock_openai_client)
+    messages = [{"role": "user", "content": "Hello, how are you?"}]
+    response = asyncio.run(client.run(agent=agent, messages=messages))
+
+    assert response.messages[-1]["role"] == "assistant"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert messages == [{"role": "user", "content": "Hello, how are you?"}]
+
+
+def test_tool_call_and_handoff(mock_openai_client: MockAsyncOpenAIClient):
+    get_weather_mock = Mock()
+
+    def get_weather(location, context_variables):
+        get_weather_mock(location=location, user=context_variables["user"])
+        return "It's sunny today."
+
+    def transfer_to_agent2():
+        return agent2
+
+    agent1 = Agent(name="Test Agent 1", functions=[get_weather, transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[
+                    {"name": "get_weather", "args": {"location": "SF"}},
+                    {"name": "transfer_to_agent2"},
+                ],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_openai_client)
+    response = asyncio.run(
+        client.run(
+            agent=agent1,
+            messages=[{"role": "user", "content": "Weather, then agent 2"}],
+            context_variables={"user": "John"},
+        )
+    )
+
+    get_weather_mock.assert_called_once_with(location="SF", user="John")
+    assert response.agent == agent2
+    assert [m["role"] for m in response.messages] == [
+        "assistant",
+        "tool",
+        "tool",
+        "assistant",
+    ]
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_run_and_stream(mock_openai_client: MockAsyncOpenAIClient):
+    def get_weather(location):
+        return "It's sunny today."
+
+    agent = Agent(name="Test Agent", functions=[get_weather])
+    mock_openai_client.chat.completions.create.side_effect = [
+        MockAsyncStream(
+            create_mock_stream(
+                {"role": "assistant", "content": ""},
+                [{"name": "get_weather", "args": {"location": "SF"}}],
+            )
+        ),
+        MockAsyncStream(
+            create_mock_stream(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+        ),
+    ]
+
+    async def collect():
+        client = AsyncSwarm(client=mock_openai_client)
+        return [
+            event
+            async for event in client.run_and_stream(
+                agent=agent, messages=[{"role": "user", "content": "Weather?"}]
+            )
+        ]
+
+    events = asyncio.run(collect())
+
+    assert [e["delim"] for e in events if "delim" in e] == [
+        "start", "end", "start", "end"]
+    response = events[-1]["response"]
+    assert response.messages[0]["tool_calls"][0]["function"]["name"] == "get_weather"
+    assert response.messages[1]["content"] == "It's sunny today."
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_parallel_tool_calls_with_executor(mock_openai_client: MockAsyncOpenAIClient):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def lookup_a():
+        barrier.wait()
+        return "a"
+
+    def lookup_b():
+        barrier.wait()
+        return "b"
+
+    agent = Agent(functions=[lookup_a, lookup_b])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "lookup_a"}, {"name": "lookup_b"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        client = AsyncSwarm(client=mock_openai_client, tool_executor=executor)
+        response = asyncio.run(
+            client.run(agent=agent, messages=[{"role": "user", "content": "Go"}])
+        )
+
+    assert [m["content"] for m in response.messages if m["role"] == "tool"] == [
+        "a", "b"]
+
+
+def test_async_tool_functions(mock_openai_client: MockAsyncOpenAIClient):
+    async def fetch_profile(context_variables):
+        await asyncio.sleep(0)
+        return Result(
+            value=f"profile of {context_variables['user']}",
+            agent=agent2,
+        )
+
+    agent1 = Agent(name="Test Agent 1", functions=[fetch_profile])
+    agent2 = Agent(name="Test Agent 2")
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "fetch_profile"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_openai_client)
+    response = asyncio.run(
+        client.run(
+            agent=agent1,
+            messages=[{"role": "user", "content": "Show my profile"}],
+            context_variables={"user": "John"},
+        )
+    )
+
+    assert response.messages[1]["content"] == "profile of John"
+    assert response.agent == agent2
+
+
+def test_run_batch(mock_openai_client: MockAsyncOpenAIClient):
+    def fail():
+        raise RuntimeError("boom")
+
+    failing_agent = Agent(functions=[fail])
+    mock_openai_client.chat.completions.create.side_effect = lambda **kwargs: (
+        create_mock_response(
+            {"role": "assistant", "content": ""}, [{"name": "fail"}])
+        if kwargs["tools"]
+        else create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+
+    async def collect():
+        client = AsyncSwarm(client=mock_openai_client)
+        jobs = [
+            (Agent(), [{"role": "user", "content": str(i)}]) for i in range(5)
+        ] + [(failing_agent, [{"role": "user", "content": "fail"}])]
+        return [r async for r in client.run_batch(jobs, max_concurrency=2, rate_limit=100)]
+
+    results = {r.job_id: r for r in asyncio.run(collect())}
+
+    assert sorted(results) == [0, 1, 2, 3, 4, 5]
+    assert all(
+        results[i].response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+        for i in range(5)
+    )
+    assert isinstance(results[5].error, RuntimeError)
+
+
+def test_eager_tools_start_while_streaming(mock_openai_client: MockAsyncOpenAIClient):
+    async def collect():
+        first_tool_started = asyncio.Event()
+
+        async def lookup_a(query):
+            first_tool_started.set()
+            return f"a: {query}"
+
+        def lookup_b(query):
+            return f"b: {query}"
+
+        tool_chunks = create_mock_stream(
+            {"role": "assistant", "content": ""},
+            [
+                {"name": "lookup_a", "args": {"query": "first"}},
+                {"name": "lookup_b", "args": {"query": "second"}},
+            ],
+        )
+
+        async def eager_stream():
+            for chunk in tool_chunks[:-1]:
+                yield chunk
+            await asyncio.wait_for(first_tool_started.wait(), 5)
+            yield tool_chunks[-1]
+
+        mock_openai_client.chat.completions.create.side_effect = [
+            eager_stream(),
+            MockAsyncStream(
+                create_mock_stream(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+            ),
+        ]
+        client = AsyncSwarm(client=mock_openai_client)
+        return [
+            event
+            async for event in client.run_and_stream(
+                agent=Agent(functions=[lookup_a, lookup_b]),
+                messages=[{"role": "user", "content": "Look both up"}],
+                eager_tools=True,
+            )
+        ]
+
+    response = asyncio.run(collect())[-1]["response"]
+
+    assert [m["content"] for m in response.messages if m["role"] == "tool"] == [
+        "a: first",
+        "b: second",
+    ]
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_abandoned_stream_is_closed_and_tools_cancelled(
+    mock_openai_client: MockAsyncOpenAIClient,
+):
+    cancelled = []
+
+    async def slow_lookup(query):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(query)
+            raise
+
+    stream = MockAsyncStream(
+        create_mock_stream(
+            {"role": "assistant", "content": "Let me look both up."},
+            [
+                {"name": "slow_lookup", "args": {"query": "first"}},
+                {"name": "slow_lookup", "args": {"query": "second"}},
+            ],
+        )
+    )
+    mock_openai_client.chat.completions.create.side_effect = [stream]
+    client = AsyncSwarm(client=mock_openai_client)
+
+    async def consume():
+        events = client.run_and_stream(
+            agent=Agent(functions=[slow_lookup]),
+            messages=[{"role": "user", "content": "Look both up"}],
+            eager_tools=True,
+        )
+        async for event in events:
+            if event.get("tool_calls") and event["tool_calls"][0]["index"] == 1:
+                await asyncio.sleep(0.01)  # let the first call start
+                break
+        await events.aclose()
+
+    asyncio.run(consume())
+
+    assert stream.closed
+    assert cancelled == ["first"]
+    assert client.abandoned_streams == 1
+    assert client.abandoned_tokens > 0
+
+
+def test_cancelled_consumer_closes_stream(mock_openai_client: MockAsyncOpenAIClient):
+    chunks = create_mock_stream({"role": "assistant", "content": "x" * 400})
+
+    class SlowStream(MockAsyncStream):
+        async def __anext__(self):
+            await asyncio.sleep(0.001)
+            return await super().__anext__()
+
+    stream = SlowStream(chunks)
+    mock_openai_client.chat.completions.create.side_effect = [stream]
+    client = AsyncSwarm(client=mock_openai_client)
+
+    async def consume():
+        async for _ in client.run_and_stream(
+            agent=Agent(), messages=[{"role": "user", "content": "Hi"}]
+        ):
+            pass
+
+    async def main():
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert stream.closed
+    assert 0 < stream.consumed < len(chunks)
+    assert client.abandoned_streams == 1
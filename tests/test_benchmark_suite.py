@@ -0,0 +1,36 @@
+from tests.benchmarks.suite import BENCHMARKS, compare, main, save
+
+
+def results(**benchmarks):
+    return {"machine": {}, "benchmarks": benchmarks}
+
+
+def test_compare_flags_regressions_above_threshold():
+    baseline = results(a=1.0, b=1.0, c=1.0)
+    rows = compare(baseline, results(a=1.1, b=1.3, c=0.5, new=1.0), threshold=0.15)
+
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [
+        ("a", False),
+        ("b", True),
+        ("c", False),
+    ]
+
+
+def test_compare_command_exit_status(tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    current = str(tmp_path / "results.json")
+    save(results(**{"run_turn[10]": 1e-5}), baseline)
+
+    save(results(**{"run_turn[10]": 1.1e-5}), current)
+    assert main(["compare", "--baseline", baseline, "--results", current]) == 0
+    save(results(**{"run_turn[10]": 2e-5}), current)
+    assert main(["compare", "--baseline", baseline, "--results", current]) == 1
+
+
+def test_benchmarks_run_at_several_sizes():
+    for name in ("run_turn", "handoff_run", "function_to_json", "merge_chunk", "handle_tool_calls"):
+        sizes = [size for key, (_, size, _) in BENCHMARKS.items() if key.startswith(name + "[")]
+        assert len(sizes) >= 3
+    fn, size, _ = BENCHMARKS["handoff_run[10]"]
+    response = fn(size)()
+    assert response.agent.name == "Agent 5"
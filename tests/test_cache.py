@@ -0,0 +1,113 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from swarm import Agent, Swarm
+from swarm.cache import LRUCache, SQLiteCache, cache_key
+from tests.mock_client import (
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+def test_cache_key_is_canonical():
+    params = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+    reordered = {"messages": [{"content": "hi", "role": "user"}], "model": "gpt-4o"}
+
+    assert cache_key({**params, "stream": True}) == cache_key(reordered)
+    assert cache_key(params) != cache_key({**params, "model": "gpt-4o-mini"})
+
+
+def test_lru_cache_eviction_and_ttl():
+    cache = LRUCache(max_size=2, ttl=0.05)
+    cache.set("a", {"id": "a"})
+    cache.set("b", {"id": "b"})
+    assert cache.get("a") == {"id": "a"}
+    cache.set("c", {"id": "c"})
+
+    # "b" was least recently used
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+
+def test_cache_counters_are_thread_safe():
+    cache = LRUCache()
+    cache.set("hit", {"id": "hit"})
+
+    def lookup(i):
+        for _ in range(1000):
+            cache.get("hit" if i % 2 else "miss")
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lookup, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert cache.stats() == {"hits": 4000, "misses": 4000, "hit_rate": 0.5}
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path)
+    cache.set("a", {"id": "a"})
+    cache.close()
+
+    assert SQLiteCache(path).get("a") == {"id": "a"}
+    assert SQLiteCache(path, ttl=-1).get("a") is None
+
+
+def test_run_is_served_from_cache():
+    mock_openai_client = MockOpenAIClient()
+    mock_openai_client.set_response(
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    cache = LRUCache()
+    client = Swarm(client=mock_openai_client, cache=cache)
+    messages = [{"role": "user", "content": "Hello"}]
+
+    first = client.run(agent=Agent(), messages=messages)
+    second = client.run(agent=Agent(), messages=messages)
+
+    assert mock_openai_client.chat.completions.create.call_count == 1
+    assert second.messages == first.messages
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_stream_is_cached_and_replayed():
+    def get_weather(location):
+        return "sunny"
+
+    agent = Agent(functions=[get_weather])
+    mock_openai_client = MockOpenAIClient()
+    mock_openai_client.chat.completions.create.side_effect = lambda **kwargs: iter(
+        create_mock_stream(
+            {"role": "assistant", "content": ""},
+            [{"name": "get_weather", "args": {"location": "SF"}}],
+        )
+        if len(kwargs["messages"]) == 2
+        else create_mock_stream(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    cache = LRUCache()
+    client = Swarm(client=mock_openai_client, cache=cache)
+    messages = [{"role": "user", "content": "Weather?"}]
+
+    live = list(client.run(agent=agent, messages=messages, stream=True))
+    replayed = list(client.run(agent=agent, messages=messages, stream=True))
+    non_streamed = client.run(agent=agent, messages=messages, execute_tools=False)
+
+    assert mock_openai_client.chat.completions.create.call_count == 2
+    assert replayed[-1]["response"].messages == live[-1]["response"].messages
+    assert replayed[-1]["response"].messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    tool_call = non_streamed.messages[-1]["tool_calls"][0]
+    assert tool_call["function"] == {"arguments": '{"location": "SF"}', "name": "get_weather"}
+    assert cache.stats()["hits"] == 3
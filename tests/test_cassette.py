@@ -0,0 +1,170 @@
+import asyncio
+import json
+import pytest
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.cassette import AsyncCassetteClient, CassetteClient, CassetteMissError
+from swarm.scheduler import RateLimitScheduler
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+MESSAGES = [{"role": "user", "content": "What's the weather in SF?"}]
+
+
+def weather_client():
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                {"role": "assistant", "content": ""},
+                [{"name": "get_weather", "args": {"location": "SF"}}],
+            ),
+            create_mock_response({"role": "assistant", "content": "Sunny in SF."}),
+        ]
+    )
+    return client
+
+
+def weather_agent(instructions="You are a helpful agent."):
+    def get_weather(location):
+        return f"sunny in {location}"
+
+    return Agent(instructions=instructions, functions=[get_weather])
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / "weather.jsonl")
+    live = weather_client()
+    recorded = Swarm(client=CassetteClient(path, client=live, mode="record")).run(
+        agent=weather_agent(), messages=MESSAGES
+    )
+
+    cassette = CassetteClient(path)
+    replayed = Swarm(client=cassette).run(agent=weather_agent(), messages=MESSAGES)
+
+    assert replayed.messages == recorded.messages
+    assert (cassette.replayed, cassette.recorded) == (2, 0)
+    assert live.chat.completions.create.call_count == 2
+
+
+def test_record_and_replay_stream(tmp_path):
+    path = str(tmp_path / "stream.jsonl")
+    live = MockOpenAIClient()
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": "Streaming works fine."},
+        usage={"prompt_tokens": 5, "completion_tokens": 4, "total_tokens": 9},
+    )
+    live.set_response(iter(chunks))
+    recording_client = CassetteClient(path, client=live, mode="record")
+    recorded = list(Swarm(client=recording_client).run(agent=Agent(), messages=MESSAGES, stream=True))
+
+    replay_client = CassetteClient(path)
+    replayed = list(Swarm(client=replay_client).run(agent=Agent(), messages=MESSAGES, stream=True))
+
+    assert [c for c in replayed if "response" not in c] == [
+        c for c in recorded if "response" not in c
+    ]
+    assert replayed[-1]["response"].turns[0].completion_tokens == 4
+    # chunk-invariant fields are stored once per recording
+    (line,) = open(path).read().splitlines()
+    recording = json.loads(line)
+    assert recording["header"]["id"] == chunks[0].id
+    assert all("id" not in chunk for chunk in recording["chunks"])
+
+    # a streamed recording also serves the non-streamed request
+    response = Swarm(client=replay_client).run(agent=Agent(), messages=MESSAGES)
+    assert response.messages[-1]["content"] == "Streaming works fine."
+
+
+def test_strict_and_lenient_matching(tmp_path):
+    path = str(tmp_path / "weather.jsonl")
+    Swarm(client=CassetteClient(path, client=weather_client(), mode="record")).run(
+        agent=weather_agent(), messages=MESSAGES
+    )
+    edited = weather_agent(instructions="You are a terse weather agent.")
+
+    with pytest.raises(CassetteMissError):
+        Swarm(client=CassetteClient(path)).run(agent=edited, messages=MESSAGES)
+
+    response = Swarm(client=CassetteClient(path, match="lenient")).run(
+        agent=edited, messages=MESSAGES
+    )
+    assert response.messages[-1]["content"] == "Sunny in SF."
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    path = str(tmp_path / "repeat.jsonl")
+    live = MockOpenAIClient()
+    live.set_sequential_responses(
+        [
+            create_mock_response({"role": "assistant", "content": "first"}),
+            create_mock_response({"role": "assistant", "content": "second"}),
+        ]
+    )
+    recorder = Swarm(client=CassetteClient(path, client=live, mode="record"))
+    for _ in range(2):
+        recorder.run(agent=Agent(), messages=MESSAGES)
+
+    replayer = Swarm(client=CassetteClient(path))
+    contents = [
+        replayer.run(agent=Agent(), messages=MESSAGES).messages[-1]["content"]
+        for _ in range(3)
+    ]
+    assert contents == ["first", "second", "second"]
+
+
+def test_auto_mode_records_missing(tmp_path):
+    path = str(tmp_path / "auto.jsonl")
+    live = MockOpenAIClient()
+    live.set_response(create_mock_response({"role": "assistant", "content": "hi"}))
+
+    for _ in range(3):
+        cassette = CassetteClient(path, client=live, mode="auto")
+        Swarm(client=cassette).run(agent=Agent(), messages=MESSAGES)
+
+    assert live.chat.completions.create.call_count == 1
+    assert len(open(path).read().splitlines()) == 1
+
+
+def test_async_cassette(tmp_path):
+    path = str(tmp_path / "async.jsonl")
+    live = MockAsyncOpenAIClient()
+    live.set_response(
+        MockAsyncStream(create_mock_stream({"role": "assistant", "content": "async hi"}))
+    )
+
+    async def collect(client):
+        return [chunk async for chunk in AsyncSwarm(client=client).run_and_stream(
+            agent=Agent(), messages=MESSAGES
+        )]
+
+    recorded = asyncio.run(collect(AsyncCassetteClient(path, client=live, mode="record")))
+    replayed = asyncio.run(collect(AsyncCassetteClient(path)))
+    assert replayed[-1]["response"].messages == recorded[-1]["response"].messages
+
+
+def test_cassette_with_scheduler(tmp_path):
+    path = str(tmp_path / "scheduled.jsonl")
+    live = weather_client()
+    recorded = Swarm(
+        client=CassetteClient(path, client=live, mode="record"),
+        scheduler=RateLimitScheduler(requests_per_minute=6000),
+    ).run(agent=weather_agent(), messages=MESSAGES)
+
+    scheduler = RateLimitScheduler(requests_per_minute=6000)
+    replayed = Swarm(client=CassetteClient(path), scheduler=scheduler).run(
+        agent=weather_agent(), messages=MESSAGES
+    )
+    assert replayed.messages == recorded.messages
+    assert live.chat.completions.create.call_count == 2
+
+    async def replay_async():
+        return await AsyncSwarm(
+            client=AsyncCassetteClient(path), scheduler=scheduler
+        ).run(agent=weather_agent(), messages=MESSAGES)
+
+    assert asyncio.run(replay_async()).messages == recorded.messages
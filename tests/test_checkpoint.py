@@ -0,0 +1,180 @@
+import asyncio
+import pytest
+import sqlite3
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.checkpoint import (
+    MemoryCheckpointStore,
+    SQLiteCheckpointStore,
+    get_agent,
+    register_agent,
+)
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+)
+
+FINAL_CONTENT = "Your order has shipped."
+
+
+def tool_call_response():
+    return create_mock_response(
+        {"role": "assistant", "content": ""},
+        [{"name": "lookup_order", "args": {"order_id": "42"}}],
+    )
+
+
+def final_response():
+    return create_mock_response({"role": "assistant", "content": FINAL_CONTENT})
+
+
+@pytest.fixture
+def lookups():
+    calls = []
+
+    def lookup_order(order_id, context_variables):
+        calls.append(order_id)
+        return "shipped"
+
+    register_agent(Agent(name="Orders", functions=[lookup_order]))
+    return calls
+
+
+def test_resume_after_crash_skips_paid_completions(tmp_path, lookups):
+    path = str(tmp_path / "checkpoints.sqlite")
+    crashing = MockOpenAIClient()
+    crashing.set_sequential_responses([tool_call_response(), RuntimeError("worker died")])
+    agent = get_agent("Orders")
+    client = Swarm(client=crashing, checkpoint_store=SQLiteCheckpointStore(path))
+    with pytest.raises(RuntimeError):
+        client.run(
+            agent=agent,
+            messages=[{"role": "user", "content": "Where is order 42?"}],
+            context_variables={"user": "ada"},
+            run_id="run-1",
+        )
+    assert lookups == ["42"]
+
+    # a fresh process: new client, new store on the same file
+    fresh = MockOpenAIClient()
+    fresh.set_response(final_response())
+    client = Swarm(client=fresh, checkpoint_store=SQLiteCheckpointStore(path))
+    response = client.resume("run-1")
+
+    assert fresh.chat.completions.create.call_count == 1
+    assert lookups == ["42"]
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "assistant"]
+    assert response.messages[-1]["content"] == FINAL_CONTENT
+    assert response.agent.name == "Orders"
+    assert response.context_variables == {"user": "ada"}
+    assert response.run_id == "run-1"
+    assert len(response.turns) == 2
+
+    # the finished run is not resumed again
+    assert client.resume("run-1").messages == response.messages
+    assert fresh.chat.completions.create.call_count == 1
+
+
+def test_resume_runs_pending_tool_calls(lookups):
+    store = MemoryCheckpointStore()
+    client = MockOpenAIClient()
+    client.set_sequential_responses([tool_call_response(), final_response()])
+    failing = {"first": True}
+
+    def lookup_order(order_id, context_variables):
+        if failing.pop("first", False):
+            raise ConnectionError("lost the database")
+        lookups.append(order_id)
+        return "shipped"
+
+    agent = register_agent(Agent(name="Orders", functions=[lookup_order]))
+    swarm = Swarm(client=client, checkpoint_store=store)
+    with pytest.raises(ConnectionError):
+        swarm.run(agent=agent, messages=[{"role": "user", "content": "Order 42?"}], run_id="r")
+
+    response = swarm.resume("r")
+    # only the final completion is requested; the tool batch is rerun
+    assert client.chat.completions.create.call_count == 2
+    assert lookups == ["42"]
+    assert response.messages[-1]["content"] == FINAL_CONTENT
+
+
+def test_run_saves_incrementally(tmp_path, lookups):
+    path = str(tmp_path / "checkpoints.sqlite")
+    client = MockOpenAIClient()
+    client.set_sequential_responses([tool_call_response(), final_response()])
+    swarm = Swarm(client=client, checkpoint_store=SQLiteCheckpointStore(path))
+    response = swarm.run(
+        agent=get_agent("Orders"), messages=[{"role": "user", "content": "Order 42?"}]
+    )
+
+    assert response.run_id
+    conn = sqlite3.connect(path)
+    (count,) = conn.execute(
+        "SELECT COUNT(*) FROM messages WHERE run_id = ?", (response.run_id,)
+    ).fetchone()
+    assert count == 4
+    checkpoint = SQLiteCheckpointStore(path).load(response.run_id)
+    assert checkpoint.done
+    assert checkpoint.messages[-1]["content"] == FINAL_CONTENT
+
+
+def test_unregistered_agent_fails_at_checkpoint():
+    client = MockOpenAIClient()
+    client.set_response(final_response())
+    swarm = Swarm(client=client, checkpoint_store=MemoryCheckpointStore())
+    with pytest.raises(KeyError, match="register_agent"):
+        swarm.run(agent=Agent(name="Anonymous"), messages=[], run_id="r")
+    assert client.chat.completions.create.call_count == 0
+
+    with pytest.raises(KeyError):
+        swarm.resume("missing")
+
+
+def test_resume_uses_registration_name():
+    store = MemoryCheckpointStore()
+    crashing = MockOpenAIClient()
+    crashing.set_sequential_responses([RuntimeError("worker died")])
+    # two agents keeping the default name, told apart by their registration
+    support = register_agent(Agent(instructions="Support v2"), name="support-v2")
+    register_agent(Agent(instructions="Sales"), name="sales")
+    with pytest.raises(RuntimeError):
+        Swarm(client=crashing, checkpoint_store=store).run(
+            agent=support, messages=[], run_id="r"
+        )
+    assert store.load("r").agent == "support-v2"
+
+    fresh = MockOpenAIClient()
+    fresh.set_response(final_response())
+    response = Swarm(client=fresh, checkpoint_store=store).resume("r")
+    assert response.agent is support
+    assert response.messages[-1]["content"] == FINAL_CONTENT
+
+
+def test_replaced_registration_fails_at_checkpoint():
+    first = register_agent(Agent(name="Shared"))
+    register_agent(Agent(name="Shared"))
+    client = MockOpenAIClient()
+    client.set_response(final_response())
+    swarm = Swarm(client=client, checkpoint_store=MemoryCheckpointStore())
+    with pytest.raises(KeyError, match="register_agent"):
+        swarm.run(agent=first, messages=[])
+
+
+def test_async_resume(lookups):
+    store = MemoryCheckpointStore()
+    crashing = MockAsyncOpenAIClient()
+    crashing.set_sequential_responses([tool_call_response(), RuntimeError("worker died")])
+    async def main():
+        swarm = AsyncSwarm(client=crashing, checkpoint_store=store)
+        with pytest.raises(RuntimeError):
+            await swarm.run(agent=get_agent("Orders"), messages=[], run_id="r")
+        fresh = MockAsyncOpenAIClient()
+        fresh.set_response(final_response())
+        response = await AsyncSwarm(client=fresh, checkpoint_store=store).resume("r")
+        return fresh, response
+
+    fresh, response = asyncio.run(main())
+    assert fresh.chat.completions.create.call_count == 1
+    assert lookups == ["42"]
+    assert response.messages[-1]["content"] == FINAL_CONTENT
@@ -0,0 +1,190 @@
+import json
+import pytest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from swarm import Agent, Swarm
+from swarm.context import Compactor, ContextWindow
+from tests.mock_client import MockOpenAIClient, create_mock_response
+
+
+def word_tokenizer(text):
+    return len(text.split())
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+def assistant(content, tool_calls=None):
+    return {"role": "assistant", "content": content, "tool_calls": tool_calls}
+
+
+def tool_call(name):
+    return {"id": name, "type": "function", "function": {"name": name, "arguments": "{}"}}
+
+
+def tool(name, content):
+    return {"role": "tool", "tool_call_id": name, "tool_name": name, "content": content}
+
+
+def test_fit_keeps_recent_messages_within_budget():
+    # every message costs 4 tokens of overhead plus one per word
+    window = ContextWindow(max_tokens=4 + 1 + 3 * 6, tokenizer=word_tokenizer)
+    history = [user(f"message {i}") for i in range(10)]
+
+    fitted = window.fit("system", history)
+
+    assert fitted == history[-3:]
+    assert window.fit("system", history[-2:]) == history[-2:]
+
+
+def test_fit_keeps_tool_calls_with_their_results():
+    window = ContextWindow(max_tokens=37, tokenizer=word_tokenizer)
+    history = [
+        user("hello there"),
+        assistant("", [tool_call("a"), tool_call("b")]),
+        tool("a", "result a"),
+        tool("b", "result b"),
+        assistant("all done here"),
+    ]
+
+    fitted = window.fit("system", history)
+
+    # budget is 37 - 5 for the system prompt; the last message takes 7 and
+    # the tool call unit 8 + 6 + 6, which is kept whole or not at all
+    assert fitted == history[1:]
+    small = ContextWindow(max_tokens=25, tokenizer=word_tokenizer)
+    assert small.fit("system", history) == history[-1:]
+
+
+def test_fit_always_keeps_latest_message():
+    window = ContextWindow(max_tokens=5, tokenizer=word_tokenizer)
+    history = [user("short"), user("a very long message " * 10)]
+
+    assert window.fit("system", history) == history[-1:]
+
+
+def test_token_counts_are_cached_per_message():
+    calls = []
+
+    def counting_tokenizer(text):
+        calls.append(text)
+        return word_tokenizer(text)
+
+    window = ContextWindow(max_tokens=1000, tokenizer=counting_tokenizer)
+    history = [user(f"message {i}") for i in range(5)]
+    window.fit("system", history)
+    calls.clear()
+
+    history.append(user("new message"))
+    window.fit("system", history)
+
+    assert calls == ["system", "new message"]
+
+
+def test_token_counts_are_thread_safe():
+    # a small cache evicts on almost every count
+    window = ContextWindow(max_tokens=1000, tokenizer=word_tokenizer, cache_size=8)
+
+    def count(worker):
+        history = [user(f"worker {worker} message {i}") for i in range(2000)]
+        return window.count(history)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            totals = list(executor.map(count, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert totals == [2000 * 8] * 8
+    assert len(window._counts) <= 8
+
+
+def test_agent_context_window_trims_request():
+    mock_openai_client = MockOpenAIClient()
+    mock_openai_client.set_response(
+        create_mock_response({"role": "assistant", "content": "ok"})
+    )
+    agent = Agent(
+        instructions="system",
+        context_window=ContextWindow(max_tokens=20, tokenizer=word_tokenizer),
+    )
+    history = [user(f"message {i}") for i in range(10)]
+
+    Swarm(client=mock_openai_client).run(agent=agent, messages=history)
+
+    sent = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert sent == [{"role": "system", "content": "system"}, *history[-2:]]
+
+
+def test_compactor_summarizes_in_background():
+    summarizer = MockOpenAIClient()
+    summarizer.set_response(
+        create_mock_response({"role": "assistant", "content": "User said hi a lot."})
+    )
+    mock_openai_client = MockOpenAIClient()
+    mock_openai_client.set_response(
+        create_mock_response({"role": "assistant", "content": "ok"})
+    )
+    compactor = Compactor(
+        client=summarizer, max_tokens=60, keep_last=2, tokenizer=word_tokenizer
+    )
+    client = Swarm(client=mock_openai_client, compactor=compactor)
+    agent = Agent(instructions="system")
+    messages = [user(f"hi number {i}") for i in range(8)]
+
+    # 8 messages of 7 tokens plus the reply of 5 are over budget
+    first = client.run(agent=agent, messages=messages)
+    compactor.wait()
+    messages.extend(first.messages)
+    messages.append(user("and now?"))
+    second = client.run(agent=agent, messages=messages)
+
+    # summarized everything but the last two messages of the first run
+    assert (first.summary, first.summary_boundary) == (None, 0)
+    assert (second.summary, second.summary_boundary) == ("User said hi a lot.", 7)
+    transcript = summarizer.chat.completions.create.call_args.kwargs["messages"][1]
+    assert "hi number 6" in transcript["content"]
+    assert "hi number 7" not in transcript["content"]
+    sent = mock_openai_client.chat.completions.create.call_args.kwargs["messages"]
+    assert sent[1]["content"].endswith("User said hi a lot.")
+    assert sent[2:] == messages[7:]
+    assert second.messages[-1]["content"] == "ok"
+
+
+def test_compactor_recognises_deserialized_history():
+    summarizer = MockOpenAIClient()
+    summarizer.set_response(
+        create_mock_response({"role": "assistant", "content": "User said hi a lot."})
+    )
+    mock_openai_client = MockOpenAIClient()
+    mock_openai_client.set_response(
+        create_mock_response({"role": "assistant", "content": "ok"})
+    )
+    compactor = Compactor(
+        client=summarizer, max_tokens=60, keep_last=2, tokenizer=word_tokenizer
+    )
+    client = Swarm(client=mock_openai_client, compactor=compactor)
+    agent = Agent(instructions="system")
+    messages = [user(f"hi number {i}") for i in range(8)]
+
+    # a stateless caller sends fresh copies of the whole history on every run
+    responses = []
+    for turn in range(3):
+        response = client.run(agent=agent, messages=json.loads(json.dumps(messages)))
+        compactor.wait()
+        responses.append(response)
+        messages.extend(response.messages)
+        messages.append(user(f"turn {turn}"))
+
+    assert summarizer.chat.completions.create.call_count == 1
+    assert [r.summary_boundary for r in responses] == [0, 7, 7]
+    assert responses[-1].summary == "User said hi a lot."
+
+
+def test_compactor_keeps_at_least_one_message():
+    with pytest.raises(ValueError, match="keep_last"):
+        Compactor(client=MockOpenAIClient(), keep_last=0)
@@ -1,6 +1,16 @@
+import asyncio
 import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from swarm import Swarm, Agent
-from tests.mock_client import MockOpenAIClient, create_mock_response
+from swarm.types import BatchJob, Result, ToolResult
+from swarm.tracing import InMemoryExporter, Tracer
+from tests.mock_client import (
+    MockOpenAIClient,
+    MockStream,
+    create_mock_response,
+    create_mock_stream,
+)
 from unittest.mock import Mock
 import json
 
@@ -28,6 +38,38 @@ def test_run_with_simple_message(mock_openai_client: MockOpenAIClient):
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
 
 
+def test_run_does_not_mutate_inputs(mock_openai_client: MockOpenAIClient):
+    def remember(context_variables):
+        context_variables["seen"] = True
+        return "ok"
+
+    agent = Agent(functions=[remember])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "remember"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    messages = [{"role": "user", "content": f"message {i}"} for i in range(100)]
+    messages_before = json.loads(json.dumps(messages))
+    context_variables = {"user": {"name": "John"}}
+
+    client = Swarm(client=mock_openai_client)
+    response = client.run(
+        agent=agent, messages=messages, context_variables=context_variables
+    )
+
+    assert messages == messages_before
+    assert context_variables == {"user": {"name": "John"}}
+    assert len(response.messages) == 3
+    assert response.context_variables["seen"] is True
+
+
 def test_tool_call(mock_openai_client: MockOpenAIClient):
     expected_location = "San Francisco"
 
@@ -67,6 +109,52 @@ def test_tool_call(mock_openai_client: MockOpenAIClient):
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
 
 
+def test_run_and_stream(mock_openai_client: MockOpenAIClient):
+    def transfer_to_agent2():
+        return agent2
+
+    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+    mock_openai_client.set_sequential_responses(
+        [
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "transfer_to_agent2"}],
+                )
+            ),
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+                )
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    events = list(
+        client.run(
+            agent=agent1,
+            messages=[{"role": "user", "content": "I want to talk to agent 2"}],
+            stream=True,
+        )
+    )
+
+    assert [e["sender"] for e in events if "sender" in e] == [
+        "Test Agent 1",
+        "Test Agent 2",
+    ]
+    content = "".join(e["content"] for e in events if e.get("content"))
+    assert content == DEFAULT_RESPONSE_CONTENT
+    response = events[-1]["response"]
+    assert response.agent == agent2
+    assert [m["sender"] for m in response.messages if m["role"] == "assistant"] == [
+        "Test Agent 1",
+        "Test Agent 2",
+    ]
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
 def test_execute_tools_false(mock_openai_client: MockOpenAIClient):
     expected_location = "San Francisco"
 
@@ -143,3 +231,361 @@ def test_handoff(mock_openai_client: MockOpenAIClient):
     assert response.agent == agent2
     assert response.messages[-1]["role"] == "assistant"
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_parallel_tool_calls_with_executor(mock_openai_client: MockOpenAIClient):
+    # every tool waits on the barrier, so this only completes if they run concurrently
+    barrier = threading.Barrier(3, timeout=5)
+
+    def lookup_a():
+        barrier.wait()
+        return Result(value="a", context_variables={"source": "a", "a": 1})
+
+    def lookup_b():
+        barrier.wait()
+        return Result(value="b", agent=agent2, context_variables={"source": "b"})
+
+    def lookup_c():
+        barrier.wait()
+        return Result(value="c", agent=agent3)
+
+    agent1 = Agent(name="Test Agent 1", functions=[lookup_a, lookup_b, lookup_c])
+    agent2 = Agent(name="Test Agent 2")
+    agent3 = Agent(name="Test Agent 3")
+
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[
+                    {"name": "lookup_a"},
+                    {"name": "lookup_b"},
+                    {"name": "lookup_c"},
+                ],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        client = Swarm(client=mock_openai_client, tool_executor=executor)
+        response = client.run(
+            agent=agent1, messages=[{"role": "user", "content": "Look it all up"}]
+        )
+
+    tool_messages = [m for m in response.messages if m["role"] == "tool"]
+    assert [m["tool_name"] for m in tool_messages] == [
+        "lookup_a", "lookup_b", "lookup_c"]
+    assert [m["content"] for m in tool_messages] == ["a", "b", "c"]
+    assert response.context_variables == {"source": "b", "a": 1}
+    assert response.agent == agent3
+
+
+def test_async_tool_functions(mock_openai_client: MockOpenAIClient):
+    # each tool waits for the other one to start, so they must run concurrently
+    started = {}
+
+    async def wait_for(name, other):
+        started.setdefault(name, asyncio.Event()).set()
+        await asyncio.wait_for(started.setdefault(other, asyncio.Event()).wait(), 5)
+
+    async def fetch_profile(context_variables):
+        await wait_for("profile", "orders")
+        return Result(
+            value=f"profile of {context_variables['user']}",
+            context_variables={"profile": "loaded"},
+        )
+
+    async def fetch_orders():
+        await wait_for("orders", "profile")
+        return "2 orders"
+
+    agent = Agent(functions=[fetch_profile, fetch_orders])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "fetch_profile"}, {"name": "fetch_orders"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    response = client.run(
+        agent=agent,
+        messages=[{"role": "user", "content": "Show my account"}],
+        context_variables={"user": "John"},
+    )
+
+    assert [m["content"] for m in response.messages if m["role"] == "tool"] == [
+        "profile of John",
+        "2 orders",
+    ]
+    assert response.context_variables == {"user": "John", "profile": "loaded"}
+
+
+def test_run_batch(mock_openai_client: MockOpenAIClient):
+    # jobs block on the barrier from their instructions, so they must run concurrently
+    barrier = threading.Barrier(3, timeout=5)
+
+    def instructions(context_variables):
+        barrier.wait()
+        if context_variables["fail"]:
+            raise RuntimeError("boom")
+        return "You are a helpful agent."
+
+    agent = Agent(instructions=instructions)
+    jobs = [
+        (agent, [{"role": "user", "content": "first"}], {"fail": False}),
+        {"agent": agent, "messages": [{"role": "user", "content": "second"}],
+         "context_variables": {"fail": True}},
+        BatchJob(id="third", agent=agent, messages=[{"role": "user", "content": "third"}],
+                 context_variables={"fail": False}),
+    ]
+
+    client = Swarm(client=mock_openai_client)
+    results = {r.job_id: r for r in client.run_batch(jobs, max_concurrency=3)}
+
+    assert set(results) == {0, 1, "third"}
+    assert results[0].response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert results["third"].response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert results[1].response is None
+    assert isinstance(results[1].error, RuntimeError)
+
+
+def test_eager_tools_start_while_streaming(mock_openai_client: MockOpenAIClient):
+    first_tool_started = threading.Event()
+
+    def lookup_a(query):
+        first_tool_started.set()
+        return f"a: {query}"
+
+    def lookup_b(query):
+        return Result(value=f"b: {query}", context_variables={"looked_up": True})
+
+    agent = Agent(functions=[lookup_a, lookup_b])
+    tool_chunks = create_mock_stream(
+        {"role": "assistant", "content": ""},
+        [
+            {"name": "lookup_a", "args": {"query": "first"}},
+            {"name": "lookup_b", "args": {"query": "second"}},
+        ],
+    )
+
+    def eager_stream():
+        for chunk in tool_chunks[:-1]:
+            yield chunk
+        # the stream only finishes once the first tool is already running
+        assert first_tool_started.wait(5)
+        yield tool_chunks[-1]
+
+    def run(stream, eager_tools):
+        mock_openai_client.set_sequential_responses(
+            [
+                stream,
+                iter(
+                    create_mock_stream(
+                        {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+                    )
+                ),
+            ]
+        )
+        client = Swarm(client=mock_openai_client)
+        events = list(
+            client.run_and_stream(
+                agent=agent,
+                messages=[{"role": "user", "content": "Look both up"}],
+                eager_tools=eager_tools,
+            )
+        )
+        return events[-1]["response"]
+
+    eager = run(eager_stream(), eager_tools=True)
+    sequential = run(iter(tool_chunks), eager_tools=False)
+
+    assert eager.messages == sequential.messages
+    assert eager.context_variables == sequential.context_variables == {
+        "looked_up": True}
+    assert [m["content"] for m in eager.messages if m["role"] == "tool"] == [
+        "a: first",
+        "b: second",
+    ]
+
+
+def test_abandoned_stream_is_closed(mock_openai_client: MockOpenAIClient):
+    stream = MockStream(
+        create_mock_stream(
+            {"role": "assistant", "content": "A long answer nobody reads. " * 20},
+            chunk_size=8,
+        )
+    )
+    mock_openai_client.set_response(stream)
+    exporter = InMemoryExporter()
+    client = Swarm(client=mock_openai_client, tracer=Tracer(exporter))
+    events = client.run_and_stream(
+        agent=Agent(), messages=[{"role": "user", "content": "Tell me everything"}]
+    )
+    for _, event in zip(range(6), events):
+        pass
+    events.close()
+
+    assert stream.closed
+    assert stream.consumed == 5
+    # "start", then five deltas of 8 characters: 2 tokens each
+    assert client.abandoned_streams == 1
+    assert client.abandoned_tokens == 8
+    (run_span,) = exporter.find("run")
+    assert run_span.attributes["cancelled"] is True
+    assert run_span.attributes["abandoned_tokens"] == 8
+    assert "error" not in run_span.attributes
+
+
+def test_abandoned_stream_cancels_eager_tools(mock_openai_client: MockOpenAIClient):
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def slow_lookup(query):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    stream = MockStream(
+        create_mock_stream(
+            {"role": "assistant", "content": ""},
+            [
+                {"name": "slow_lookup", "args": {"query": "first"}},
+                {"name": "slow_lookup", "args": {"query": "second"}},
+            ],
+        )
+    )
+    mock_openai_client.set_response(stream)
+    client = Swarm(client=mock_openai_client)
+    events = client.run_and_stream(
+        agent=Agent(functions=[slow_lookup]),
+        messages=[{"role": "user", "content": "Look both up"}],
+        eager_tools=True,
+    )
+    for event in events:
+        # the first call is running once the second one starts streaming
+        if event.get("tool_calls") and event["tool_calls"][0]["index"] == 1:
+            assert started.wait(5)
+            break
+    events.close()
+
+    assert stream.closed
+    assert cancelled.wait(5)
+    assert client.abandoned_streams == 1
+
+
+def test_finished_stream_is_not_abandoned(mock_openai_client: MockOpenAIClient):
+    stream = MockStream(create_mock_stream({"role": "assistant", "content": "Done."}))
+    mock_openai_client.set_response(stream)
+    client = Swarm(client=mock_openai_client)
+    events = list(
+        client.run_and_stream(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+    )
+
+    assert events[-1]["response"].messages[-1]["content"] == "Done."
+    assert not stream.closed
+    assert client.abandoned_streams == 0
+
+
+def test_turn_metrics(mock_openai_client: MockOpenAIClient):
+    def get_weather(location):
+        return "It's sunny today."
+
+    agent = Agent(name="Weather Agent", functions=[get_weather])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "get_weather", "args": {"location": "SF"}}],
+                usage={
+                    "prompt_tokens": 50,
+                    "completion_tokens": 10,
+                    "total_tokens": 60,
+                    "prompt_tokens_details": {"cached_tokens": 32},
+                },
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT},
+                usage={"prompt_tokens": 70, "completion_tokens": 5, "total_tokens": 75},
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    response = client.run(
+        agent=agent,
+        messages=[{"role": "user", "content": "Weather?"}],
+        model_override="gpt-4o-mini",
+    )
+
+    first, second = response.turns
+    assert (first.agent, first.model) == ("Weather Agent", "gpt-4o-mini")
+    assert (first.prompt_tokens, first.completion_tokens, first.cached_tokens) == (
+        50, 10, 32)
+    assert (second.prompt_tokens, second.completion_tokens, second.cached_tokens) == (
+        70, 5, 0)
+    assert [t.name for t in first.tools] == ["get_weather"]
+    assert first.tools[0].duration >= 0
+    assert second.tools == []
+    assert first.time_to_first_token is None
+
+
+def test_stream_turn_metrics(mock_openai_client: MockOpenAIClient):
+    mock_openai_client.set_response(
+        iter(
+            create_mock_stream(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT},
+                usage={"prompt_tokens": 12, "completion_tokens": 4, "total_tokens": 16},
+            )
+        )
+    )
+
+    client = Swarm(client=mock_openai_client, stream_usage=True)
+    events = list(
+        client.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}], stream=True)
+    )
+
+    (turn,) = events[-1]["response"].turns
+    assert (turn.prompt_tokens, turn.completion_tokens) == (12, 4)
+    assert 0 <= turn.time_to_first_token <= turn.llm_time
+    assert mock_openai_client.chat.completions.create.call_args.kwargs[
+        "stream_options"] == {"include_usage": True}
+
+
+def test_stream_usage_is_opt_in(mock_openai_client: MockOpenAIClient):
+    mock_openai_client.set_response(
+        iter(create_mock_stream({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}))
+    )
+
+    client = Swarm(client=mock_openai_client)
+    events = list(
+        client.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}], stream=True)
+    )
+
+    (turn,) = events[-1]["response"].turns
+    assert (turn.prompt_tokens, turn.completion_tokens, turn.cached_tokens) == (None, None, None)
+    assert "stream_options" not in mock_openai_client.chat.completions.create.call_args.kwargs
+
+
+def test_tool_results_skip_validation(mock_openai_client: MockOpenAIClient):
+    client = Swarm(client=mock_openai_client)
+    agent = Agent(name="Other")
+
+    assert client.handle_function_result("ok", False) == ToolResult("ok")
+    handoff = client.handle_function_result(agent, False)
+    assert isinstance(handoff, ToolResult)
+    assert json.loads(handoff.value) == {"assistant": "Other"}
+    assert handoff.agent is agent
+    # Results built by tools are validated where they are constructed and passed through
+    result = Result(value="done", context_variables={"a": 1})
+    assert client.handle_function_result(result, False) is result
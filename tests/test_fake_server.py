@@ -0,0 +1,135 @@
+import asyncio
+import openai
+import pytest
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.fake_server import FakeOpenAIServer, FakeReply
+from swarm.scheduler import RateLimitScheduler
+
+MESSAGES = [{"role": "user", "content": "What's the weather in SF?"}]
+
+
+def weather_agent():
+    def get_weather(location):
+        return f"sunny in {location}"
+
+    return Agent(instructions="You are a helpful agent.", functions=[get_weather])
+
+
+def weather_replies():
+    return (
+        FakeReply(tool_calls=[{"name": "get_weather", "arguments": {"location": "SF"}}]),
+        FakeReply(content="It's sunny in SF."),
+    )
+
+
+def test_run_with_tool_call_over_http():
+    with FakeOpenAIServer() as server:
+        server.enqueue(*weather_replies())
+        response = Swarm(client=server.client()).run(agent=weather_agent(), messages=MESSAGES)
+
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "assistant"]
+    assert response.messages[1]["content"] == "sunny in SF"
+    assert response.messages[-1]["content"] == "It's sunny in SF."
+    assert response.turns[0].prompt_tokens > 0
+    # the second request carries the tool call and its result
+    assert server.requests[1]["messages"][-1]["role"] == "tool"
+    assert server.status_counts[200] == 2
+
+
+def test_streamed_tool_call_over_http():
+    with FakeOpenAIServer(chunk_size=3) as server:
+        server.enqueue(*weather_replies())
+        chunks = list(
+            Swarm(client=server.client(), stream_usage=True).run(
+                agent=weather_agent(), messages=MESSAGES, stream=True
+            )
+        )
+
+    response = chunks[-1]["response"]
+    assert response.messages[-1]["content"] == "It's sunny in SF."
+    assert "".join(c.get("content") or "" for c in chunks[:-1]) == "It's sunny in SF."
+    assert response.turns[-1].completion_tokens > 0
+    assert response.turns[-1].time_to_first_token > 0
+    assert server.requests[0]["stream"] is True
+
+
+def test_async_stream_over_http():
+    async def main():
+        with FakeOpenAIServer() as server:
+            swarm = AsyncSwarm(client=server.async_client())
+            return [
+                chunk
+                async for chunk in swarm.run_and_stream(
+                    agent=weather_agent(), messages=MESSAGES
+                )
+            ]
+
+    chunks = asyncio.run(main())
+    assert chunks[-1]["response"].messages[-1]["content"] == "Echo: What's the weather in SF?"
+
+
+def test_injected_errors():
+    with FakeOpenAIServer() as server:
+        server.enqueue(FakeReply(status=500), FakeReply(status=429, retry_after=0.01))
+        client = server.client(max_retries=0)
+        with pytest.raises(openai.InternalServerError):
+            Swarm(client=client).run(agent=Agent(), messages=MESSAGES)
+        with pytest.raises(openai.RateLimitError):
+            Swarm(client=client).run(agent=Agent(), messages=MESSAGES)
+
+
+def test_scheduler_retries_injected_429():
+    with FakeOpenAIServer() as server:
+        server.enqueue(FakeReply(status=429, retry_after=0.01), FakeReply(content="ok"))
+        scheduler = RateLimitScheduler(requests_per_minute=6000)
+        # the client keeps the SDK's default retries; the scheduler turns them off
+        swarm = Swarm(client=server.client(), scheduler=scheduler)
+        response = swarm.run(agent=Agent(), messages=MESSAGES)
+
+    assert response.messages[-1]["content"] == "ok"
+    assert scheduler.rate_limited == 1
+    assert server.status_counts == {429: 1, 200: 1}
+
+
+def test_scheduler_retries_injected_server_error():
+    with FakeOpenAIServer() as server:
+        server.enqueue(
+            FakeReply(status=500, retry_after=0.01),
+            FakeReply(content="ok"),
+            FakeReply(status=400),
+        )
+        scheduler = RateLimitScheduler(requests_per_minute=6000)
+        swarm = Swarm(client=server.client(), scheduler=scheduler)
+        response = swarm.run(agent=Agent(), messages=MESSAGES)
+        # client errors are not retried
+        with pytest.raises(openai.BadRequestError):
+            swarm.run(agent=Agent(), messages=MESSAGES)
+
+    assert response.messages[-1]["content"] == "ok"
+    assert scheduler.rate_limited == 0
+    assert server.status_counts == {500: 1, 200: 1, 400: 1}
+
+
+def test_requests_per_minute_limit():
+    with FakeOpenAIServer(requests_per_minute=60) as server:
+        client = server.client(max_retries=0)
+        client.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+        with pytest.raises(openai.RateLimitError) as excinfo:
+            client.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+
+    assert float(excinfo.value.response.headers["retry-after-ms"]) > 0
+
+
+def test_airline_load_smoke():
+    from tests.benchmarks.bench_load import CONVERSATION, airline_responder, run_load
+
+    with FakeOpenAIServer(responder=airline_responder, record_requests=False) as server:
+        results = run_load(
+            Swarm(client=server.client()), users=2, sessions=1, stream=True, trace_memory=False
+        )
+
+    assert results["errors"] == 0, results["error_samples"]
+    assert results["user_turns"] == 2 * len(CONVERSATION)
+    # triage and flight modification hand off, then refund, then case resolved
+    assert results["completions"] == 2 * 7
+    assert results["turn_latency"]["p99"] >= results["turn_latency"]["p50"] > 0
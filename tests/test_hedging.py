@@ -0,0 +1,161 @@
+import asyncio
+import random
+import time
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.hedging import HedgingPolicy, LatencyHistogram
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def test_latency_histogram_percentile():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) is None
+    for _ in range(90):
+        histogram.record(0.1)
+    for _ in range(10):
+        histogram.record(2.0)
+
+    assert 0.1 <= histogram.percentile(0.5) < 0.11
+    assert 0.1 <= histogram.percentile(0.9) < 0.11
+    assert 2.0 <= histogram.percentile(0.95) < 2.2
+
+
+def test_delay_follows_percentile():
+    policy = HedgingPolicy(percentile=0.9, initial_delay=1.5, min_samples=10, min_delay=0.2)
+    assert policy.delay("gpt-4o") == 1.5
+    for _ in range(10):
+        policy.histogram("gpt-4o").record(0.5)
+    assert 0.5 <= policy.delay("gpt-4o") < 0.55
+    for _ in range(100):
+        policy.histogram("gpt-4o").record(0.01)
+    assert policy.delay("gpt-4o") == 0.2
+
+
+def slow_primary_client(cls=MockOpenAIClient, stream=False):
+    """Answers "gpt-4o" after 0.5s and "gpt-4o-mini" immediately."""
+    client = cls()
+    closed = []
+
+    def respond(model):
+        if stream:
+            chunks = create_mock_stream({"role": "assistant", "content": model})
+
+            class Stream:
+                def __iter__(self):
+                    return iter(chunks)
+
+                def close(self):
+                    closed.append(model)
+
+            return Stream()
+        return create_mock_response({"role": "assistant", "content": model})
+
+    if cls is MockAsyncOpenAIClient:
+
+        async def create(**params):
+            if params["model"] == "gpt-4o":
+                await asyncio.sleep(0.5)
+            return respond(params["model"])
+
+    else:
+
+        def create(**params):
+            if params["model"] == "gpt-4o":
+                time.sleep(0.5)
+            return respond(params["model"])
+
+    client.chat.completions.create.side_effect = create
+    return client, closed
+
+
+def test_hedge_to_fallback_model():
+    client, _ = slow_primary_client()
+    policy = HedgingPolicy(initial_delay=0.05, fallback_models={"gpt-4o": "gpt-4o-mini"})
+    swarm = Swarm(client=client, hedging=policy)
+
+    start = time.monotonic()
+    response = swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+
+    assert time.monotonic() - start < 0.4
+    assert response.messages[-1]["content"] == "gpt-4o-mini"
+    stats = policy.stats()
+    assert (stats["requests"], stats["hedges"], stats["hedge_wins"]) == (1, 1, 1)
+    assert stats["hedge_rate"] == 1.0
+
+
+def test_no_hedge_for_fast_completions():
+    client, _ = slow_primary_client()
+    policy = HedgingPolicy(initial_delay=0.05)
+    swarm = Swarm(client=client, hedging=policy)
+
+    response = swarm.run(
+        agent=Agent(model="gpt-4o-mini"), messages=[{"role": "user", "content": "Hi"}]
+    )
+
+    assert response.messages[-1]["content"] == "gpt-4o-mini"
+    assert policy.stats()["hedges"] == 0
+    assert policy.histogram("gpt-4o-mini").count == 1
+
+
+def test_hedged_stream_closes_loser():
+    client, closed = slow_primary_client(stream=True)
+    policy = HedgingPolicy(initial_delay=0.05, fallback_models={"gpt-4o": "gpt-4o-mini"})
+    swarm = Swarm(client=client, hedging=policy)
+
+    chunks = list(
+        swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}], stream=True)
+    )
+
+    assert chunks[-1]["response"].messages[-1]["content"] == "gpt-4o-mini"
+    # the primary's stream is closed as soon as it arrives
+    deadline = time.monotonic() + 2
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert closed == ["gpt-4o"]
+
+
+def test_async_hedge_cancels_loser():
+    client, _ = slow_primary_client(MockAsyncOpenAIClient)
+    policy = HedgingPolicy(initial_delay=0.05, fallback_models={"gpt-4o": "gpt-4o-mini"})
+    swarm = AsyncSwarm(client=client, hedging=policy)
+
+    async def main():
+        start = time.monotonic()
+        response = await swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+        elapsed = time.monotonic() - start
+        # nothing is left running once the hedge won
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return response, elapsed, pending
+
+    response, elapsed, pending = asyncio.run(main())
+    assert response.messages[-1]["content"] == "gpt-4o-mini"
+    assert elapsed < 0.4
+    assert pending == []
+    assert policy.stats()["hedge_wins"] == 1
+    # the cancelled primary recorded how long it had taken so far
+    assert policy.histogram("gpt-4o").count == 1
+    assert 0.05 <= policy.histogram("gpt-4o").percentile(1.0) < 0.4
+
+
+def test_async_delay_follows_slow_tail():
+    # 30% of requests are slow and most of those get hedged and cancelled: the
+    # delay must still climb towards the slow tail instead of the fast requests
+    rng = random.Random(0)
+    policy = HedgingPolicy(percentile=0.9, initial_delay=0.02, min_samples=10, min_delay=0.001)
+
+    async def send(params):
+        await asyncio.sleep(0.1 if rng.random() < 0.3 else 0.005)
+        return params["model"]
+
+    async def main():
+        for _ in range(20):
+            await asyncio.gather(
+                *(policy.create_async(send, {"model": "gpt-4o"}) for _ in range(10))
+            )
+
+    asyncio.run(main())
+    assert policy.delay("gpt-4o") >= 0.05
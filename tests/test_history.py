@@ -0,0 +1,31 @@
+import pytest
+from swarm.history import History
+
+
+def test_history_shares_base_and_appends_separately():
+    messages = [{"role": "user", "content": "hi"}]
+    history = History(messages)
+    history.append({"role": "assistant", "content": "hello"})
+    history.extend([{"role": "user", "content": "bye"}])
+
+    assert messages == [{"role": "user", "content": "hi"}]
+    assert len(history) == 3
+    assert history[0] is messages[0]
+    assert history[-1] == {"role": "user", "content": "bye"}
+    assert history[1:] == [
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "bye"},
+    ]
+    assert [m["content"] for m in history] == ["hi", "hello", "bye"]
+    assert history.new_messages == history[1:]
+    with pytest.raises(IndexError):
+        history[3]
+
+
+def test_history_ignores_later_appends_to_base():
+    messages = [{"role": "user", "content": "hi"}]
+    history = History(messages)
+    messages.append({"role": "user", "content": "late"})
+
+    assert len(history) == 1
+    assert list(history) == [{"role": "user", "content": "hi"}]
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+# seconds `import swarm` may take; it should only ever load the package itself
+IMPORT_BUDGET = 0.05
+
+
+def run_python(code: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(output)
+
+
+def test_import_swarm_within_budget():
+    code = """
+import json, sys, time
+start = time.perf_counter()
+import swarm
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+    # best of three, to keep a busy machine from failing the budget
+    results = [run_python(code) for _ in range(3)]
+    elapsed = min(result["elapsed"] for result in results)
+    assert elapsed < IMPORT_BUDGET, f"import swarm took {elapsed:.3f}s"
+    modules = results[0]["modules"]
+    assert "openai" not in modules
+    assert "pydantic" not in modules
+    assert "swarm.core" not in modules
+
+
+def test_agent_does_not_import_openai():
+    result = run_python(
+        """
+import json, sys
+from swarm import Agent
+Agent(name="Tools only", functions=[lambda: "ok"]).get_tool_table()
+print(json.dumps({"openai": "openai" in sys.modules}))
+"""
+    )
+    assert result == {"openai": False}
+
+
+def test_swarm_builds_default_client_lazily():
+    result = run_python(
+        """
+import json
+from swarm import Swarm
+client = Swarm()
+print(json.dumps({"built": client._client is not None}))
+"""
+    )
+    # no OPENAI_API_KEY is set, so building the client eagerly would have raised
+    assert result == {"built": False}
@@ -0,0 +1,193 @@
+import asyncio
+import httpx
+import threading
+import time
+from openai import RateLimitError
+from swarm import Swarm, Agent
+from swarm.scheduler import (
+    RateLimitScheduler,
+    TokenBucket,
+    estimate_request_tokens,
+    parse_reset,
+)
+from tests.mock_client import create_mock_response
+from unittest.mock import AsyncMock, Mock
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # the bucket is empty, so the next tokens are 0.1s apart
+    assert 0.09 < bucket.reserve() <= 0.1
+    assert 0.19 < bucket.reserve() <= 0.2
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.wait_time(2) == 0
+    bucket.reserve(2)
+    assert 0.09 < bucket.wait_time(1) <= 0.1
+    # larger than the bucket: waits for a full bucket only
+    assert 0.19 < bucket.wait_time(5) <= 0.2
+
+
+def test_estimate_request_tokens():
+    params = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "x" * 40},
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"function": {"name": "f", "arguments": "y" * 8}}],
+            },
+        ],
+    }
+    assert estimate_request_tokens(params, completion_tokens=100) == 4 + 10 + 4 + 2 + 100
+    assert estimate_request_tokens({**params, "max_tokens": 5}) == 4 + 10 + 4 + 2 + 5
+
+
+def test_parse_reset():
+    assert parse_reset("1s") == 1
+    assert parse_reset("6m0s") == 360
+    assert parse_reset("20ms") == 0.02
+    assert parse_reset("1m30.5s") == 90.5
+
+
+def test_priority_order():
+    # 10 requests per second, one at a time
+    scheduler = RateLimitScheduler(requests_per_minute=600, burst=0.1)
+    scheduler.acquire("gpt-4o", 1)
+    order = []
+
+    def request(name, priority):
+        with scheduler.priority(priority):
+            scheduler.acquire("gpt-4o", 1)
+        order.append(name)
+
+    low = threading.Thread(target=request, args=("low", 5))
+    low.start()
+    while not scheduler.budget("gpt-4o").queue:
+        time.sleep(0.001)
+    high = threading.Thread(target=request, args=("high", 0))
+    high.start()
+    low.join()
+    high.join()
+
+    assert order == ["high", "low"]
+
+
+def test_models_have_separate_budgets():
+    scheduler = RateLimitScheduler(
+        requests_per_minute=60, burst=1, limits={"gpt-4o-mini": (6000, None)}
+    )
+    scheduler.acquire("gpt-4o", 1)
+    start = time.monotonic()
+    scheduler.acquire("gpt-4o-mini", 1)
+    assert time.monotonic() - start < 0.1
+    assert scheduler.budget("gpt-4o").wait_time(1) > 0.5
+
+
+def rate_limit_error(headers):
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "http://localhost/v1")
+    )
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def raw_response(completion, headers):
+    raw = Mock()
+    raw.parse.return_value = completion
+    raw.headers = headers
+    return raw
+
+
+def test_retries_after_429_and_reads_headers():
+    completion = create_mock_response(
+        {"role": "assistant", "content": "hi"},
+        usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    )
+    client = Mock()
+    client.chat.completions.with_raw_response.create.side_effect = [
+        rate_limit_error({"retry-after-ms": "50"}),
+        raw_response(
+            completion,
+            {
+                "x-ratelimit-limit-requests": "1200",
+                "x-ratelimit-remaining-requests": "1199",
+                "x-ratelimit-limit-tokens": "60000",
+                "x-ratelimit-remaining-tokens": "59000",
+            },
+        ),
+    ]
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=30000)
+    swarm = Swarm(client=client, scheduler=scheduler)
+
+    start = time.monotonic()
+    response = swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+
+    assert response.messages[-1]["content"] == "hi"
+    assert time.monotonic() - start >= 0.05
+    assert scheduler.rate_limited == 1
+    budget = scheduler.budget("gpt-4o")
+    # limits follow the headers; the halved rates recover gradually
+    assert (budget.request_rate, budget.token_rate) == (20, 1000)
+    assert 5 < budget.requests.rate < 20
+    assert budget.tokens.capacity == 10000
+
+
+def test_gives_up_after_max_retries():
+    client = Mock()
+    client.chat.completions.with_raw_response.create.side_effect = rate_limit_error(
+        {"retry-after-ms": "1"}
+    )
+    scheduler = RateLimitScheduler(max_retries=2)
+
+    try:
+        scheduler.create(client, {"model": "gpt-4o", "messages": []})
+    except RateLimitError:
+        pass
+    else:
+        assert False, "expected RateLimitError"
+    assert client.chat.completions.with_raw_response.create.call_count == 3
+
+
+def test_create_async():
+    completion = create_mock_response({"role": "assistant", "content": "hi"})
+    client = Mock()
+    client.chat.completions.with_raw_response.create = AsyncMock(
+        side_effect=[rate_limit_error({}), raw_response(completion, {})]
+    )
+    scheduler = RateLimitScheduler(base_delay=0.01)
+
+    result = asyncio.run(
+        scheduler.create_async(client, {"model": "gpt-4o", "messages": []})
+    )
+    assert result is completion
+    assert scheduler.rate_limited == 1
+
+
+def test_queued_coroutines_wait_without_polling():
+    scheduler = RateLimitScheduler(requests_per_minute=6000, burst=0.01)
+    grants = []
+    try_grant = scheduler.try_grant
+
+    def counting_try_grant(budget, entry):
+        grants.append(entry)
+        return try_grant(budget, entry)
+
+    scheduler.try_grant = counting_try_grant
+
+    async def main():
+        await asyncio.gather(*(scheduler.acquire_async("gpt-4o", 1) for _ in range(20)))
+
+    start = time.monotonic()
+    asyncio.run(main())
+
+    # one request every 10ms; polling every 5ms would try ~40 times per waiter
+    assert time.monotonic() - start >= 0.15
+    assert len(grants) < 20 * 4
+    assert not scheduler.budget("gpt-4o").queue
@@ -0,0 +1,90 @@
+import json
+import pytest
+from openai.types.chat.chat_completion_message import FunctionCall
+from swarm import serialization
+from swarm.serialization import (
+    STDLIB_CODEC,
+    get_codec,
+    message_to_dict,
+    orjson_codec,
+    set_codec,
+)
+from tests.mock_client import create_mock_response
+
+
+def reference_dict(message, sender):
+    message = message.model_copy()
+    message.sender = sender
+    return json.loads(message.model_dump_json())
+
+
+@pytest.mark.parametrize(
+    "function_calls",
+    [
+        [],
+        [{"name": "lookup", "args": {"query": "ünïcode " * 50, "limit": 3}}],
+        [{"name": f"tool_{i}", "args": {"payload": list(range(200))}} for i in range(5)],
+    ],
+)
+def test_message_to_dict_matches_model_dump(function_calls):
+    message = create_mock_response(
+        {"role": "assistant", "content": "hello"}, function_calls
+    ).choices[0].message
+
+    assert message_to_dict(message, "Agent") == reference_dict(message, "Agent")
+
+
+def test_message_to_dict_function_call_and_extras():
+    message = create_mock_response({"role": "assistant", "content": None}).choices[0].message
+    message.function_call = FunctionCall(name="legacy", arguments="{}")
+    message.provider_field = {"score": 1}
+
+    assert message_to_dict(message, "Agent") == reference_dict(message, "Agent")
+
+
+def test_set_codec():
+    calls = []
+
+    def loads(data):
+        calls.append(data)
+        return json.loads(data)
+
+    previous = get_codec()
+    set_codec(serialization.JSONCodec("counting", loads))
+    try:
+        assert serialization.loads('{"a": 1}') == {"a": 1}
+        assert calls == ['{"a": 1}']
+    finally:
+        set_codec(previous)
+    assert get_codec() is previous
+
+
+@pytest.mark.parametrize("codec", ["json", "orjson"])
+def test_codecs_parse(codec):
+    if codec == "orjson":
+        pytest.importorskip("orjson")
+        codec = orjson_codec()
+    else:
+        codec = STDLIB_CODEC
+    value = {"text": "ünïcode", "numbers": [1, 2.5, None, True], "nested": {"a": []}}
+
+    assert codec.loads(json.dumps(value)) == value
+    assert codec.loads(json.dumps(value).encode()) == value
+    with pytest.raises(ValueError):
+        codec.loads('{"truncated": ')
+
+
+def test_written_json_does_not_depend_on_codec():
+    pytest.importorskip("orjson")
+    from swarm import Agent, Swarm
+    from swarm.serve import encode_ws
+
+    previous = get_codec()
+    set_codec(orjson_codec())
+    try:
+        result = Swarm(client=object()).handle_function_result(Agent(name="Sales"), False)
+        frame = encode_ws({"type": "delta", "context": {1: 2**70}})
+    finally:
+        set_codec(previous)
+    assert result.value == json.dumps({"assistant": "Sales"})
+    assert json.loads(frame)["context"] == {"1": 2**70}
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from swarm import AsyncSwarm, Agent
+from swarm.serve import SwarmApp, encode_sse
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    create_mock_response,
+    create_mock_stream,
+)
+
+CONTENT = "Streaming over server-sent events works fine."
+REQUEST = {"agent": "Helper", "messages": [{"role": "user", "content": "Hi"}]}
+
+
+def make_app(*completions):
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = list(completions)
+    return SwarmApp(Agent(name="Helper"), AsyncSwarm(client=client))
+
+
+def content_stream():
+    return MockAsyncStream(
+        create_mock_stream({"role": "assistant", "content": CONTENT}, chunk_size=4)
+    )
+
+
+async def call_http(app, path, body, disconnect_after=None, method="POST"):
+    """Drives `app` like an ASGI server; the client leaves after `disconnect_after` sends."""
+    sent = []
+    gone = asyncio.Event()
+    requests = [{"type": "http.request", "body": json.dumps(body).encode()}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if disconnect_after is not None and len(sent) >= disconnect_after:
+            gone.set()
+            await asyncio.sleep(3600)  # a stalled client
+
+    scope = {"type": "http", "path": path, "method": method}
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    status = sent[0]["status"]
+    return status, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def parse_sse(body: bytes):
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_stream_endpoint_sends_sse():
+    app = make_app(content_stream())
+    status, body = asyncio.run(call_http(app, "/stream", REQUEST))
+    events = parse_sse(body)
+
+    assert status == 200
+    assert [name for name, _ in events[:2]] == ["start", "message"]
+    assert "".join(data.get("content", "") for name, data in events if name == "message") == CONTENT
+    name, response = events[-1]
+    assert name == "response"
+    assert response["agent"] == "Helper"
+    assert response["messages"][-1]["content"] == CONTENT
+    assert app.sessions == 0
+
+
+def test_run_endpoint_returns_json():
+    app = make_app(create_mock_response({"role": "assistant", "content": "Hello!"}))
+    status, body = asyncio.run(call_http(app, "/run", REQUEST))
+
+    assert status == 200
+    assert json.loads(body)["messages"][-1]["content"] == "Hello!"
+
+
+def test_run_endpoint_reports_errors():
+    app = make_app(RuntimeError("upstream is down"))
+    status, body = asyncio.run(call_http(app, "/run", REQUEST))
+
+    assert status == 500
+    assert json.loads(body) == {
+        "type": "error",
+        "error": "upstream is down",
+        "error_type": "RuntimeError",
+    }
+    assert app.sessions == 0
+
+
+def test_bad_requests():
+    app = make_app()
+    assert asyncio.run(call_http(app, "/stream", {"agent": "Nobody", "messages": []}))[0] == 404
+    assert asyncio.run(call_http(app, "/stream", {"agent": "Helper"}))[0] == 400
+    assert asyncio.run(call_http(app, "/nowhere", REQUEST))[0] == 404
+    full = SwarmApp(Agent(name="Helper"), AsyncSwarm(client=MockAsyncOpenAIClient()), max_sessions=0)
+    assert asyncio.run(call_http(full, "/run", REQUEST))[0] == 503
+
+
+def test_disconnect_closes_upstream_stream():
+    stream = content_stream()
+    app = make_app(stream)
+    asyncio.run(call_http(app, "/stream", REQUEST, disconnect_after=4))
+
+    assert stream.closed
+    # backpressure: the upstream stream was read no further than the client
+    assert stream.consumed <= 4
+    assert app.disconnects == 1
+    assert app.sessions == 0
+
+
+def test_websocket_runs_and_cancels():
+    stream = content_stream()
+    app = make_app(
+        MockAsyncStream(create_mock_stream({"role": "assistant", "content": "Hello!"})), stream
+    )
+    sent = []
+    incoming = asyncio.Queue()
+
+    async def receive():
+        return await incoming.get()
+
+    async def send(message):
+        sent.append(message)
+        frame = json.loads(message.get("text", "{}"))
+        if frame.get("type") == "response":
+            incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(REQUEST)})
+        elif frame.get("content") == CONTENT[:4]:
+            incoming.put_nowait({"type": "websocket.receive", "text": '{"type": "cancel"}'})
+            await asyncio.sleep(0.01)
+        elif frame.get("type") == "cancelled":
+            incoming.put_nowait({"type": "websocket.disconnect"})
+
+    async def main():
+        for message in (
+            {"type": "websocket.connect"},
+            {"type": "websocket.receive", "text": json.dumps(REQUEST)},
+        ):
+            incoming.put_nowait(message)
+        await asyncio.wait_for(app({"type": "websocket", "path": "/ws"}, receive, send), 5)
+
+    asyncio.run(main())
+    frames = [json.loads(m["text"]) for m in sent[1:]]
+    assert sent[0]["type"] == "websocket.accept"
+    types = [frame["type"] for frame in frames]
+    response = next(frame for frame in frames if frame["type"] == "response")
+    assert types[0] == "start" and "delta" in types
+    assert response["messages"][-1]["content"] == "Hello!"
+    assert types[-1] == "cancelled"
+    assert stream.closed
+
+
+def test_encode_sse_text_delta_fast_path():
+    delta = {"content": 'say "hi"', "function_call": None, "role": None, "tool_calls": None}
+    assert encode_sse(delta) == b'data: {"content":"say \\"hi\\""}\n\n'
+    first = {"content": "", "role": "assistant", "sender": "A", "function_call": None, "tool_calls": None}
+    assert json.loads(encode_sse(first)[6:]) == {"content": "", "role": "assistant", "sender": "A"}
@@ -0,0 +1,84 @@
+import json
+from collections import defaultdict
+
+from swarm.streaming import StreamAccumulator
+from swarm.util import merge_chunk
+from tests.mock_client import create_mock_stream
+
+
+def reference_accumulate(chunks, sender, record_events=True):
+    """The json round trip + merge_chunk path run_and_stream used to take."""
+    message = {
+        "content": "",
+        "sender": sender,
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": defaultdict(
+            lambda: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+        ),
+    }
+    events = []
+    for chunk in chunks:
+        delta = json.loads(chunk.choices[0].delta.json())
+        if delta["role"] == "assistant":
+            delta["sender"] = sender
+        if record_events:
+            # merge_chunk mutates the delta, so snapshot what was yielded
+            events.append(json.loads(json.dumps(delta)))
+        delta.pop("role", None)
+        delta.pop("sender", None)
+        merge_chunk(message, delta)
+    message["tool_calls"] = list(message["tool_calls"].values()) or None
+    return events, message
+
+
+def test_accumulator_matches_merge_chunk():
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": "Let me check the weather for you."},
+        [
+            {"name": "get_weather", "args": {"location": "San Francisco"}},
+            {"name": "get_time", "args": {"timezone": "America/Los_Angeles"}},
+        ],
+    )
+
+    accumulator = StreamAccumulator("Weather Agent")
+    events = [accumulator.add(chunk) for chunk in chunks]
+    expected_events, expected_message = reference_accumulate(chunks, "Weather Agent")
+
+    assert events == expected_events
+    assert accumulator.message() == expected_message
+    assert json.loads(
+        accumulator.message()["tool_calls"][1]["function"]["arguments"]
+    ) == {"timezone": "America/Los_Angeles"}
+
+
+def test_accumulator_without_tool_calls():
+    chunks = create_mock_stream({"role": "assistant", "content": "Hello there!"})
+
+    accumulator = StreamAccumulator("Agent")
+    for chunk in chunks:
+        accumulator.add(chunk)
+
+    assert accumulator.message() == {
+        "content": "Hello there!",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": None,
+    }
+
+
+def test_take_completed_tool_calls():
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": ""},
+        [{"name": "a", "args": {"x": 1}}, {"name": "b", "args": {"y": 2}}],
+    )
+    accumulator = StreamAccumulator("Agent")
+    completed = []
+    for chunk in chunks[:-1]:
+        accumulator.add(chunk)
+        completed.extend(index for index, _ in accumulator.take_completed())
+
+    # both argument objects parse before the stream's final chunk arrives
+    assert completed == [0, 1]
+    assert accumulator.take_completed(final=True) == []
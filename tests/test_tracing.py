@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pytest
+from swarm import AsyncSwarm, Swarm, Agent
+from swarm.tracing import (
+    InMemoryExporter,
+    JSONLExporter,
+    NOOP_SPAN,
+    NoopTracer,
+    Tracer,
+)
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+def handoff_responses():
+    return [
+        create_mock_response(
+            message={"role": "assistant", "content": ""},
+            function_calls=[{"name": "transfer_to_sales", "args": {}}],
+            usage={"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25},
+        ),
+        create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT},
+            usage={"prompt_tokens": 30, "completion_tokens": 7, "total_tokens": 37},
+        ),
+    ]
+
+
+def make_agents():
+    sales = Agent(name="Sales")
+
+    def transfer_to_sales():
+        return sales
+
+    return Agent(name="Triage", functions=[transfer_to_sales]), sales
+
+
+def assert_handoff_trace(exporter: InMemoryExporter):
+    (run,) = exporter.find("run")
+    turns = exporter.find("turn")
+    assert [turn.attributes["agent"] for turn in turns] == ["Triage", "Sales"]
+    assert all(turn.parent_id == run.span_id for turn in turns)
+    assert {span.trace_id for span in exporter.spans} == {run.trace_id}
+
+    llm_spans = exporter.find("llm")
+    assert [span.parent_id for span in llm_spans] == [t.span_id for t in turns]
+    assert llm_spans[0].attributes["prompt_tokens"] == 20
+    assert llm_spans[1].attributes["completion_tokens"] == 7
+
+    (tool,) = exporter.find("tool")
+    assert tool.parent_id == turns[0].span_id
+    assert tool.attributes["tool"] == "transfer_to_sales"
+    (handoff,) = exporter.find("handoff")
+    assert handoff.parent_id == turns[0].span_id
+    assert (handoff.attributes["from_agent"], handoff.attributes["to_agent"]) == (
+        "Triage", "Sales")
+    assert run.attributes == {"agent": "Triage", "turns": 2, "final_agent": "Sales"}
+    assert all(span.end_time >= span.start for span in exporter.spans)
+
+
+def test_run_spans():
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses(handoff_responses())
+    exporter = InMemoryExporter()
+    triage, _ = make_agents()
+
+    client = Swarm(client=mock_client, tracer=Tracer(exporter))
+    client.run(agent=triage, messages=[{"role": "user", "content": "Buy"}])
+
+    assert_handoff_trace(exporter)
+
+
+def test_stream_spans():
+    mock_client = MockOpenAIClient()
+    mock_client.set_sequential_responses(
+        [
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "transfer_to_sales", "args": {}}],
+                    usage={"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25},
+                )
+            ),
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT},
+                    usage={"prompt_tokens": 30, "completion_tokens": 7, "total_tokens": 37},
+                )
+            ),
+        ]
+    )
+    exporter = InMemoryExporter()
+    triage, _ = make_agents()
+
+    client = Swarm(client=mock_client, tracer=Tracer(exporter))
+    list(client.run(agent=triage, messages=[{"role": "user", "content": "Buy"}], stream=True))
+
+    assert_handoff_trace(exporter)
+    assert exporter.find("llm")[1].attributes["time_to_first_token"] >= 0
+
+
+def test_async_run_spans():
+    mock_client = MockAsyncOpenAIClient()
+    mock_client.set_sequential_responses(handoff_responses())
+    exporter = InMemoryExporter()
+    triage, _ = make_agents()
+
+    client = AsyncSwarm(client=mock_client, tracer=Tracer(exporter))
+    asyncio.run(client.run(agent=triage, messages=[{"role": "user", "content": "Buy"}]))
+
+    assert_handoff_trace(exporter)
+
+
+def test_failed_run_records_error():
+    mock_client = MockOpenAIClient()
+    mock_client.chat.completions.create.side_effect = RuntimeError("boom")
+    exporter = InMemoryExporter()
+
+    client = Swarm(client=mock_client, tracer=Tracer(exporter))
+    with pytest.raises(RuntimeError):
+        client.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+
+    (run,) = exporter.spans
+    assert run.name == "run"
+    assert run.attributes["error"] == "RuntimeError: boom"
+
+
+def test_noop_tracer_is_default():
+    mock_client = MockOpenAIClient()
+    mock_client.set_response(
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    client = Swarm(client=mock_client)
+
+    assert isinstance(client.tracer, NoopTracer)
+    assert client.tracer.start_span("run") is NOOP_SPAN
+    response = client.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JSONLExporter(str(path))
+    tracer = Tracer(exporter)
+
+    with tracer.start_span("run", agent="Triage") as run:
+        tracer.record_span("tool", 1.0, 1.5, run, tool="lookup")
+    exporter.close()
+
+    tool, root = [json.loads(line) for line in path.read_text().splitlines()]
+    assert root["name"] == "run" and root["parent_id"] is None
+    assert root["attributes"] == {"agent": "Triage"}
+    assert tool["parent_id"] == root["span_id"]
+    assert tool["trace_id"] == root["trace_id"]
+    assert tool["duration"] == 0.5
@@ -1,4 +1,5 @@
-from swarm.util import function_to_json
+from swarm import Agent
+from swarm.util import ToolTable, function_to_json
 
 
 def test_basic_function():
@@ -48,3 +49,41 @@ def test_complex_function():
             },
         },
     }
+
+
+def test_tool_table():
+    def lookup(order_id: int, context_variables):
+        """Looks up an order."""
+        pass
+
+    async def refund(order_id: int):
+        pass
+
+    table = ToolTable([lookup, refund])
+    assert table.tools[0]["function"]["parameters"] == {
+        "type": "object",
+        "properties": {"order_id": {"type": "integer"}},
+        "required": ["order_id"],
+    }
+    assert table.function_map == {"lookup": lookup, "refund": refund}
+    assert table.context_functions == {"lookup"}
+    assert table.coroutine_functions == {"refund"}
+
+
+def test_agent_tool_table_is_cached_until_functions_change():
+    def a():
+        pass
+
+    def b():
+        pass
+
+    agent = Agent(functions=[a])
+    table = agent.get_tool_table()
+    assert agent.get_tool_table() is table
+
+    agent.functions.append(b)
+    assert agent.get_tool_table() is not table
+    assert list(agent.get_tool_table().function_map) == ["a", "b"]
+
+    agent.functions = [b]
+    assert list(agent.get_tool_table().function_map) == ["b"]